@@ -5,9 +5,41 @@ import csv
 import math
 from mido import MidiFile, MetaMessage
 import struct
-from collections import defaultdict
+from collections import defaultdict, deque, namedtuple
 from mido import Message
 import re
+import io
+import glob
+import time
+import argparse
+import contextlib
+import concurrent.futures
+import multiprocessing
+import hashlib
+import shutil
+import pickle
+import heapq
+import bisect
+import itertools
+import tracemalloc
+import cProfile
+import json
+import logging
+import base64
+import http.server
+import socketserver
+import urllib.parse
+import signal
+import threading
+import yaz0
+
+VERSION = "0.9.9.5.5"
+
+# Hochzählen bei JEDER Änderung an den erzeugten Bytes (auch ohne neue VERSION). Steckt in den Schlüsseln vom
+# Konvertierungs-Cache und in den Kanal-Fingerprints (.channels), sonst kommen nach einem Update alte Ausgaben aus dem Cache.
+#   2: Loop ohne F0 00 F0 00 Füller, nur aufgerufene Taktblöcke    3: Logarithmisch wirkt auf Velocity und Lautstärke
+#   4: nochmal für Logarithmisch, damit kein Cache-Eintrag von vor dem Fix (lineare Ausgabe mit der .bat) übrig bleibt
+ENCODER_REVISION = 4
 
 def Generate_TimingNotes(Takt=0, Rate=1.0):
     sequence = []
@@ -95,8 +127,414 @@ def get_note_byte(note_number):
     #print("test")
     return note_number % 12
 
-def Parse_BankEnlarge_Markers(filename):
-    mid = mido.MidiFile(filename)
+## ERRORS ## ---------
+# Der Konverter bricht mit Exceptions ab statt mit sys.exit, damit er auch als Bibliothek benutzt werden kann.
+# Die Kommandozeile (und Batch/Watch) macht daraus wieder "❌ ERROR: ..." mit Exit-Code 1.
+
+class ConversionError(ValueError):
+    # Basis für alles, was eine Midi nicht konvertierbar macht
+    pass
+
+
+class MidiError(ConversionError):
+    # Midi lässt sich nicht lesen (kaputt, abgeschnitten, keine Midi)
+    pass
+
+
+class MarkerError(ConversionError):
+    # LoopStart/LoopEnd Marker fehlen, sind doppelt oder in falscher Reihenfolge
+    pass
+
+
+class TimingChannelError(ConversionError):
+    # Timing Kanal (BEAT Marker) ohne das, was er braucht (z.B. keine Bassnote, Bassnote hinter dem Songende)
+    pass
+
+
+class VoiceError(ConversionError):
+    # Mehr Noten gleichzeitig auf einem Kanal, als es Voices gibt (MAX_VOICES)
+    pass
+
+
+## ERRORS END ## ---------
+
+
+
+## LOGGING ## ---------
+# Konsolenausgabe läuft über logging mit Stufen statt print. Batch/Watch konvertieren leise (nur Warnungen), für Tools gibt es JSON Lines.
+#   debug    alles aus den inneren Schleifen: jeder Bank Enlarge Program Change, jede Akkord-/Tonleiternote, Taktwechsel, Timing Block Details
+#   info     der normale Bericht (PPQN, Loop, Kanäle, Werte fürs MultiBgmInfo Sheet)
+#   warning  ⚠️ Hinweise (fehlende Akkordnoten, Loop nicht auf dem Beat)
+# Immer mit %-Platzhaltern loggen (CONVERT_LOG.info("PPQN: %d", ppqn)), dann wird bei abgeschalteter Stufe nichts formatiert.
+# Ganze Debug-Blöcke zusätzlich mit CONVERT_LOG.isEnabledFor(logging.DEBUG) überspringen.
+
+LOG = logging.getLogger("midi_to_bms")                      # Kommandozeile: Version, Batch/Watch Ergebnisse
+CONVERT_LOG = logging.getLogger("midi_to_bms.convert")      # Alles was beim Konvertieren selbst passiert
+LOG.addHandler(logging.NullHandler())                       # Als Modul importiert: still, bis Setup_Logging() aufgerufen wird
+
+LOG_LEVELS = ("debug", "info", "warning", "error")
+LOG_SETTINGS = None     # (level, format, convert_level) vom letzten Setup_Logging, für Worker-Prozesse
+
+
+class Console_Handler(logging.Handler):
+    # Schreibt ins gerade aktuelle sys.stdout (nicht das beim Start), damit redirect_stdout und Test-Capture funktionieren
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+class JSON_Formatter(logging.Formatter):
+    # Eine JSON Zeile pro Meldung, Zusatzfelder aus extra={...} kommen mit
+    FIELDS = ("midi", "bms", "channel", "tick", "ok", "cached", "seconds", "error", "log")
+
+    def format(self, record):
+        entry = {"time": round(record.created, 3), "level": record.levelname.lower(), "logger": record.name,
+                 "message": record.getMessage().strip()}
+        for field in self.FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class Text_Formatter(logging.Formatter):
+    # Nur die Meldung. Ein mitgegebener Log-Text (extra={"log": ...}, z.B. von einer fehlgeschlagenen Batch-Datei) kommt darunter
+    def __init__(self):
+        super().__init__("%(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        log = getattr(record, "log", None)
+        if log:
+            text += "\n" + log.rstrip("\n")
+        return text
+
+
+def Skip_Blank_Lines(record):
+    # Leere Zeilen sind nur Abstand für Menschen, in JSON Lines fallen sie weg
+    return bool(record.getMessage().strip())
+
+
+class Record_Collector(logging.Handler):
+    # Sammelt Meldungen als einfache dicts (picklebar), damit ein Worker-Prozess sie zurückgeben kann
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        entry = dict(record.__dict__)
+        entry["msg"] = record.getMessage()      # schon formatiert, die args müssen dann nicht mit
+        entry["args"] = None
+        entry["exc_info"] = None                # Traceback steht (falls formatiert) noch in exc_text
+        self.records.append(entry)
+
+
+@contextlib.contextmanager
+def Collect_Log_Records():
+    # Alle Meldungen einsammeln statt ausgeben (die Stufen gelten weiter) -> Liste für Replay_Log_Records
+    collector = Record_Collector()
+    handlers, propagate = LOG.handlers[:], LOG.propagate
+    LOG.handlers[:] = [collector]
+    LOG.propagate = False
+    try:
+        yield collector.records
+    finally:
+        LOG.handlers[:] = handlers
+        LOG.propagate = propagate
+
+
+def Format_Log_Records(records):
+    # Eingesammelte Meldungen als Text (eine Zeile pro Meldung), z.B. als "log" Feld
+    return "".join(entry["msg"] + "\n" for entry in records)
+
+
+def Replay_Log_Records(records):
+    # Eingesammelte Meldungen durch die eigenen Handler schicken (Text/JSON, wie alles andere im Hauptprozess)
+    for entry in records:
+        record = logging.makeLogRecord(entry)
+        logging.getLogger(record.name).handle(record)
+
+
+def Setup_Logging(level="info", format="text", convert_level=None):
+    # level: Kommandozeile, convert_level: Konvertierung selbst (None = gleich wie level). format: "text" oder "json"
+    global LOG_SETTINGS
+    LOG_SETTINGS = (level, format, convert_level)
+    handler = Console_Handler()
+    if format == "json":
+        handler.setFormatter(JSON_Formatter())
+        handler.addFilter(Skip_Blank_Lines)
+    else:
+        handler.setFormatter(Text_Formatter())
+    for old in LOG.handlers[:]:
+        LOG.removeHandler(old)
+    LOG.addHandler(handler)
+    LOG.propagate = False
+    LOG.setLevel(level.upper())
+    CONVERT_LOG.setLevel((convert_level or level).upper())
+
+
+## LOGGING END ## ---------
+
+
+
+## STAGE TIMING ## ---------
+# Zeit pro Stage (parse, markers, global_events, channel_creators, fingerprint, channel N, channels, timing_and_chord, link, cit).
+# STAGE_TIMES = {} einschalten, danach steht dort die Summe in Sekunden pro Stage (für Benchmarks, nur die Namen, ohne Verschachtelung).
+# PROFILE = Profile() zählt zusätzlich Aufrufe und Spitzen-Speicher pro Stage (--profile). None = aus (kostet dann nichts).
+# Stages können verschachtelt sein (channels in channel N): Profile führt sie als Pfad "channel 3/channels" und rückt sie in der
+# Tabelle ein, ihre Zeit steckt schon in der Zeile darüber und zählt nicht nochmal. tracemalloc macht die Konvertierung mit
+# --profile bei großen Songs bis zu 5x langsamer, die Anteile stimmen trotzdem ungefähr (Profile(memory=False) misst ohne).
+
+STAGE_TIMES = None
+PROFILE = None
+
+class Profile:
+    def __init__(self, memory=True):
+        self.stages = {}          # pfad -> {"calls", "seconds", "peak_bytes", "depth"} (in der Reihenfolge vom ersten Aufruf)
+        self.stack = []           # offene Stages: [pfad, Speicher beim Start, höchster Speicher bisher]
+        self.memory = memory
+        self.own_tracemalloc = memory and not tracemalloc.is_tracing()
+        if self.own_tracemalloc:
+            tracemalloc.start()
+
+    def Enter(self, name):
+        current = peak = 0
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1][2] = max(self.stack[-1][2], peak)   # Spitze vom äußeren Stage nicht verlieren
+            tracemalloc.reset_peak()
+        path = self.stack[-1][0] + "/" + name if self.stack else name
+        self.stages.setdefault(path, {"calls": 0, "seconds": 0.0, "peak_bytes": 0, "depth": len(self.stack)})
+        self.stack.append([path, current, current])
+
+    def Exit(self, name, seconds):
+        path, base, highest = self.stack.pop()
+        extra = 0
+        if self.memory:
+            highest = max(highest, tracemalloc.get_traced_memory()[1])
+            extra = highest - base                                  # wie viel der Stage zusätzlich gebraucht hat
+            tracemalloc.reset_peak()
+            if self.stack:
+                self.stack[-1][2] = max(self.stack[-1][2], highest)
+        stage = self.stages[path]
+        stage["calls"] += 1
+        stage["seconds"] += seconds
+        stage["peak_bytes"] = max(stage["peak_bytes"], extra)
+
+    def Stop(self):
+        if self.own_tracemalloc:
+            tracemalloc.stop()
+            self.own_tracemalloc = False
+
+    def Table(self, total=None):
+        # Eingerückte Zeilen sind ein Teil der Zeile darüber, nur die äußeren ergeben zusammen (mit "other") 100%
+        outer = sum(stage["seconds"] for stage in self.stages.values() if stage["depth"] == 0)
+        if total is None:
+            total = outer
+        lines = [f"{'Stage':<24}{'Calls':>8}{'Seconds':>11}{'%':>7}{'Peak MB':>10}"]
+        for path, stage in self.stages.items():
+            name = "  " * stage["depth"] + path.rsplit("/", 1)[-1]
+            percent = stage["seconds"] / total * 100 if total else 0
+            lines.append(f"{name:<24}{stage['calls']:>8}{stage['seconds']:>11.3f}{percent:>6.1f}%{stage['peak_bytes'] / 1048576:>10.2f}")
+        if total > outer:
+            other = total - outer       # Zeit außerhalb aller Stages (Log, Aufräumen, ...)
+            lines.append(f"{'other':<24}{'':>8}{other:>11.3f}{other / total * 100:>6.1f}%")
+        lines.append(f"{'total':<24}{'':>8}{total:>11.3f}")
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def Stage(name):
+    if STAGE_TIMES is None and PROFILE is None:
+        yield
+        return
+    if PROFILE is not None:
+        PROFILE.Enter(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if STAGE_TIMES is not None:
+            STAGE_TIMES[name] = STAGE_TIMES.get(name, 0.0) + seconds
+        if PROFILE is not None:
+            PROFILE.Exit(name, seconds)
+
+
+def Staged(name):
+    # Decorator: ganze Funktion als Stage zählen (z.B. jede Markersuche)
+    def decorate(function):
+        def wrapper(*args, **kwargs):
+            if STAGE_TIMES is None and PROFILE is None:
+                return function(*args, **kwargs)
+            with Stage(name):
+                return function(*args, **kwargs)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+    return decorate
+
+
+def Run_Profiled(function, *args, output=None, **kwargs):
+    # function mit Profile laufen lassen, Tabelle ausgeben. output: .json -> Stages als JSON, sonst cProfile Stats (pstats)
+    global PROFILE
+    PROFILE = Profile()
+    profiler = cProfile.Profile() if output is not None and not output.lower().endswith(".json") else None
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            total = time.perf_counter() - start
+            profile = PROFILE
+            PROFILE = None
+            profile.Stop()
+            LOG.info("")
+            LOG.info("Profile:\n%s", profile.Table(total))
+            if output is not None and profiler is None:
+                with open(output, "w", encoding="utf-8") as f:
+                    json.dump({"total_seconds": total, "stages": profile.stages}, f, indent=1)
+            elif profiler is not None:
+                profiler.dump_stats(output)
+            if output is not None:
+                LOG.info("Profile written to %s", output)
+    finally:
+        PROFILE = None
+
+
+## STAGE TIMING END ## ---------
+
+
+
+## SONG CONTEXT ## ---------
+# Midi wird nur EINMAL geparst und dann an alle Stages weitergegeben (statt x-mal MidiFile() aufzurufen)
+
+class SongContext:
+    def __init__(self, midifile):
+        if isinstance(midifile, MidiFile):
+            self.mid = midifile
+            self.filename = midifile.filename
+        else:
+            self.mid = mido.MidiFile(midifile)
+            self.filename = midifile
+        self.ticks_per_beat = self.mid.ticks_per_beat
+        self.tracks = self.mid.tracks
+        self._scaled_tracks = {}   # ppqn_target -> [[(time_acc, msg), ...], ...]
+        self._channel_events = {}  # ppqn_target -> {channel: [(time_acc, msg), ...]}
+        self.streaming = False     # True: nichts zwischenspeichern, jede Stage läuft als Generator über die Tracks
+
+        # Einmal durchgehen: Marker, benutzte Kanäle und letzter NoteOff Tick (alles in Original-Ticks)
+        self.markers = {}          # Markername -> erste Tickposition
+        used_channels = set()
+        self.track_channels = []   # pro Track: Kanäle mit Events, None = hat Events für alle (Loop Marker, CC0)
+        self.last_note_tick = 0
+        for track in self.tracks:
+            tick_position = 0
+            track_channels = set()
+            for msg in track:
+                tick_position += msg.time
+                if msg.type == 'marker':
+                    self.markers.setdefault(msg.text, tick_position)
+                    if msg.text == 'LoopStart' or msg.text == 'LoopEnd':
+                        track_channels.add(None)
+                elif msg.type in ['note_on', 'note_off', 'control_change', 'program_change']:
+                    used_channels.add(msg.channel)
+                    track_channels.add(None if msg.type == 'control_change' and msg.control == 0 else msg.channel)
+                elif msg.type == 'pitchwheel':
+                    track_channels.add(msg.channel)
+                if msg.type in ['note_off', 'note_on'] and msg.velocity == 0:
+                    self.last_note_tick = max(self.last_note_tick, tick_position)
+            self.track_channels.append(track_channels)
+        self.used_channels = sorted(used_channels)
+
+    def Scaled_Track(self, track, ppqn_target=120):
+        # Generator: (time_acc, msg) mit absoluter, auf ppqn_target umgerechneter Tickposition
+        ppqn_scale = ppqn_target / self.ticks_per_beat
+        time_acc_real = 0.0   # float für exakte ppqn umrechnung
+        for msg in track:
+            time_acc_real += msg.time * ppqn_scale
+            yield int(round(time_acc_real)), msg
+
+    def Scaled_Tracks(self, ppqn_target=120):
+        # Alle Tracks mit absoluter, auf ppqn_target umgerechneter Tickposition (wird pro PPQN nur einmal berechnet)
+        if self.streaming:
+            return [self.Scaled_Track(track, ppqn_target) for track in self.tracks]   # jedes Mal neu, nichts behalten
+        if ppqn_target not in self._scaled_tracks:
+            self._scaled_tracks[ppqn_target] = [list(self.Scaled_Track(track, ppqn_target)) for track in self.tracks]
+        return self._scaled_tracks[ppqn_target]
+
+    def Channel_Events(self, ppqn_target=120):
+        # Kanal-Demux: EIN Durchgang über alle Tracks, jedes Event landet im Eimer seines Kanals.
+        # CC0 (Bank Select) und LoopStart/LoopEnd gehören allen Kanälen und kommen in jeden Eimer.
+        if ppqn_target not in self._channel_events:
+            events = []
+            for track in self.Scaled_Tracks(ppqn_target):
+                for time_acc, msg in track:
+
+                    #Marker für LoopStart und LoopEnd aufspüren
+                    if msg.type == 'marker':
+                        if msg.text == 'LoopStart' or msg.text == 'LoopEnd':
+                            events.append((time_acc, None, msg.text))
+                        continue
+
+                    if msg.type == 'control_change' and msg.control == 0:
+                        # Immer merken, auch außerhalb des eigenen Kanals!
+                        events.append((time_acc, None, msg))
+
+                    elif msg.type in ['note_on', 'note_off', 'control_change', 'program_change', 'pitchwheel']:
+                        events.append((time_acc, msg.channel, msg))
+
+            # Events nach Zeit sortieren (stabil, also Reihenfolge bei gleichem Tick bleibt wie vorher)
+            events.sort(key=lambda e: e[0])
+
+            buckets = {channel: [] for channel in range(16)}
+            for time_acc, channel, msg in events:
+                if channel is None:
+                    for bucket in buckets.values():
+                        bucket.append((time_acc, msg))
+                else:
+                    buckets[channel].append((time_acc, msg))
+            self._channel_events[ppqn_target] = buckets
+        return self._channel_events[ppqn_target]
+
+    def Stream_Channel_Events(self, target_channel, ppqn_target=120):
+        # Wie Channel_Events(...)[target_channel], aber als Generator: die Tracks werden nach Zeit zusammengemischt
+        # (heapq.merge nimmt bei gleichem Tick den früheren Track zuerst, also gleiche Reihenfolge wie das stabile Sortieren)
+        # Nur Tracks mit Events für diesen Kanal (oder für alle) werden gelesen. Bei einer Midi mit nur einem Track
+        # (Typ 0) geht trotzdem jeder Kanal einmal über alles, das ist der Preis dafür, dass nichts zwischengespeichert wird.
+        def Track_Events(track):
+            for time_acc, msg in track:
+                if msg.type == 'marker':
+                    if msg.text == 'LoopStart' or msg.text == 'LoopEnd':
+                        yield time_acc, msg.text
+                elif msg.type == 'control_change' and msg.control == 0:
+                    yield time_acc, msg
+                elif msg.type in ['note_on', 'note_off', 'control_change', 'program_change', 'pitchwheel'] and msg.channel == target_channel:
+                    yield time_acc, msg
+
+        tracks = [Track_Events(self.Scaled_Track(track, ppqn_target)) for track, channels in zip(self.tracks, self.track_channels)
+                  if target_channel in channels or None in channels]
+        return heapq.merge(*tracks, key=lambda e: e[0])
+
+
+def Load_Song(midifile):
+    # Nimmt Dateipfad, MidiFile oder schon fertigen SongContext
+    if isinstance(midifile, SongContext):
+        return midifile
+    return SongContext(midifile)
+
+## SONG CONTEXT END ## ---------
+
+
+@Staged("markers")
+def Parse_BankEnlarge_Markers(song):
+    song = Load_Song(song)
 
     bank_enlarge_map = {}
 
@@ -104,7 +542,7 @@ def Parse_BankEnlarge_Markers(filename):
         r"^BankEnlarge_MIDIBank(\d+)=BMSBank(\d+)$"
     )
 
-    for track in mid.tracks:
+    for track in song.tracks:
         for msg in track:
             if msg.type == 'marker':
                 m = pattern.match(msg.text)
@@ -122,21 +560,14 @@ def LogarithmicCalculate(value): # Recalculate linear volume values to logarithm
     gain = 127 / (40 * math.log10(1 + 1))  #Normalise to 127
     return max(1, min(127, int(gain * 40 * math.log10(1 + value / 127))))
 
-def GetTimeSignatureChanges(mid, ppqn_target=120):
-
-    ppqn_scale = ppqn_target / mid.ticks_per_beat
+def GetTimeSignatureChanges(song, ppqn_target=120):
+    song = Load_Song(song)
 
     TimeSignatureEvents = []
 
-    for track in mid.tracks:
-
-        time_acc_real = 0.0
-        time_acc = 0
-
-        for msg in track:
+    for track in song.Scaled_Tracks(ppqn_target):
 
-            time_acc_real += msg.time * ppqn_scale
-            time_acc = int(round(time_acc_real))
+        for time_acc, msg in track:
 
             #print(msg.type, msg.time, time_acc)
             if msg.type == "time_signature":
@@ -162,9 +593,9 @@ def GetTimeSignatureChanges(mid, ppqn_target=120):
     TimeSignatureEvents.sort(key=lambda x: x["tick"])
     return TimeSignatureEvents
 
-def Get_BPM(filename):
-    mid = MidiFile(filename)
-    for track in mid.tracks:
+def Get_BPM(song):
+    song = Load_Song(song)
+    for track in song.tracks:
         for msg in track:
             if msg.type == 'set_tempo':
                 bpm = round(60000000 / msg.tempo)
@@ -173,94 +604,230 @@ def Get_BPM(filename):
     return None, None  #Kein Tempo gefunden
 
 
-def Get_UsedChannels(midi_path):
-    mid = MidiFile(midi_path)
-    used_channels = set()
-
-    for track in mid.tracks:
-        for msg in track:
-            if msg.type in ['note_on', 'note_off', 'control_change', 'program_change'] and hasattr(msg, 'channel'): 
-                used_channels.add(msg.channel)
-
-    return sorted(used_channels)
-
-
-def Find_Marker_Position(filename, target_name="LoopStart"):
-    mid = mido.MidiFile(filename)
-
-    for track in mid.tracks:
-        tick_position = 0
-        for msg in track:
-            tick_position += msg.time
-            if msg.type == 'marker' and msg.text == target_name:
-                return tick_position  # Sofort zurückgeben wenns gefunden
+def Get_UsedChannels(song):
+    return list(Load_Song(song).used_channels)
 
-    return None  # Falls kein Marker mit dem namen gefunden wurde
 
+@Staged("markers")
+def Find_Marker_Position(song, target_name="LoopStart"):
+    # Erste Position des Markers, oder None falls kein Marker mit dem namen gefunden wurde
+    return Load_Song(song).markers.get(target_name)
 
-def Get_Last_Note_Tick(filename):
-    mid = mido.MidiFile(filename)
-    last_tick = 0
 
-    for track in mid.tracks:
-        current_tick = 0
-        for msg in track:
-            current_tick += msg.time
-            if msg.type in ['note_off', 'note_on'] and msg.velocity == 0:
-                last_tick = max(last_tick, current_tick)
-        
-    return last_tick
+def Get_Last_Note_Tick(song):
+    return Load_Song(song).last_note_tick
 
 
 
 def ENCODE_VLQ(value): # VLQ-Kodierung (wenn größer als 80 Zeugs) für den F0-Command  (Duration)
-    bytes_out = []
-    while True:
-        byte = value & 0x7F
-        bytes_out.insert(0, byte)
+    bytes_out = [value & 0x7F]
+    value >>= 7
+    while value:
+        bytes_out.append((value & 0x7F) | 0x80)  #Fortsetzungsbit setzen
         value >>= 7
-        if value == 0:
-            break
-    for i in range(len(bytes_out) - 1):
-        bytes_out[i] |= 0x80  #Fortsetzungsbit setzen
+    bytes_out.reverse()
     return bytes_out
 
 
+# Fertige F0-Delays für die häufigen kleinen Deltas (bis 2 VLQ-Bytes), damit pro Wartezeit keine Listen entstehen
+DELAY_TABLE_SIZE = 0x4000
+DELAY_TABLE = [bytes([0xF0] + ENCODE_VLQ(delta)) for delta in range(DELAY_TABLE_SIZE)]
+
+def Write_Delay(buffer, delta): # F0 + VLQ direkt in den Ausgabepuffer schreiben
+    if delta < DELAY_TABLE_SIZE:
+        buffer.extend(DELAY_TABLE[delta])
+    else:
+        buffer.append(0xF0)
+        buffer.extend(ENCODE_VLQ(delta))
+
+
 
 
 ## VOICE MECHANIC ## ---------
 
-MAX_VOICES = 7   # in case more are possible, change this
-free_voices = list(range(1, MAX_VOICES + 1))
-note_active = defaultdict(list)   # note -> [voice1, voice2, …]
-
-def assign_voice(note, channel_num):
-    #immer eine FRISCHE Voice nehmen
-    if not free_voices:
-        raise RuntimeError(
-            f"--- Error! Channel {channel_num} has more than {MAX_VOICES} "
-            "notes sounding at the same time! ---"
-        )
-    voice = free_voices.pop(0)        #niedrigste freie ID
-    note_active[note].append(voice)   #mehrere Voices pro (GLEICHE!) Note möglich (genau wie Donald Duck N64!)
-    return voice
-
-def release_voice(note):
-    if note_active[note]:             # noch mindestens eine Voice offen
-        voice = note_active[note].pop(0)   # älteste zuerst beenden
-        free_voices.append(voice)
-        free_voices.sort()            # kleinste IDs zuerst wiederverwenden
+MAX_VOICES = 7   # Note Off ist 0x80 | Voice (81-87), ab 0x88 fangen andere Befehle an -> nicht mehr als 7
+
+class VoiceAllocator:
+    # Eine Instanz pro Kanal, damit hängende Noten von einem Kanal nicht in den nächsten rutschen.
+    # Freie Voices liegen in einem Min-Heap -> niedrigste freie ID in O(log n)
+    def __init__(self, channel_num=0):
+        self.channel_num = channel_num
+        self.free_voices = list(range(1, MAX_VOICES + 1))   # sortiert = schon ein gültiger Heap
+        self.note_active = defaultdict(deque)               # note -> [voice1, voice2, …]
+
+    def assign_voice(self, note):
+        #immer eine FRISCHE Voice nehmen
+        if not self.free_voices:
+            raise VoiceError(
+                f"Channel {self.channel_num} has more than {MAX_VOICES} "
+                "notes sounding at the same time!"
+            )
+        voice = heapq.heappop(self.free_voices)   #niedrigste freie ID
+        self.note_active[note].append(voice)      #mehrere Voices pro (GLEICHE!) Note möglich (genau wie Donald Duck N64!)
         return voice
-    return None
+
+    def release_voice(self, note):
+        active = self.note_active.get(note)
+        if active:                                # noch mindestens eine Voice offen
+            voice = active.popleft()              # älteste zuerst beenden
+            heapq.heappush(self.free_voices, voice)   # kleinste IDs zuerst wiederverwenden
+            return voice
+        return None
 
 
 ## VOICE MECHANIC END ## ---------
 
 
 
+## BMS ASSEMBLER ## ---------
+# Die ganze BMS wird im Speicher gebaut. Statt 77 77 77 Platzhalter zu schreiben und später in der Datei
+# danach zu suchen, merken wir uns Sprungmarken (Labels) und wo Pointer hin müssen (Relocations).
+# Beim Linken werden dann ALLE 24 bit Pointer in einem Durchgang eingesetzt.
+
+class BMSData(bytearray):
+    # bytearray, das sich Loop- und C3-Sprungmarken merkt: [(offset, art, wert), ...]
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.marks = []
+
+    def __iadd__(self, other):
+        if isinstance(other, BMSData):
+            base = len(self)
+            self.marks += [(base + offset, kind, value) for offset, kind, value in other.marks]
+        self.extend(other)
+        return self
+
+    def LoopStart(self):
+        self.marks.append((len(self), 'LoopStart', None))   # Nur Offset merken, kein Byte (früher F0 00 F0 00)
+
+    def LoopEnd(self):
+        self.marks.append((len(self), 'LoopEnd', None))
+        self.extend(b'\xC7\x00\x00\x00')    # C7 Goto, Adresse wird beim Linken eingesetzt
+
+    def Call(self, takt):
+        self.marks.append((len(self), 'Call', takt))
+        self.extend(b'\xC3\x00\x00\x00')    # C3 Call zum Taktblock, Adresse wird beim Linken eingesetzt
+
+    def Label(self, name):
+        self.marks.append((len(self), 'Label', name))   # Sprungziel (z.B. Taktblock für C3)
+
+    def Call_Sites(self):
+        # Index aller C3 Calls: takt -> [offsets]
+        sites = defaultdict(list)
+        for offset, kind, value in self.marks:
+            if kind == 'Call':
+                sites[value].append(offset)
+        return sites
+
+
+class BMSAssembler:
+    def __init__(self):
+        self.data = bytearray()
+        self.labels = {}          # name -> offset
+        self.relocations = []     # (offset, name) -> dort kommt der 24 bit Pointer zum Label hin
+        self.loop_counter = 0
+
+        self.loop_label = None
+
+    def Tell(self):
+        return len(self.data)
+
+    def Emit(self, chunk):
+        self.data += chunk
+
+    def Label(self, name):
+        self.labels[name] = self.Tell()
+
+    def Pointer(self, name):
+        self.relocations.append((self.Tell(), name))
+        self.Emit(b'\x00\x00\x00')
+
+    def Write(self, chunk, continued=False):
+        # continued: Chunk gehört noch zum gleichen Kanal wie der letzte (Streaming), Loop geht also weiter
+        base = self.Tell()
+        self.Emit(chunk)
+
+        # Sprungmarken vom Chunk in Labels und Relocations umwandeln (Loop bleibt innerhalb eines Kanals)
+        if not continued:
+            self.loop_label = None
+        for offset, kind, value in getattr(chunk, 'marks', ()):
+            if kind == 'LoopStart':
+                self.loop_counter += 1
+                self.loop_label = ('LoopStart', self.loop_counter)
+                self.labels[self.loop_label] = base + offset
+            elif kind == 'LoopEnd':
+                if self.loop_label is None:
+                    raise MarkerError("'LoopEnd' marker is placed before 'LoopStart'!")
+                self.relocations.append((base + offset + 1, self.loop_label))
+            elif kind == 'Call':
+                self.relocations.append((base + offset + 1, ('Taktblock', value)))
+            elif kind == 'Label':
+                self.labels[value] = base + offset
+
+    def Link(self):
+        for offset, name in self.relocations:
+            if name not in self.labels:
+                raise ConversionError(f"Missing jump target {name}!")
+            self.data[offset:offset + 3] = self.labels[name].to_bytes(3, byteorder='big')
+        return bytes(self.data)
+
+
+class BMSStreamWriter(BMSAssembler):
+    # Wie BMSAssembler, aber die Bytes gehen über einen festen Puffer direkt in eine temporäre Datei.
+    # Im Speicher bleiben nur Puffer, Labels und Relocations, die Pointer werden beim Linken in der Datei eingesetzt.
+    # Als with-Block: klappt alles, wird die Datei zur fertigen BMS umbenannt, sonst wieder gelöscht.
+    def __init__(self, Output_BMS, buffer_size=64 * 1024):
+        super().__init__()
+        self.path = Output_BMS
+        self.temp = Output_BMS + f".tmp{os.getpid()}"
+        self.sink = open(self.temp, "w+b")
+        self.buffer_size = buffer_size
+        self.flushed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sink.close()
+        if exc_type is None:
+            os.replace(self.temp, self.path)
+        else:
+            os.remove(self.temp)
+        return False
+
+    def Tell(self):
+        return self.flushed + len(self.data)
+
+    def Emit(self, chunk):
+        self.data += chunk
+        if len(self.data) >= self.buffer_size:
+            self.Flush()
+
+    def Flush(self):
+        self.sink.write(self.data)
+        self.flushed += len(self.data)
+        self.data = bytearray()
+
+    def Link(self):
+        self.Flush()
+        for offset, name in self.relocations:
+            if name not in self.labels:
+                raise ConversionError(f"Missing jump target {name}!")
+            self.sink.seek(offset)
+            self.sink.write(self.labels[name].to_bytes(3, byteorder='big'))
+        self.sink.seek(0, os.SEEK_END)
+        return self.flushed
+
+
+## BMS ASSEMBLER END ## ---------
+
+
+
 from collections import defaultdict
 
-def NOTES_to_BMSDATA(notedata, AllTicks, ppqn_original=120, ppqn_target=120): #Nur für Taktzeug
+def NOTES_to_BMSDATA(notedata, AllTicks, ppqn_original=120, ppqn_target=120, voices=None): #Nur für Taktzeug
+    if voices is None:
+        voices = VoiceAllocator()   # Taktblöcke sind in sich abgeschlossen (alle Noten gehen im Block wieder aus)
     ppqn_scale = ppqn_target / ppqn_original
 
     # Zeit skalieren
@@ -275,7 +842,7 @@ def NOTES_to_BMSDATA(notedata, AllTicks, ppqn_original=120, ppqn_target=120): #N
         grouped_events[time].append(msg)
 
     current_time = 0
-    output = bytearray()
+    output = BMSData()
     last_bank = None
 
     for timestamp in sorted(grouped_events.keys()):
@@ -283,21 +850,18 @@ def NOTES_to_BMSDATA(notedata, AllTicks, ppqn_original=120, ppqn_target=120): #N
         current_time = timestamp
 
         if delta > 0:
-            output += bytes([0xF0] + ENCODE_VLQ(delta))
+            Write_Delay(output, delta)
 
         for msg in grouped_events[timestamp]:
 
             if isinstance(msg, mido.Message):
                 ## NOTES ##
                 if msg.type == 'note_on' and msg.velocity > 0:
-                    voice = assign_voice(msg.note, msg.channel)
-                    velocity = msg.velocity
-                    if LinearToLogarithmic == True:
-                        velocity = LogarithmicCalculate(msg.velocity)
-                    output += bytes([
+                    voice = voices.assign_voice(msg.note)
+                    output += bytes([   # Timingnoten sind Steuernoten: Velocity bleibt immer linear
                         msg.note & 0xFF,
                         voice & 0xFF,
-                        velocity & 0xFF
+                        msg.velocity & 0xFF
                     ])
 
                 elif msg.type in ['note_off', 'note_on'] and msg.velocity == 0:
@@ -305,7 +869,7 @@ def NOTES_to_BMSDATA(notedata, AllTicks, ppqn_original=120, ppqn_target=120): #N
                         # voice = release_voice(msg.note)
                         # if voice is not None:
                             # output += bytes([0x80 | (voice & 0x0F)])
-                    voice = release_voice(msg.note)
+                    voice = voices.release_voice(msg.note)
                     if voice is not None:
                         output += bytes([0x80 | (voice & 0x0F)])   # 81–87
 
@@ -321,34 +885,103 @@ def NOTES_to_BMSDATA(notedata, AllTicks, ppqn_original=120, ppqn_target=120): #N
                             output += bytes([0xE2, msg.value & 0xFF, 0xE3, msg.value & 0xFF])
                         ## Enter Loop Start Placeholder
                         if msg.control == 2:
-                            output += bytes([0x77, 0x77, 0x77, 0x01])
+                            output.LoopStart()
                         ## Enter Loop End Placeholder
                         if msg.control == 3:
                             if msg.value == -1:        ## Letztes E1 Kommand erneut (wegen loop)
                                 output += bytes([0xE2, 0x00, 0xE3, 0x00])
                             else:
                                 output += bytes([0xE2, msg.value & 0xFF, 0xE3, msg.value & 0xFF])
-                            output += bytes([0x77, 0x77, 0x77, 0x02])
+                            output.LoopEnd()
                             
                         #!! E1 GEHT BEI CHORD NICHT! Nimm E2 und E3!
     return output
 
 
-def GLOBALMIDIEVENTS_to_BMSDATA(midifile, AllTicks, Loop, ppqn_target=120):
-    mid = mido.MidiFile(midifile)
-    ppqn_original = mid.ticks_per_beat
-    ppqn_scale = ppqn_target / ppqn_original
+## TIMING BLOCK TABLE ## ---------
+# Die Timingnoten eines Taktes sind immer gleich. Also pro (Takt, Rate) nur EINMAL aus Midi-Noten zu Bytes machen,
+# und für Takte mit E1/Loop-Zusätzen die Zusätze direkt an den bekannten Stellen in die fertigen Bytes einsetzen.
+
+TIMING_BLOCKS = {}   # (Takt, Rate) -> (bytes, [(timestamp, start, end), ...])
+
+def Compile_TimingBlock(Takt, Rate=1.0):
+    grouped_events = defaultdict(list)
+    for abs_time, msg in Generate_TimingNotes(Takt, Rate):
+        grouped_events[int(round(abs_time))].append(msg)
+
+    data = bytearray()
+    groups = []       # wo die Noten-Bytes jedes Zeitpunktes liegen (ohne das Wait davor)
+    voices = VoiceAllocator()
+    current_time = 0
+    for timestamp in sorted(grouped_events.keys()):
+        delta = timestamp - current_time
+        current_time = timestamp
+        if delta > 0:
+            Write_Delay(data, delta)
+        start = len(data)
+        data += NOTES_to_BMSDATA([(0, msg) for msg in grouped_events[timestamp]], 0, voices=voices)
+        groups.append((timestamp, start, len(data)))
+    return bytes(data), groups
+
+
+def Timing_Block_Table(Takt, Rate=1.0):
+    key = (Takt, Rate)
+    if key not in TIMING_BLOCKS:
+        TIMING_BLOCKS[key] = Compile_TimingBlock(Takt, Rate)
+    return TIMING_BLOCKS[key]
+
+
+def TimingBlock_BMSDATA(Takt, Rate=1.0, Extras=()):
+    # Extras: [(tick, 'E1'/'LoopStart'/'LoopEnd', wert), ...] -> kommen NACH den Noten vom gleichen Tick
+    data, groups = Timing_Block_Table(Takt, Rate)
+    output = BMSData()
+    if not Extras:
+        output += data
+        return output
+
+    extras = defaultdict(list)
+    for tick, kind, value in Extras:
+        extras[int(round(tick))].append((kind, value))
+    group_at = {timestamp: (start, end) for timestamp, start, end in groups}
+
+    current_time = 0
+    for timestamp in sorted(set(group_at) | set(extras)):
+        delta = timestamp - current_time
+        current_time = timestamp
+        if delta > 0:
+            Write_Delay(output, delta)
+        if timestamp in group_at:
+            start, end = group_at[timestamp]
+            output += data[start:end]
+        for kind, value in extras.get(timestamp, ()):
+            ## CHANGE CHORD AND MELODIE
+            if kind == 'E1':
+                output += bytes([0xE2, value & 0xFF, 0xE3, value & 0xFF])
+            ## Loop Start Sprungmarke
+            elif kind == 'LoopStart':
+                output.LoopStart()
+            ## Loop End Sprungmarke
+            elif kind == 'LoopEnd':
+                if value == -1:        ## Letztes E1 Kommand erneut (wegen loop)
+                    output += bytes([0xE2, 0x00, 0xE3, 0x00])
+                else:
+                    output += bytes([0xE2, value & 0xFF, 0xE3, value & 0xFF])
+                output.LoopEnd()
+                #!! E1 GEHT BEI CHORD NICHT! Nimm E2 und E3!
+    return output
+
+
+## TIMING BLOCK TABLE END ## ---------
+
+
+def GLOBALMIDIEVENTS_to_BMSDATA(song, AllTicks, Loop, ppqn_target=120):
+    song = Load_Song(song)
+    ppqn_original = song.ticks_per_beat
 
     events = []
     
-    for track in mid.tracks:
-        abs_time_real = 0.0  #float für genauere ppqn umrechnung
-        abs_time = 0 
-        for msg in track:
-            #scaled_time = int(round(msg.time * ppqn_scale))
-            #abs_time += scaled_time
-            abs_time_real += msg.time * ppqn_scale
-            abs_time = int(round(abs_time_real))
+    for track in song.Scaled_Tracks(ppqn_target):
+        for abs_time, msg in track:
 
             # Marker für LoopStart und LoopEnd
             if msg.type == 'marker':
@@ -366,7 +999,7 @@ def GLOBALMIDIEVENTS_to_BMSDATA(midifile, AllTicks, Loop, ppqn_target=120):
     events.sort(key=lambda e: e[0])
 
     current_time = 0
-    output = bytearray()
+    output = BMSData()
 
     for timestamp, msg in events:
         delta = timestamp - current_time
@@ -374,7 +1007,7 @@ def GLOBALMIDIEVENTS_to_BMSDATA(midifile, AllTicks, Loop, ppqn_target=120):
 
         # Pausen als Delay kodieren
         if delta > 0:
-            output += bytes([0xF0] + ENCODE_VLQ(delta))
+            Write_Delay(output, delta)
 
         if isinstance(msg, mido.MetaMessage) and msg.type == 'set_tempo':
             bpm = round(mido.tempo2bpm(msg.tempo))
@@ -383,16 +1016,16 @@ def GLOBALMIDIEVENTS_to_BMSDATA(midifile, AllTicks, Loop, ppqn_target=120):
         elif isinstance(msg, str):
             if Loop == True:
                 if msg == 'LoopStart':
-                    output += bytes([0x77, 0x77, 0x77, 0x01])  # Platzhalter für Loop Start
+                    output.LoopStart()  # Sprungmarke für Loop Start
                 elif msg == 'LoopEnd':
-                    output += bytes([0x77, 0x77, 0x77, 0x02])  # Platzhalter für Loop End
+                    output.LoopEnd()  # Sprungmarke für Loop End
     
     
     # Restdauer, falls es nicht loopen soll
     if Loop == False:
         remaining = int(round(AllTicks * ppqn_target / ppqn_original)) - current_time
         if remaining > 0:
-            output += bytes([0xF0] + ENCODE_VLQ(remaining))
+            Write_Delay(output, remaining)
     
     
     #output += bytes([0xFF])  # Nein! Legen wir in der Hauptaction fest
@@ -405,7 +1038,59 @@ def note_number_to_name(note):
     """Wandelt MIDI-Notennummer in Namen wie C4, D#4 um"""
     return mido.get_note_name(note)
 
-def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
+def Window_Events(events, windows):
+    # Zwei-Zeiger Sweep: events [(tick, note)] und windows [(start, end)] sind zeitlich sortiert,
+    # also wird jede Note nur einmal angeschaut statt einmal pro Bereich
+    result = []
+    j = 0
+    for start_tick, end_tick in windows:
+        while j < len(events) and events[j][0] < start_tick:
+            j += 1
+        k = j
+        while k < len(events) and events[k][0] < end_tick:
+            k += 1
+        result.append(events[j:k])
+    return result
+
+def Log_MultiBgmInfo(BgmInfo):
+    # print Info for Multi MBGM Sheet. BgmInfo: (IntoBeat, LoopBeat, IntoBeatFullNumber, LoopBeatFullNumber), None = kein Loop
+    CONVERT_LOG.info("")
+    CONVERT_LOG.info("")
+    if BgmInfo is not None:
+        IntoBeat, LoopBeat, IntoBeatFullNumber, LoopBeatFullNumber = BgmInfo
+        CONVERT_LOG.info("✏️ Enter these into the MultiBgmInfo sheet:")
+        CONVERT_LOG.info("-IntoBeat: %d", IntoBeat)
+        CONVERT_LOG.info("-LoopBeat: %d", LoopBeat)
+        CONVERT_LOG.info("-Ratio: 1.0") #was macht das??
+        CONVERT_LOG.info("")
+        if IntoBeatFullNumber == False:
+            CONVERT_LOG.warning("⚠️ Warning! The loop does not start exactly on the beat!")
+            CONVERT_LOG.warning("Set the LoopStart marker so that it matches the beat! (Every 120th tick)")
+
+
+        elif LoopBeatFullNumber == False:
+            CONVERT_LOG.warning("⚠️ Warning! The loop does not end exactly on the beat!")
+            CONVERT_LOG.warning("Set the LoopEnd marker so that it matches the beat! (Every 120th tick)")
+    else:
+        CONVERT_LOG.info("❕No loop set in the midi.")
+        CONVERT_LOG.info("This may be necessary if you use a MBGM with a streamed AST song that loops.")
+        CONVERT_LOG.info("")
+        CONVERT_LOG.info("If intended, add this to the MultiBgmInfo sheet:")
+        CONVERT_LOG.info("-IntoBeat: 0")
+        CONVERT_LOG.info("-LoopBeat: 0")
+        CONVERT_LOG.info("-Ratio: 1.0")
+        CONVERT_LOG.info("")
+        CONVERT_LOG.info("If your song does not use an additional AST stream, you do not need to do anything else.")
+        CONVERT_LOG.info("")
+        
+
+    CONVERT_LOG.info("")
+    CONVERT_LOG.info("")
+    CONVERT_LOG.info("------------------------------------") #ist halt übersichtlicher, ne?
+
+
+def MIDICHANNEL_to_TIMINGandCHORD(song, target_channel=1, LoopAtAll=False, ShowCIT=False):
+    # ShowCIT: Jeden Akkord und jede Tonleiter mit ihren Noten ausgeben (zum Fehler suchen in der Midi)
     trigger_range = range(48, 60)  # C3–H3          BASS NOTE
     upper_octave_range = range(60, 72)  # C4–H4     AKKORD NOTEN
     melodie_octave_range = range(72, 84)  # C5–H5   MELODIE NOTEN
@@ -415,9 +1100,7 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
     #mid = MidiFile(midifile)
     #ppqn_scale = 1
     
-    mid = mido.MidiFile(midifile)
-    ppqn_original = mid.ticks_per_beat
-    ppqn_scale = 120 / ppqn_original          #PPQN MUSS 120 sein! Sonst geht der Timingstuff nicht!
+    song = Load_Song(song)                    #PPQN MUSS 120 sein! Sonst geht der Timingstuff nicht!
     
     
 
@@ -430,43 +1113,46 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
     TaktChangeCounter = 0           #Für Taktänderungen
     
 
-    DEBUG = False
+    DEBUG = CONVERT_LOG.isEnabledFor(logging.DEBUG)     # Timing Block Details nur bei --log-level debug
+    ShowCIT = ShowCIT or DEBUG
 
 
     ##TAKTÄNDERUNGEN kriegen
-    TimeSignatureEvents = GetTimeSignatureChanges(mid)
+    TimeSignatureEvents = GetTimeSignatureChanges(song)
 
-    print("------------------------------------")
-    print()
-    print()
-    print("--- 🎹 CHORD and 🎼 MUSICAL SCALE GENERATION (CIT) ---")
-    print()
+    CONVERT_LOG.info("------------------------------------")
+    CONVERT_LOG.info("")
+    CONVERT_LOG.info("")
+    CONVERT_LOG.info("--- 🎹 CHORD and 🎼 MUSICAL SCALE GENERATION (CIT) ---")
+    CONVERT_LOG.info("")
 
     # Start-Taktnoten generieren 
+    if not TimeSignatureEvents:
+        raise TimingChannelError("No time signature found! The timing channel needs 4/4, 3/4, 5/4, 2/4 or 1/4.")
     
     Takt = TimeSignatureEvents[0]['takt']
     
     if Takt == 0:
-        print("   Beat: 4/4")
+        CONVERT_LOG.info("   Beat: 4/4")
         bereich_groesse=480
     
     if Takt == 1:
-        print("   Beat: 3/4")
+        CONVERT_LOG.info("   Beat: 3/4")
         bereich_groesse=360
 
     if Takt == 2:
-        print("   Beat: 5/4")
+        CONVERT_LOG.info("   Beat: 5/4")
         bereich_groesse=600
         
     if Takt == 3:
-        print("   Beat: 2/4")
+        CONVERT_LOG.info("   Beat: 2/4")
         bereich_groesse=240
         
     if Takt == 4:
-        print("   Beat: 1/4")
+        CONVERT_LOG.info("   Beat: 1/4")
         bereich_groesse=120
         
-    print()
+    CONVERT_LOG.info("")
 
 
     Taktblock = Generate_TimingNotes(Takt)
@@ -481,7 +1167,7 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
     Looping = False
     LoopingErrorCounter1 = 0
     LoopingErrorCounter2 = 0
-    output = bytearray()
+    output = BMSData()
     CIToutput = bytearray()
     
     CITBassnotes_ByteList = bytearray()
@@ -490,14 +1176,9 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
 
 
     # Events sammeln:
-    for track in mid.tracks:
+    for track in song.Scaled_Tracks(120):
     
-        time_acc_real = 0.0   # float für exakte Berechnung
-        time_acc = 0
-        for msg in track:
-            #time_acc += int(round(msg.time * ppqn_scale))
-            time_acc_real += msg.time * ppqn_scale
-            time_acc = int(round(time_acc_real))  # jetzt sauber gerundet
+        for time_acc, msg in track:
             
             if msg.type == 'note_on' and msg.velocity > 0 and hasattr(msg, "channel") and msg.channel == target_channel:
                 if msg.note in trigger_range:
@@ -536,8 +1217,7 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
                     # print("BEATstart woanders")
                     
     if not trigger_events:
-        sys.exit("❌ ERROR: No bass note found!")
-        return
+        raise TimingChannelError("No bass note found!")
 
 
     if LoopingErrorCounter1 >= 1 or LoopingErrorCounter2 >= 1:
@@ -559,17 +1239,13 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
             max_tick = max(loop_end_markers)
         else:
             if LoopingErrorCounter1 >= 2:
-                sys.exit("❌ ERROR: You have more than one 'LoopStart' marker!")
-                return
+                raise MarkerError("You have more than one 'LoopStart' marker!")
             elif LoopingErrorCounter1 <= 0:
-                sys.exit("❌ ERROR: You don't have 'LoopStart' marker!")
-                return
+                raise MarkerError("You don't have 'LoopStart' marker!")
             elif LoopingErrorCounter2 >= 2:
-                sys.exit("❌ ERROR: You have more than one 'LoopEnd' marker!")
-                return
+                raise MarkerError("You have more than one 'LoopEnd' marker!")
             elif LoopingErrorCounter2 <= 0:
-                sys.exit("❌ ERROR: You don't have 'LoopEnd' marker!")
-                return
+                raise MarkerError("You don't have 'LoopEnd' marker!")
     else:
         max_tick = last_tick  
 
@@ -578,6 +1254,12 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
 
     TriggerNoteE1_AllCounter = -1 #Das erste fängt bei 0 an!
 
+    # Sortierte Tick-Listen, damit pro Takt nur per Binärsuche geschnitten wird (statt jedes Mal alles durchzugehen)
+    trigger_events.sort(key=lambda e: e[0])   # stabil, bei mehreren Tracks auf Kanal 0 trotzdem richtige Reihenfolge
+    trigger_ticks = [t for t, _ in trigger_events]
+    loop_start_markers.sort()
+    loop_end_markers.sort()
+
 
 
 
@@ -592,15 +1274,17 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
         next_tick = tick + bereich_groesse
         
         # Trigger
-        trigger_in_range = [(t, n) for t, n in trigger_events if tick <= t < next_tick]
-        trigger_at_start = any(t == tick for t, _ in trigger_in_range)
+        trigger_in_range = trigger_events[bisect.bisect_left(trigger_ticks, tick):bisect.bisect_left(trigger_ticks, next_tick)]
+        trigger_at_start = bool(trigger_in_range) and trigger_in_range[0][0] == tick
 
         # Loop-Marker
-        loopstart_at_start = any(t == tick for t in loop_start_markers)
-        loopstart_in_range = any(tick <= t < next_tick for t in loop_start_markers)
+        loopstart_in_bar = loop_start_markers[bisect.bisect_left(loop_start_markers, tick):bisect.bisect_left(loop_start_markers, next_tick)]
+        loopstart_at_start = bool(loopstart_in_bar) and loopstart_in_bar[0] == tick
+        loopstart_in_range = bool(loopstart_in_bar)
 
-        loopend_at_start = any(t == tick for t in loop_end_markers)
-        loopend_in_range = any(tick <= t < next_tick for t in loop_end_markers)
+        loopend_in_bar = loop_end_markers[bisect.bisect_left(loop_end_markers, tick):bisect.bisect_left(loop_end_markers, next_tick)]
+        loopend_at_start = bool(loopend_in_bar) and loopend_in_bar[0] == tick
+        loopend_in_range = bool(loopend_in_bar)
 
         #Debug Beschreibung aufbauen
         beschreibung = f"- BAR {bereich_index}:"
@@ -646,32 +1330,30 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
 
         if DEBUG == True:
             if teile:
-                print(f"{beschreibung} {' and '.join(teile)}. (tick {tick} - {next_tick - 1})")
+                CONVERT_LOG.debug("%s %s. (tick %d - %d)", beschreibung, ' and '.join(teile), tick, next_tick - 1)
             else:
-                print(f"{beschreibung} no notes and marker. (tick {tick} - {next_tick - 1})")
+                CONVERT_LOG.debug("%s no notes and marker. (tick %d - %d)", beschreibung, tick, next_tick - 1)
 
         # Debugprint: Positionen der Marker und Trigger
-        for t in loop_start_markers:
-            if tick <= t < next_tick:
-                #print(f"   Loop Start (tick {t})")
-                LoopStartTICK = t - tick #Tickposition per Taktbereich bekommen
-                
-                ## Beat Info Stuff
-                IntoBeat = t / 120 #120 Ticks = 1 Beat
-                IntoBeatTick = t #für loop end merken
-                #print(f"    IntoBeat: {IntoBeat}")
-                IntoBeatFullNumber = IntoBeat.is_integer() #Checken ob es eine ganze Zahl ist. Wenn nicht, Warnung geben!
-                #print(IntoBeatFullNumber)
-        for t in loop_end_markers:
-            if tick <= t < next_tick:
-                #print(f"   Loop End (tick {t})")
-                LoopEndTICK = t - tick
-                
-                ## Beat Info Stuff
-                LoopBeat = (t - IntoBeatTick) / 120 #120 Ticks = 1 Beat
-                #print(f" IntoBeat: {LoopBeat}")
-                LoopBeatFullNumber = LoopBeat.is_integer() #Checken ob es eine ganze Zahl ist. Wenn nicht, Warnung geben!
-                #print(LoopBeatFullNumber)
+        for t in loopstart_in_bar:
+            #print(f"   Loop Start (tick {t})")
+            LoopStartTICK = t - tick #Tickposition per Taktbereich bekommen
+            
+            ## Beat Info Stuff
+            IntoBeat = t / 120 #120 Ticks = 1 Beat
+            IntoBeatTick = t #für loop end merken
+            #print(f"    IntoBeat: {IntoBeat}")
+            IntoBeatFullNumber = IntoBeat.is_integer() #Checken ob es eine ganze Zahl ist. Wenn nicht, Warnung geben!
+            #print(IntoBeatFullNumber)
+        for t in loopend_in_bar:
+            #print(f"   Loop End (tick {t})")
+            LoopEndTICK = t - tick
+            
+            ## Beat Info Stuff
+            LoopBeat = (t - IntoBeatTick) / 120 #120 Ticks = 1 Beat
+            #print(f" IntoBeat: {LoopBeat}")
+            LoopBeatFullNumber = LoopBeat.is_integer() #Checken ob es eine ganze Zahl ist. Wenn nicht, Warnung geben!
+            #print(LoopBeatFullNumber)
                 
         for t, n in trigger_in_range:
             #print(f"   Bassnote {get_note_name(n)} (tick {t})")
@@ -725,166 +1407,166 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
 
         if Bool_Trigger_Multiple == True and Bool_LOOPstart_AtStart == True:
             if DEBUG == True:
-                print("TEST: Mehrere Trigger und LoopStart Am Start!")
-                print(LoopStartTICK)
-                print("Bei welchen Ticks?:")
-                print(TriggerNoteTICKlist)#Bei welchen Ticks die E1 commands
-                print("Welche IDs für E1?:")
-                print(TriggerNoteE1_list) #Welche ID für die E1 commands
+                CONVERT_LOG.debug("TEST: Mehrere Trigger und LoopStart Am Start!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
+                CONVERT_LOG.debug("Bei welchen Ticks?:")
+                CONVERT_LOG.debug("%s", TriggerNoteTICKlist)#Bei welchen Ticks die E1 commands
+                CONVERT_LOG.debug("Welche IDs für E1?:")
+                CONVERT_LOG.debug("%s", TriggerNoteE1_list) #Welche ID für die E1 commands
             
             
-            output += bytes([0x77, 0x77, 0x77, 0x01]) ## LoopStart
+            output.LoopStart() ## LoopStart
 
             ## Taktbla mit mehreren Triggernoten drin:
             E1CommandCounter = TriggerNoteE1_list[0] # Erste E1 ID nehmen, um dann einfach hochzählen 
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
             for Ticki in TriggerNoteTICKlist:
-                TaktblockMitZusatz.append((Ticki, Message('control_change', control=1, value=E1CommandCounter))) # E1 in Taktblock einfügen
+                TaktblockMitZusatz.append((Ticki, 'E1', E1CommandCounter)) # E1 in Taktblock einfügen
                 E1CommandCounter = E1CommandCounter + 1
                 
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
         
         elif Bool_Trigger_Multiple == True and Bool_LOOPstart_InRange == True:
             if DEBUG == True:
-                print("TEST: Mehrere Trigger und LoopStart im Bereich!")
-                print(LoopStartTICK)
-                print("Bei welchen Ticks?:")
-                print(TriggerNoteTICKlist)#Bei welchen Ticks die E1 commands
-                print("Welche IDs für E1?:")
-                print(TriggerNoteE1_list) #Welche ID für die E1 commands
+                CONVERT_LOG.debug("TEST: Mehrere Trigger und LoopStart im Bereich!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
+                CONVERT_LOG.debug("Bei welchen Ticks?:")
+                CONVERT_LOG.debug("%s", TriggerNoteTICKlist)#Bei welchen Ticks die E1 commands
+                CONVERT_LOG.debug("Welche IDs für E1?:")
+                CONVERT_LOG.debug("%s", TriggerNoteE1_list) #Welche ID für die E1 commands
                
             ## Taktbla mit mehreren Triggernoten drin:
             E1CommandCounter = TriggerNoteE1_list[0] # Erste E1 ID nehmen, und dann einfach hochzählen 
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
             for Ticki in TriggerNoteTICKlist:
-                TaktblockMitZusatz.append((Ticki, Message('control_change', control=1, value=E1CommandCounter))) # E1 in Taktblock einfügen
+                TaktblockMitZusatz.append((Ticki, 'E1', E1CommandCounter)) # E1 in Taktblock einfügen
                 E1CommandCounter = E1CommandCounter + 1
             
-            TaktblockMitZusatz.append((LoopStartTICK, Message('control_change', control=2, value=1))) # Loop Start
+            TaktblockMitZusatz.append((LoopStartTICK, 'LoopStart', None)) # Loop Start
             
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse) # Zu BMS Data umwandeln und schreiben
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz) # Zu BMS Data umwandeln und schreiben
 
         
         
         elif Bool_Trigger_Multiple == True:
             if DEBUG == True:
-                print("TEST: NUR mehrere Trigger!")
-                print("Bei welchen Ticks?:")
-                print(TriggerNoteTICKlist)#Bei welchen Ticks die E1 commands
-                print("Welche IDs für E1?:")
-                print(TriggerNoteE1_list) #Welche ID für die E1 commands
+                CONVERT_LOG.debug("TEST: NUR mehrere Trigger!")
+                CONVERT_LOG.debug("Bei welchen Ticks?:")
+                CONVERT_LOG.debug("%s", TriggerNoteTICKlist)#Bei welchen Ticks die E1 commands
+                CONVERT_LOG.debug("Welche IDs für E1?:")
+                CONVERT_LOG.debug("%s", TriggerNoteE1_list) #Welche ID für die E1 commands
             
             ## Taktbla mit mehreren Triggernoten drin:
             E1CommandCounter = TriggerNoteE1_list[0] # Erste E1 ID nehmen, und dann einfach hochzählen 
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
             for Ticki in TriggerNoteTICKlist:
-                TaktblockMitZusatz.append((Ticki, Message('control_change', control=1, value=E1CommandCounter))) # E1 in Taktblock einfügen
+                TaktblockMitZusatz.append((Ticki, 'E1', E1CommandCounter)) # E1 in Taktblock einfügen
                 E1CommandCounter = E1CommandCounter + 1
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse) # Zu BMS Data umwandeln und schreiben
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz) # Zu BMS Data umwandeln und schreiben
             
         
         ##  Kombis bei: einzelnen Triggernoten im Bereich 
         
         elif Bool_Trigger_AtStart == True and Bool_LOOPstart_AtStart == True:
             if DEBUG == True:
-                print("TEST: Trigger und LoopStart Am Start!")
-                print(LoopStartTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger und LoopStart Am Start!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             C3CallBytesAtAll = True
 
             
-            output += bytes([0x77, 0x77, 0x77, 0x01]) ## LoopStart / Adresse einfach merken
+            output.LoopStart() ## LoopStart / Adresse einfach merken
             output += bytes([0xE2, TriggerNoteE1 & 0xFF, 0xE3, TriggerNoteE1 & 0xFF]) ## E1 Trigger
-            output += bytes([0xC3, 0x77, 0x77, Takt])## C3 CALLER ZU TAKT BLA
+            output.Call(Takt) ## C3 CALLER ZU TAKT BLA
             
             
         elif Bool_Trigger_AtStart == True and Bool_LOOPstart_InRange == True:
             if DEBUG == True:
-                print("TEST: Trigger am Start, und LoopStart im Bereich!")
-                print(LoopStartTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger am Start, und LoopStart im Bereich!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             
             output += bytes([0xE2, TriggerNoteE1 & 0xFF, 0xE3, TriggerNoteE1 & 0xFF]) ## E1 Trigger
             ## Taktbla mit LoopStart drin:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((LoopStartTICK, Message('control_change', control=2, value=1)))
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((LoopStartTICK, 'LoopStart', None))
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
             
             
         elif Bool_Trigger_InRange == True and Bool_LOOPstart_AtStart == True:
             if DEBUG == True:
-                print("TEST: Trigger im Bereich, und LoopStart am Start!")
-                print(LoopStartTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger im Bereich, und LoopStart am Start!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
-            output += bytes([0x77, 0x77, 0x77, 0x01]) ## LoopStart
+            output.LoopStart() ## LoopStart
             ## Taktbla mit E1 Trigger drin:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((TriggerNoteTICK, Message('control_change', control=1, value=TriggerNoteE1)))
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((TriggerNoteTICK, 'E1', TriggerNoteE1))
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
 
 
         elif Bool_Trigger_InRange == True and Bool_LOOPstart_InRange == True: #FIX
             if DEBUG == True:
-                print("TEST: Trigger im Bereich, und LoopStart im Bereich!")
-                print(LoopStartTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger im Bereich, und LoopStart im Bereich!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             ## Taktbla mit E1 Trigger drin:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((TriggerNoteTICK, Message('control_change', control=1, value=TriggerNoteE1))) #Triggernote
-            TaktblockMitZusatz.append((LoopStartTICK, Message('control_change', control=2, value=1))) #Loop
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((TriggerNoteTICK, 'E1', TriggerNoteE1)) #Triggernote
+            TaktblockMitZusatz.append((LoopStartTICK, 'LoopStart', None)) #Loop
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
 
 
         elif Bool_Trigger_AtStart == True and Bool_LOOPend_AtStart == True:
             if DEBUG == True:
-                print("TEST: Trigger und LoopEnd Am Start!")
-                print(LoopEndTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger und LoopEnd Am Start!")
+                CONVERT_LOG.debug("%s", LoopEndTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             #output += bytes([0xE1, TriggerNoteE1 & 0xFF, TriggerNoteE1 & 0xFF]) ## E1 Trigger ##NEE, wegen Loop
             output += bytes([0xE2, TriggernoteCounter_forLoop & 0xFF, 0xE3, TriggernoteCounter_forLoop & 0xFF]) ## E1 Trigger wegen Loop
-            output += bytes([0x77, 0x77, 0x77, 0x02]) ## Loop End##########
-            output += bytes([0xC3, 0x77, 0x77, Takt])## C3 CALLER ZU TAKT BLA
+            output.LoopEnd() ## Loop End##########
+            output.Call(Takt) ## C3 CALLER ZU TAKT BLA
             
             
         elif Bool_Trigger_AtStart == True and Bool_LOOPend_InRange == True:
             if DEBUG == True:
-                print("TEST: Trigger am Start, und LoopEnd im Bereich!")
-                print(LoopEndTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger am Start, und LoopEnd im Bereich!")
+                CONVERT_LOG.debug("%s", LoopEndTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             output += bytes([0xE2, TriggerNoteE1 & 0xFF, 0xE3, TriggerNoteE1 & 0xFF]) ## E1 Trigger
             ## Taktbla mit LoopEnd drin:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((LoopEndTICK, Message('control_change', control=3, value=TriggernoteCounter_forLoop)))
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((LoopEndTICK, 'LoopEnd', TriggernoteCounter_forLoop))
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
             
         elif Bool_Trigger_InRange == True and Bool_LOOPend_AtStart == True:
             if DEBUG == True:
-                print("TEST: Trigger im Bereich, und LoopEnd am Start!")
-                print(LoopEndTICK)
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger im Bereich, und LoopEnd am Start!")
+                CONVERT_LOG.debug("%s", LoopEndTICK)
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             output += bytes([0xE2, TriggernoteCounter_forLoop & 0xFF, 0xE3, TriggernoteCounter_forLoop & 0xFF]) ## E1 Trigger wegen loop
-            output += bytes([0x77, 0x77, 0x77, 0x02]) ## Loop End
+            output.LoopEnd() ## Loop End
             ## Taktbla mit LoopEnd drin:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((LoopEndTICK, Message('control_change', control=3, value=TriggernoteCounter_forLoop)))
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((LoopEndTICK, 'LoopEnd', TriggernoteCounter_forLoop))
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
             
         
@@ -893,29 +1575,29 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
         
         elif Bool_Trigger_AtStart == True:
             if DEBUG == True:
-                print("TEST: Trigger Am Start!")
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger Am Start!")
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
                 
                 
             C3CallBytesAtAll = True
             
             output += bytes([0xE2, TriggerNoteE1 & 0xFF, 0xE3, TriggerNoteE1 & 0xFF]) ## E1 Trigger
-            output += bytes([0xC3, 0x77, 0x77, Takt])## C3 CALLER ZU TAKT BLA
+            output.Call(Takt) ## C3 CALLER ZU TAKT BLA
             
             
 
             
         elif Bool_Trigger_InRange == True:
             if DEBUG == True:
-                print("TEST: Trigger im Bereich!")
-                print("Trigger bei Tick: " + str(TriggerNoteTICK))
-                print("Trigger Comand E1: " + str(TriggerNoteE1))
+                CONVERT_LOG.debug("TEST: Trigger im Bereich!")
+                CONVERT_LOG.debug("Trigger bei Tick: %s", TriggerNoteTICK)
+                CONVERT_LOG.debug("Trigger Comand E1: %s", TriggerNoteE1)
             
             ## E1 Trigger in Taktdings einfügen:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((TriggerNoteTICK, Message('control_change', control=1, value=TriggerNoteE1)))
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((TriggerNoteTICK, 'E1', TriggerNoteE1))
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
             
             
@@ -923,45 +1605,45 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
             
         elif Bool_LOOPstart_AtStart == True:
             if DEBUG == True:
-                print("TEST: Loop Start Am Start!")
-                print(LoopStartTICK)
+                CONVERT_LOG.debug("TEST: Loop Start Am Start!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
             
             C3CallBytesAtAll = True
             
-            output += bytes([0x77, 0x77, 0x77, 0x01])## LoopStart
-            output += bytes([0xC3, 0x77, 0x77, Takt])## C3 CALLER ZU TAKT BLA
+            output.LoopStart() ## LoopStart
+            output.Call(Takt) ## C3 CALLER ZU TAKT BLA
             
             
             
         elif Bool_LOOPstart_InRange == True:
             if DEBUG == True:
-                print("TEST: Loop Start im Bereich!")
-                print(LoopStartTICK)
+                CONVERT_LOG.debug("TEST: Loop Start im Bereich!")
+                CONVERT_LOG.debug("%s", LoopStartTICK)
             
             ## LoopStart in Taktdings einfügen:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((LoopStartTICK, Message('control_change', control=2, value=1))) # Loop Start in Taktblock einfügen
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((LoopStartTICK, 'LoopStart', None)) # Loop Start in Taktblock einfügen
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
             
         elif Bool_LOOPend_AtStart == True:
             if DEBUG == True:
-                print("TEST: Loop End Am Start!")
-                print(LoopEndTICK)
+                CONVERT_LOG.debug("TEST: Loop End Am Start!")
+                CONVERT_LOG.debug("%s", LoopEndTICK)
             
             output += bytes([0xE2, TriggernoteCounter_forLoop & 0xFF, 0xE3, TriggernoteCounter_forLoop & 0xFF]) ## E1 Trigger
-            output += bytes([0x77, 0x77, 0x77, 0x02])## Loop End
+            output.LoopEnd() ## Loop End
             # output += bytes([0xFF])## FF
             
         elif Bool_LOOPend_InRange == True:
             if DEBUG == True:
-                print("TEST: Loop End im Bereich!")
-                print(LoopEndTICK)
+                CONVERT_LOG.debug("TEST: Loop End im Bereich!")
+                CONVERT_LOG.debug("%s", LoopEndTICK)
             
             ## Loop End in Taktdings einfügen:
-            TaktblockMitZusatz = Generate_TimingNotes(Takt)#Taktblock
-            TaktblockMitZusatz.append((LoopEndTICK, Message('control_change', control=3, value=1))) # Loop End in Taktblock einfügen
-            output += NOTES_to_BMSDATA(TaktblockMitZusatz, bereich_groesse)
+            TaktblockMitZusatz = [] # Zusätze für den vorkompilierten Taktblock
+            TaktblockMitZusatz.append((LoopEndTICK, 'LoopEnd', 1)) # Loop End in Taktblock einfügen
+            output += TimingBlock_BMSDATA(Takt, 1.0, TaktblockMitZusatz)
             
             
             
@@ -970,10 +1652,10 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
         
         else:
             if DEBUG == True:
-                print("TEST: Taktblock ohne alles")
+                CONVERT_LOG.debug("TEST: Taktblock ohne alles")
                 
             C3CallBytesAtAll = True
-            output += bytes([0xC3, 0x77, 0x77, Takt])## C3 CALLER ZU TAKT BLA
+            output.Call(Takt) ## C3 CALLER ZU TAKT BLA
 
 
 
@@ -1004,26 +1686,24 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
             
                 # Start-Taktnoten generieren 
                 if Takt == 0:
-                    print("   Beat: 4/4 (at Tick "+ str(tick) +")")
+                    CONVERT_LOG.debug("   Beat: 4/4 (at Tick %d)", tick)
                     bereich_groesse=480
                 
                 if Takt == 1:
-                    print("   Beat: 3/4 (at Tick "+ str(tick) +")")
+                    CONVERT_LOG.debug("   Beat: 3/4 (at Tick %d)", tick)
                     bereich_groesse=360
 
                 if Takt == 2:
-                    print("   Beat: 5/4 (at Tick "+ str(tick) +")")
+                    CONVERT_LOG.debug("   Beat: 5/4 (at Tick %d)", tick)
                     bereich_groesse=600
                     
                 if Takt == 3:
-                    print("   Beat: 2/4 (at Tick "+ str(tick) +")")
+                    CONVERT_LOG.debug("   Beat: 2/4 (at Tick %d)", tick)
                     bereich_groesse=240
                     
                 if Takt == 4:
-                    print("   Beat: 1/4 (at Tick "+ str(tick) +")")
+                    CONVERT_LOG.debug("   Beat: 1/4 (at Tick %d)", tick)
                     bereich_groesse=120
-                    
-                print()
     
     
     
@@ -1039,6 +1719,13 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
 
 ###----------------------------------------------------------------
 
+    # Jede Bassnote braucht ihren Takt (sonst fehlt sie im CIT), und die Anzahl muss in 2 Bytes passen
+    if len(CITBassnotes_ByteList) < len(trigger_events):
+        t, n = trigger_events[len(CITBassnotes_ByteList)]
+        raise TimingChannelError(f"Bass note {get_note_name(n)} at tick {t} is behind the end of the song (tick {max_tick}). Move it before the 'LoopEnd' marker or remove it.")
+    if len(trigger_events) > 0xFFFF:
+        raise TimingChannelError(f"Too many bass notes ({len(trigger_events)}), the CIT can hold at most {0xFFFF}.")
+
     ## CIT ###
     
     CIToutput += bytes([0x00, 0x00, 0x00, 0x00, 0x43, 0x49, 0x54, 0x53])    #Header
@@ -1048,8 +1735,8 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
     CIToutput +=  bytes(ChordNumber.to_bytes(2, byteorder='big'))            #Melodie Anzahl
     
     
-    print("   Number of chords and scale note pairs: " + str(ChordNumber))
-    print()
+    CONVERT_LOG.info("   Number of chords and scale note pairs: %d", ChordNumber)
+    CONVERT_LOG.info("")
     
     ## 1. Offsets
     
@@ -1072,11 +1759,17 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
     # 2. Akkorde
     
     
-    print("-- 🎹 Chords 🎹 --")
+    if ShowCIT:
+        CONVERT_LOG.info("-- 🎹 Chords 🎹 --")
     
     #print("Total: " + str(len(trigger_events)))
     trigger_events.append((last_tick, 0)) #Füge letzten Tick als Fake Note hinzu, da wir nur Abstand zwischen NoteOn Events checken und wir so verhindern dass letzter Bereich ignoriert wird!
     #print(len(trigger_events))
+
+    # Bereiche zwischen den Bassnoten, und die Noten darin in EINEM Durchgang pro Notenliste einsammeln
+    windows = [(trigger_events[i][0], trigger_events[i + 1][0]) for i in range(len(trigger_events) - 1)]
+    chord_windows = Window_Events(sorted(upper_octave_events, key=lambda e: e[0]), windows)
+    melodie_windows = Window_Events(sorted(melodie_octave_events, key=lambda e: e[0]), windows)
     
     Chordcounters = 0
     
@@ -1084,9 +1777,9 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
         start_tick, trigger_note = trigger_events[i]
         end_tick, _ = trigger_events[i + 1]
             
-        notes_in_range = [(t, n) for t, n in upper_octave_events if start_tick <= t < end_tick]
-        print(f"\n{Chordcounters+1}. Chord (tick {start_tick} - {end_tick}):"
-        f"\n   Bass Note {get_note_name(trigger_note, True)}")
+        notes_in_range = chord_windows[i]
+        if ShowCIT:
+            CONVERT_LOG.info("\n%d. Chord (tick %d - %d):\n   Bass Note %s", Chordcounters + 1, start_tick, end_tick, get_note_name(trigger_note, True))
         
         # print(Chordcounters)
         # print(CITBassnotes_ByteList[Chordcounters])
@@ -1102,19 +1795,23 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
             for t, n in notes_in_range:
                 RestNoten -= 1
                 #print(f"   -Tick {t}: Note {get_note_name(n)}")
-                print(f"   Note {get_note_name(n, True)}")
+                if ShowCIT:
+                    CONVERT_LOG.info("   Note %s", get_note_name(n, True))
                 CIToutput += bytes([get_note_byte(n)])                    ##Akkordnoten hinzufügen
             
             if not RestNoten == 0:                                         ##restplatz mit 7f füllen
                 for nix in range(RestNoten):
                     CIToutput += bytes([0x7F])   
                 
+        elif ShowCIT:
+            CONVERT_LOG.warning("   ⚠️ No chord note found!")
         else:
-            print("   ⚠️ No chord note found!")
+            CONVERT_LOG.warning("   ⚠️ Chord %d (tick %d - %d): No chord note found!", i + 1, start_tick, end_tick, extra={"tick": start_tick})
 
 
     # 3. Melodien
-    print("\n-- 🎼 Musical Scales 🎼 --")
+    if ShowCIT:
+        CONVERT_LOG.info("\n-- 🎼 Musical Scales 🎼 --")
     
     MelodieWeitererOffset = len(CIToutput)
     MelodieWeitererOffset += 8
@@ -1125,9 +1822,10 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
         start_tick, trigger_note = trigger_events[i]
         end_tick, _ = trigger_events[i + 1]
 
-        notes_in_range = [(t, n) for t, n in melodie_octave_events if start_tick <= t < end_tick]
+        notes_in_range = melodie_windows[i]
         #print(f"\nZwischen Trigger bei Tick {start_tick} ({get_note_name(trigger_note)}) und Tick {end_tick}:")
-        print(f"\n{i+1}. Musical Scale (Tick {start_tick} - {end_tick}, Bass Note {get_note_name(trigger_note, True)}):")
+        if ShowCIT:
+            CONVERT_LOG.info("\n%d. Musical Scale (Tick %d - %d, Bass Note %s):", i + 1, start_tick, end_tick, get_note_name(trigger_note, True))
         
         CIToutput += bytes(MelodieWeitererOffset.to_bytes(4, byteorder='big')) ##Indiv. offset bla reinschreiben
         CIToutput += bytes(MelodieWeitererOffset.to_bytes(4, byteorder='big')) ##''
@@ -1139,14 +1837,17 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
             for t, n in notes_in_range:
                 RestNoten -= 1
                 #print(f"   Note {get_note_name(n, True)} (Tick {t})")
-                print(f"   Note {get_note_name(n, True)}")
+                if ShowCIT:
+                    CONVERT_LOG.info("   Note %s", get_note_name(n, True))
                 CIToutput += bytes([get_note_byte(n)])                          ## Melodienoten hinzufügen
                 
             if not RestNoten == 0:                                         ##restplatz mit 7f füllen
                 for nix in range(RestNoten):
                     CIToutput += bytes([0x7F])  
+        elif ShowCIT:
+            CONVERT_LOG.warning("   ⚠️ No musical scale notes found!")
         else:
-            print("   ⚠️ No musical scale notes found!")
+            CONVERT_LOG.warning("   ⚠️ Musical Scale %d (tick %d - %d): No musical scale notes found!", i + 1, start_tick, end_tick, extra={"tick": start_tick})
 
 
 
@@ -1156,52 +1857,32 @@ def MIDICHANNEL_to_TIMINGandCHORD(midifile, target_channel=1, LoopAtAll=False):
     CIToutput[8:12] = bytes(CITfilesize.to_bytes(4, byteorder='big'))           #Filesize einfügen
 
 
-    # 5. print Info for Multi MBGM Sheet
-    print()
-    print()
+    # 5. Info for Multi MBGM Sheet (kommt mit in den Kanal-Cache, damit sie auch bei einem Treffer ausgegeben wird)
     if LoopAtAll == True:
-        print("✏️ Enter these into the MultiBgmInfo sheet:")
-        print("-IntoBeat: " + str(int(IntoBeat)))
-        print("-LoopBeat: " + str(int(LoopBeat)))
-        print("-Ratio: 1.0") #was macht das??
-        print()
-        if IntoBeatFullNumber == False:
-            print("⚠️ Warning! The loop does not start exactly on the beat!")
-            print("Set the LoopStart marker so that it matches the beat! (Every 120th tick)")
-
-
-        elif LoopBeatFullNumber == False:
-            print("⚠️ Warning! The loop does not end exactly on the beat!")
-            print("Set the LoopEnd marker so that it matches the beat! (Every 120th tick)")
+        BgmInfo = (IntoBeat, LoopBeat, IntoBeatFullNumber, LoopBeatFullNumber)
     else:
-        print("❕No loop set in the midi.")
-        print("This may be necessary if you use a MBGM with a streamed AST song that loops.")
-        print()
-        print("If intended, add this to the MultiBgmInfo sheet:")
-        print("-IntoBeat: 0")
-        print("-LoopBeat: 0")
-        print("-Ratio: 1.0")
-        print()
-        print("If your song does not use an additional AST stream, you do not need to do anything else.")
-        print()
-        
+        BgmInfo = None
+    Log_MultiBgmInfo(BgmInfo)
+
 
-    print()
-    print()
-    print("------------------------------------") #ist halt übersichtlicher, ne?
+    return output, CIToutput, TimeSignatureEvents_SortiertBesser, BgmInfo
 
 
-    return output, CIToutput, TimeSignatureEvents_SortiertBesser
 
+def MIDICHANNEL_to_BMSDATA(song, target_channel, Loop, BankEnlargeMap, ppqn_target=120, LinearToLogarithmic=False):
+    # Ohne chunk_size kommt genau EIN Chunk raus: der ganze Kanal
+    output, = MIDICHANNEL_to_BMSCHUNKS(song, target_channel, Loop, BankEnlargeMap, ppqn_target, LinearToLogarithmic=LinearToLogarithmic)
+    return output
 
 
-def MIDICHANNEL_to_BMSDATA(midifile, target_channel, Loop, BankEnlargeMap, ppqn_target=120):
-    mid = mido.MidiFile(midifile)
-    ppqn_original = mid.ticks_per_beat
-    ppqn_scale = ppqn_target / ppqn_original
+def MIDICHANNEL_to_BMSCHUNKS(song, target_channel, Loop, BankEnlargeMap, ppqn_target=120, events=None, chunk_size=None, LinearToLogarithmic=False):
+    # Generator: kodiert die Events der Reihe nach und gibt BMSData Stücke raus, sobald chunk_size Bytes zusammen sind
+    # events: schon nach Zeit sortierte (time, msg), z.B. song.Stream_Channel_Events(...). None = eigener Eimer
+    song = Load_Song(song)
 
-    events = []
-    abs_time = 0
+    # Nur noch den eigenen Eimer nehmen (alle Kanäle werden zusammen in EINEM Durchgang sortiert)
+    if events is None:
+        events = song.Channel_Events(ppqn_target)[target_channel]
 
     #Pitch Wheel Default (if there is no RPN event) 
     pitch_range_semitones = 5 #Default, if RPN is 0 or not present. This is the root of BMS
@@ -1211,76 +1892,48 @@ def MIDICHANNEL_to_BMSDATA(midifile, target_channel, Loop, BankEnlargeMap, ppqn_
     rpn_msb = 127
     rpn_lsb = 127
 
-                    
-    for track in mid.tracks:
-        time_acc_real = 0.0 # float für exakte ppqn umrechnung
-        time_acc = 0
-        for msg in track:
-            #scaled_time = int(round(msg.time * ppqn_scale)) # PPQN
-            #time_acc += scaled_time
-            time_acc_real += msg.time * ppqn_scale
-            time_acc = int(round(time_acc_real))
-
-            #Marker für LoopStart und LoopEnd aufspüren
-            if msg.type == 'marker':
-                if msg.text == 'LoopStart':
-                    events.append((time_acc, 'LoopStart'))
-                elif msg.text == 'LoopEnd':
-                    events.append((time_acc, 'LoopEnd'))
-                continue
-
-            # Checken: Ist die Message relevant für uns?
-            if msg.type == 'control_change' and msg.control == 0:
-                # Immer merken,auch außerhalb target_channel!
-                events.append((time_acc, msg))
-            
-            # Den ganzen Stuff in events speichern
-            elif msg.type in ['note_on', 'note_off', 'control_change', 'program_change', 'pitchwheel']:
-                if hasattr(msg, 'channel') and msg.channel == target_channel:
-                    events.append((time_acc, msg))
-
-    # Events nach Zeit sortieren
-    events.sort(key=lambda e: e[0])
-
-    # Events nach Zeitstempel Gruppieren
-    grouped_events = defaultdict(list)
-    for time, msg in events:
-        grouped_events[time].append(msg)
-
     current_time = 0
-    output = bytearray()
-    note_stack = {}
+    output = BMSData()
+    voices = VoiceAllocator(target_channel)   # eigene Voices pro Kanal
     last_bank = None
+    CurrentBankIsPart2Bank = False            # Program Change ohne Bank Select davor: normale Bank
 
-    for timestamp in sorted(grouped_events.keys()):
+    # Events nach Zeitstempel Gruppieren (sind schon sortiert, also einfach gleiche Ticks zusammenfassen)
+    for timestamp, group in itertools.groupby(events, key=lambda e: e[0]):
         delta = timestamp - current_time
         current_time = timestamp
 
+        # Voller Chunk raus (nur an Zeitstempel-Grenzen)
+        if chunk_size is not None and len(output) >= chunk_size:
+            yield output
+            output = BMSData()
+
         # Falls Wartezeit bis zu diesem Zeitpunkt: schreibe Delay
         if delta > 0:
-            output += bytes([0xF0] + ENCODE_VLQ(delta))
+            Write_Delay(output, delta)
 
-        for msg in grouped_events[timestamp]:
+        for _, msg in group:
         
             ## LOOP STUFF ##
             if isinstance(msg, str):
                 if Loop == True:
                     if msg == 'LoopStart':
-                        output += bytes([0x77, 0x77, 0x77, 0x01]) #Platzhalter Loop Start
+                        output.LoopStart() #Sprungmarke Loop Start
                     elif msg == 'LoopEnd':
-                        output += bytes([0x77, 0x77, 0x77, 0x02]) #Platzhalter Loop Ende
+                        output.LoopEnd() #Sprungmarke Loop Ende
         
             elif isinstance(msg, mido.Message):
             
                 ## NOTES ##
                 if msg.type == 'note_on' and msg.velocity > 0:
-                    voice = assign_voice(msg.note, target_channel)
+                    voice = voices.assign_voice(msg.note)
+                    velocity = msg.velocity
                     if LinearToLogarithmic == True:
                         velocity = LogarithmicCalculate(msg.velocity)
                     output += bytes([
                         msg.note & 0xFF,
                         voice & 0xFF,
-                        msg.velocity & 0xFF
+                        velocity & 0xFF
                     ])
 
                 elif msg.type in ['note_off', 'note_on'] and msg.velocity == 0:
@@ -1288,7 +1941,7 @@ def MIDICHANNEL_to_BMSDATA(midifile, target_channel, Loop, BankEnlargeMap, ppqn_
                         # voice = release_voice(msg.note)
                         # if voice is not None:
                             # output += bytes([0x80 | (voice & 0x0F)])  # 81-87 (1-7), Bis zu 7 Voices möglich
-                    voice = release_voice(msg.note)
+                    voice = voices.release_voice(msg.note)
                     if voice is not None:
                         output += bytes([0x80 | (voice & 0x0F)])   # 81–87
 
@@ -1307,9 +1960,10 @@ def MIDICHANNEL_to_BMSDATA(midifile, target_channel, Loop, BankEnlargeMap, ppqn_
                     elif msg.channel == target_channel:
                         # Channel Volume
                         if msg.control == 7:        
+                            volume = msg.value
                             if LinearToLogarithmic == True:
                                 volume = LogarithmicCalculate(msg.value)
-                            output += bytes([0xB8, 0x00, msg.value & 0xFF])
+                            output += bytes([0xB8, 0x00, volume & 0xFF])
                         # Pan
                         elif msg.control == 10:     
                             output += bytes([0xB8, 0x03, msg.value & 0xFF])
@@ -1365,13 +2019,8 @@ def MIDICHANNEL_to_BMSDATA(midifile, target_channel, Loop, BankEnlargeMap, ppqn_
                             TheProgram += 128
                             CurrentBankIsPart2Bank = True
                             
-                            print()
-                            print("🔃 Bank & Program Change Enlarge 🔃")
-                            print()
-                            print("Channel " + str(target_channel))
-                            print(f"Midi Bank     {last_bank:3d}  ➡️  BMS Bank     {TheBank:3d}")
-                            print(f"Midi Program  {msg.program:3d}  ➡️  BMS Program  {TheProgram:3d}")
-                            print()
+                            CONVERT_LOG.debug("🔃 Bank & Program Change Enlarge 🔃 Channel %d: Midi Bank %d ➡️ BMS Bank %d, Midi Program %d ➡️ BMS Program %d",
+                                              target_channel, last_bank, TheBank, msg.program, TheProgram, extra={"channel": target_channel})
                             
                         else:
                             CurrentBankIsPart2Bank = False
@@ -1429,488 +2078,1145 @@ def MIDICHANNEL_to_BMSDATA(midifile, target_channel, Loop, BankEnlargeMap, ppqn_
             ## TODO: E2 command for only changing bank ?
             
     output += bytes([0xFF]) #Ende. Überhaupt notwendig, wenns loopt?
-    return output
+    yield output
 
 
 
-## HAUPTACTION ##
-def START(midifile, Output_BMS, LinearToLogarithmic=False, Twilight=False, PPQNtargetValue=120):
-    with open(Output_BMS, "w+b") as f:
-        
-        if Twilight == True:
-            print("Twilight Princess Mode")
-        
-        # Infos sammeln
-        mid = mido.MidiFile(midifile)
-        ppqn = mid.ticks_per_beat
-        ppqn_hex = f"{ppqn:02X}"
-        print(f"PPQN: {ppqn} (Hex:{ppqn_hex})")
-        ppqn_bytes = ppqn.to_bytes(2, byteorder='big') #Value zu Hex umwandeln
-        target_ppqn = PPQNtargetValue
-        PPQNoriginal = mid.ticks_per_beat
-        ppqn_original = PPQNoriginal
-        
-        AllTicks = (Get_Last_Note_Tick(midifile))                        # Anzahl aller Ticks merken ()
-        AllTicks_inVLQ = bytes(ENCODE_VLQ(Get_Last_Note_Tick(midifile))) # und in VLQ umwandeln
-        
-        ##### ----- START WRITING ------ ######
-        
-        ## --- 1. Überkanal: Tempospur --- ##
-        #(auch zum Festlegen von hauptinfos, children-kanäle)
-        #(Läuft aber quasi paralell zu den Tracks wie Tempospur bei Midis: Für BPM Änderungen während des Songs.)
-        
-        f.write(b"\xC1\x00")                    # Hauptkanal/Tempospur (für Settings wie BPM) start
-        POS_PointerToMainChannels = f.tell()    # Position merken für später, um 777 da unten zu ersetzen:
-        f.write(b"\x77\x77\x77")                # 77 Platzhalter. später mit pointer zum ersten Kanalersteller ersetzen!
-        
-        f.write(b"\xD8\x62")                    # PPQN start
+def TIMING_CHANNEL_to_BMSDATA(song, chID, Loop, Rate, ShowCIT=False):
+    # Timing Kanal + die Taktblöcke (C3 Unterprogramme) als EIN Stück, damit er komplett für sich steht
+    output, CIToutput, TimeSignatureEvents, BgmInfo = MIDICHANNEL_to_TIMINGandCHORD(song, chID, Loop, ShowCIT)
+    output += b"\xFF" ##überhaupt notwendig?
+    
+    # ---- C3 Goto Stuff ----
+    # Die C3 Calls wurden beim Erzeugen schon indexiert, der Assembler setzt beim Linken alle auf einmal ein
+    CallSites = output.Call_Sites()
+    if not TimeSignatureEvents == None:
+        for X in range(len(TimeSignatureEvents)):
+            if TimeSignatureEvents[X] not in CallSites:
+                continue                # Kein C3 Call zu diesem Takt -> Taktblock würde nie abgespielt
+            output.Label(('Taktblock', TimeSignatureEvents[X])) # Goto Adresse für alle C3 Calls zu diesem Takt
+
+            ###C3 Taktblock schreiben
+            #Erst Parameter anhand Taktes hersuchen
+            if TimeSignatureEvents[X] == 0:
+                bereich_groesse=480
+            if TimeSignatureEvents[X] == 1:
+                bereich_groesse=360
+            if TimeSignatureEvents[X] == 2:
+                bereich_groesse=600
+            if TimeSignatureEvents[X] == 3:
+                bereich_groesse=240
+            if TimeSignatureEvents[X] == 4:
+                bereich_groesse=120
+                
+            #Vorkompilierten Taktblock nehmen (wird pro Takt und Rate nur einmal aus Midi-Noten erzeugt)
+            output += TimingBlock_BMSDATA(TimeSignatureEvents[X], Rate)## TAKTDINGS BYTES OHNE ALLES writen
+            output += bytes([0xC5]) ## C5 zum Beenden des Calls um zurückzuspringen
+            output += b"\xFF"
+    return output, CIToutput, BgmInfo
+
+
+
+## INCREMENTAL ## ---------
+# Pro Kanal wird ein Fingerprint aus seinen Events + allem Geteilten (Tempo, Loop, BankEnlarge, ...) gebildet.
+# Ist der Fingerprint gleich wie beim letzten Mal, werden die alten Bytes genommen und nur neu gelinkt.
+
+class ChannelCache:
+    FORMAT = 3            # hochzählen, wenn sich der Aufbau der gespeicherten Kanäle ändert
+
+    def __init__(self, path):
+        self.path = path      # None = nur im Speicher (Watch Mode ohne --incremental)
+        self.entries = {}     # fingerprint -> gespeicherter Kanal
+        self.used = {}        # nur was diesmal gebraucht wurde wird wieder gespeichert
+        if path is None:
+            return
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("revision") == ENCODER_REVISION and data.get("format") == self.FORMAT:
+                self.entries = data["entries"]
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError):
+            pass
+
+    def Get(self, key):
+        return self.entries.get(key)
+
+    def Put(self, key, value):
+        self.used[key] = value
+
+    def Save(self):
+        if self.path is not None:
+            temp = self.path + f".tmp{os.getpid()}"
+            with open(temp, "wb") as f:
+                pickle.dump({"version": VERSION, "revision": ENCODER_REVISION, "format": self.FORMAT, "entries": self.used}, f)
+            os.replace(temp, self.path)
+        self.entries = self.used    # Falls das Objekt im Speicher bleibt (Watch Mode) geht's damit weiter
+        self.used = {}
+
+
+def Channel_Fingerprint(song, chID, timing, shared):
+    h = hashlib.sha256()
+    h.update(repr((ENCODER_REVISION, chID, timing, shared)).encode())
+    for time_acc, msg in song.Channel_Events(120)[chID]:
+        if isinstance(msg, str):
+            h.update(f"{time_acc}:{msg};".encode())
+        else:
+            h.update(f"{time_acc}:".encode() + bytes(msg.bytes()))
+    if timing:
+        # Timing Kanal hängt zusätzlich an Taktänderungen, allen Markern und dem letzten NoteOff (egal welcher Kanal)
+        h.update(repr((GetTimeSignatureChanges(song), sorted(song.markers.items()))).encode())
+        last_off = 0
+        for track in song.Scaled_Tracks(120):
+            for time_acc, msg in track:
+                if msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
+                    last_off = max(0, time_acc)
+        h.update(str(last_off).encode())
+    return h.hexdigest()
 
-        #f.write(ppqn_bytes)                     # PPQN Value einfügen
-        f.write(b"\x00\x78")                    #NE: Wir wandeln in dieser Version erstmal nur zu 120
 
+def Store_Channel(output, ChannelCIT, BgmInfo=None):
+    # Bytes, Sprungmarken, CIT und MultiBgmInfo (jeder Kanal hat eigene Voices, hängt also von keinem anderen Kanal ab)
+    return (bytes(output), list(output.marks), ChannelCIT, BgmInfo)
 
-        
 
-        
-        
-        ## ---Loop Check--- ##
-        # Checken ob es loopen soll
-        loop_start_tick = Find_Marker_Position(midifile, "LoopStart") # Nach Loop Marker in Midi suchen
-        if loop_start_tick is not None:
-            loop_start_tick_scaled = int(loop_start_tick * (target_ppqn / ppqn_original))
-            print(f"LOOP: Loop Start at Tick: {loop_start_tick}")
-            Loop = True
+def Restore_Channel(cached):
+    data, marks, ChannelCIT, BgmInfo = cached
+    output = BMSData(data)
+    output.marks = list(marks)
+    return output, ChannelCIT, BgmInfo
+
+
+## INCREMENTAL END ## ---------
+
+
+
+## PARALLEL CHANNELS ## ---------
+# Jeder Kanal hat eigene Voices und eigene Loop-Sprungmarken, hängt also von keinem anderen Kanal ab.
+# Die Kanäle werden auf einen Prozesspool verteilt und danach in Kanalreihenfolge gelinkt (gleiche Bytes wie seriell).
+
+CHANNEL_WORKER_SONG = None      # Midi wird pro Worker nur EINMAL geparst
+
+def Song_Source(song):
+    # Was die Worker zum Laden brauchen: Dateipfad, oder die Midi-Bytes falls es keine Datei gibt
+    if isinstance(song.filename, str) and os.path.isfile(song.filename):
+        return song.filename
+    data = io.BytesIO()
+    song.mid.save(file=data)
+    return data.getvalue()
+
+
+def Init_Channel_Worker(source, log_settings=None):
+    global CHANNEL_WORKER_SONG
+    if log_settings is not None:
+        Setup_Logging(*log_settings)    # bei spawn (Windows) fängt der Worker sonst ohne Logging an
+    if isinstance(source, bytes):
+        source = mido.MidiFile(file=io.BytesIO(source))
+    CHANNEL_WORKER_SONG = Load_Song(source)
+
+
+def Encode_Channel(chID, Loop, BankEnlargeMap, LinearToLogarithmic=False):
+    # Log-Meldungen werden eingesammelt und vom Hauptprozess in Kanalreihenfolge ausgegeben
+    with Collect_Log_Records() as records:
+        output = MIDICHANNEL_to_BMSDATA(CHANNEL_WORKER_SONG, chID, Loop, BankEnlargeMap, LinearToLogarithmic=LinearToLogarithmic)
+    return Store_Channel(output, None), records
+
+
+def Encode_Channels_Parallel(song, channels, Loop, BankEnlargeMap, jobs, LinearToLogarithmic=False):
+    # chID -> (gespeicherter Kanal, Log-Meldungen)
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(channels))
+    if jobs < 2:
+        return {}       # Ein Prozess lohnt sich nicht, dann einfach nacheinander
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=Init_Channel_Worker, initargs=(Song_Source(song), LOG_SETTINGS)) as pool:
+        futures = {chID: pool.submit(Encode_Channel, chID, Loop, BankEnlargeMap, LinearToLogarithmic) for chID in channels}
+        return {chID: future.result() for chID, future in futures.items()}
+
+
+## PARALLEL CHANNELS END ## ---------
+
+
+
+## HAUPTACTION ##
+def START(midifile, Output_BMS, LinearToLogarithmic=False, Twilight=False, PPQNtargetValue=120, ChannelCacheFile=None, ShowCIT=False, StreamBuffer=None, ChannelJobs=None):
+    # Alles wird erst im Speicher gebaut (BMSAssembler) und am Ende mit einem Rutsch in die Datei geschrieben
+    # Output_BMS: None -> keine Dateien schreiben, nur zurückgeben. Gibt (BMS Bytes, CIT Bytes oder None) zurück (beim Streaming BMS None)
+    # ShowCIT: Alle Akkorde und Tonleitern vom CIT ausgeben
+    # ChannelCacheFile: Datei (oder ChannelCache) für den inkrementellen Modus (nur geänderte Kanäle neu kodieren), None = aus
+    # StreamBuffer: Puffergröße in Bytes (oder ein offener BMSStreamWriter) -> Kanäle werden Stück für Stück kodiert
+    #               und direkt in die Datei geschrieben, der Speicherbedarf hängt dann am Puffer statt an der Songlänge
+    #               (geht nicht zusammen mit ChannelCacheFile, da braucht man die ganzen Kanäle)
+    # ChannelJobs: Anzahl Prozesse für die Kanäle (None/1 = nacheinander, 0 = alle Kerne). Nicht beim Streaming.
+    Streaming = StreamBuffer is not None and ChannelCacheFile is None
+    if StreamBuffer is not None and not Streaming:
+        CONVERT_LOG.warning("⚠️ --stream is ignored together with --incremental (the channel cache needs whole channels)")
+    if Streaming and not isinstance(StreamBuffer, BMSStreamWriter):
+        if ChannelJobs is not None and ChannelJobs != 1:
+            CONVERT_LOG.warning("⚠️ --channel-jobs is ignored together with --stream (channels are written one after another)")
+        with BMSStreamWriter(Output_BMS, StreamBuffer) as writer:
+            return START(midifile, Output_BMS, LinearToLogarithmic, Twilight, PPQNtargetValue, ChannelCacheFile, ShowCIT, writer, ChannelJobs)
+    if Streaming:
+        asm = StreamBuffer
+    else:
+        asm = BMSAssembler()
+    if isinstance(ChannelCacheFile, ChannelCache):
+        channel_cache = ChannelCacheFile   # schon geladen (bleibt im Watch Mode im Speicher)
+    elif ChannelCacheFile is not None:
+        channel_cache = ChannelCache(ChannelCacheFile)
+    
+    if Twilight == True:
+        CONVERT_LOG.info("Twilight Princess Mode")
+    
+    # Infos sammeln (Midi wird hier EINMAL geparst und dann überall weitergereicht)
+    with Stage("parse"):
+        song = Load_Song(midifile)
+    song.streaming = Streaming
+    ppqn = song.ticks_per_beat
+    ppqn_hex = f"{ppqn:02X}"
+    CONVERT_LOG.info("PPQN: %d (Hex:%s)", ppqn, ppqn_hex)
+    ppqn_bytes = ppqn.to_bytes(2, byteorder='big') #Value zu Hex umwandeln
+    target_ppqn = PPQNtargetValue
+    PPQNoriginal = song.ticks_per_beat
+    ppqn_original = PPQNoriginal
+    
+    AllTicks = (Get_Last_Note_Tick(song))                        # Anzahl aller Ticks merken ()
+    AllTicks_inVLQ = bytes(ENCODE_VLQ(AllTicks))                 # und in VLQ umwandeln
+    
+    ##### ----- START WRITING ------ ######
+    
+    ## --- 1. Überkanal: Tempospur --- ##
+    #(auch zum Festlegen von hauptinfos, children-kanäle)
+    #(Läuft aber quasi paralell zu den Tracks wie Tempospur bei Midis: Für BPM Änderungen während des Songs.)
+    
+    asm.Write(b"\xC1\x00")                  # Hauptkanal/Tempospur (für Settings wie BPM) start
+    asm.Pointer('ChannelCreators')          # Pointer zum ersten Kanalersteller (kommt beim Linken)
+    
+    asm.Write(b"\xD8\x62")                  # PPQN start
+
+    #asm.Write(ppqn_bytes)                   # PPQN Value einfügen
+    asm.Write(b"\x00\x78")                  #NE: Wir wandeln in dieser Version erstmal nur zu 120
+
+
+    
+    
+    ## ---Loop Check--- ##
+    # Checken ob es loopen soll
+    loop_start_tick = Find_Marker_Position(song, "LoopStart") # Nach Loop Marker in Midi suchen
+    if loop_start_tick is not None:
+        loop_start_tick_scaled = int(loop_start_tick * (target_ppqn / ppqn_original))
+        CONVERT_LOG.info("LOOP: Loop Start at Tick: %d", loop_start_tick)
+        Loop = True
+    else:
+        Loop = False
+        LoopAllCommand = Find_Marker_Position(song, "LoopAll") # Nach LoopAll Marker in Midi suchen
+        if LoopAllCommand is None:
+            LoopAll = False
+            CONVERT_LOG.info("LOOP: Do not loop")
         else:
-            Loop = False
-            LoopAllCommand = Find_Marker_Position(midifile, "LoopAll") # Nach LoopAll Marker in Midi suchen
-            if LoopAllCommand is None:
-                LoopAll = False
-                print("LOOP: Do not loop")
-            else:
-                LoopAll = True
-                print("LOOP: Entire Song")
-        
-        ## ---Bank Enlarge Check--- ##
-        BankEnlargeMap = Parse_BankEnlarge_Markers(midifile)
-        
-        
-        ## ---LinearToLogarithmic Check--- ##
-        if LinearToLogarithmic == True:
-            print("Volumes will be converted from linear to logarithmic.")
-        
-        ## ---Timing Channel Check--- ##
-        TaktMarker = Find_Marker_Position(midifile, "BEAT") # Nach Beat Marker in Midi suchen
-        if TaktMarker is not None:
-            TimingChannel = True
+            LoopAll = True
+            CONVERT_LOG.info("LOOP: Entire Song")
+    
+    ## ---Bank Enlarge Check--- ##
+    BankEnlargeMap = Parse_BankEnlarge_Markers(song)
+    
+    
+    ## ---LinearToLogarithmic Check--- ##
+    if LinearToLogarithmic == True:
+        CONVERT_LOG.info("Velocities and volumes will be converted from linear to logarithmic.")
+    
+    ## ---Timing Channel Check--- ##
+    TaktMarker = Find_Marker_Position(song, "BEAT") # Nach Beat Marker in Midi suchen
+    if TaktMarker is not None:
+        TimingChannel = True
+    else:
+        TimingChannel = False
+    
+    ## ---Timing Channel - Ratecheck --- ##
+    if TimingChannel == True:
+        RateMarker = Find_Marker_Position(song, "RATE_3/4")
+        if RateMarker is not None:
+            Rate = 0.75
         else:
-            TimingChannel = False
-        
-        ## ---Timing Channel - Ratecheck --- ##
-        if TimingChannel == True:
-            RateMarker = Find_Marker_Position(midifile, "RATE_3/4")
+            RateMarker = Find_Marker_Position(song, "RATE_1/2")
             if RateMarker is not None:
-                Rate = 0.75
+                Rate = 0.5
             else:
-                RateMarker = Find_Marker_Position(midifile, "RATE_1/2")
+                RateMarker = Find_Marker_Position(song, "RATE_1/4")
                 if RateMarker is not None:
-                    Rate = 0.5
+                    Rate = 0.25
                 else:
-                    RateMarker = Find_Marker_Position(midifile, "RATE_1/4")
-                    if RateMarker is not None:
-                        Rate = 0.25
-                    else:
-                        Rate = 1
-        
-        ## ---Global Midievents ("Tempotrack")--- ##
-        output = GLOBALMIDIEVENTS_to_BMSDATA(midifile, AllTicks, Loop)
-        f.write(output)
-        
-        # LOOP (for global Midievents) #
-        if Loop == True:
-            f.seek(0)  # Zum Anfang zurückspringen
-            data = f.read() # um dann die gesamte Datei in Variable data zu saven
-            loop_start_marker = b'\x77\x77\x77\x01' 
-            loop_end_marker   = b'\x77\x77\x77\x02'
-            
-            # Loop-Start dann in data suchen
-            start_index = data.find(loop_start_marker)
-            end_index   = data.find(loop_end_marker)
-                
-            if start_index != -1 and end_index != -1:
-                # 1.Zieladresse berechnen -> wo der Loop wieder hinspringen soll
-                goto_address = start_index
-                goto_bytes = bytes([0xC7]) + goto_address.to_bytes(3, byteorder='big')
-
-                # 2.Loop Start Marker löschen
-                f.seek(start_index)
-                f.write(b'\xF0\x00\xF0\x00')  # oder einfach leer überschreiben ? python ist da echt fies TODO for next Update: Diese 4 Bytes Löschen!
-
-                # 3.Loop End Marker durch C7 + Adresse ersetzen
-                f.seek(end_index)
-                f.write(goto_bytes)
-                
-                # 4.Zurück zum Ende der File hüpfen, damit alles normalo weitergeht
-                f.seek(0, 2)
-                
-            f.seek(0, 2) # fail safe
-            
+                    Rate = 1
+    
+    ## ---Global Midievents ("Tempotrack")--- ##
+    with Stage("global_events"):
+        GlobalEventsOutput = GLOBALMIDIEVENTS_to_BMSDATA(song, AllTicks, Loop) # wird für Kanalersteller nochmal gebraucht
+    asm.Write(GlobalEventsOutput)           # LOOP: LoopStart/LoopEnd Sprungmarken werden beim Linken zum C7 Goto
+    
+    if Loop == False:
+        if LoopAll == True:
+            asm.Write(b"\xC7\x00\x00\x00")  #Springe einfach zurück zum Parentkanal fürn simplen Restart (NUR FÜR HAUPTKANAL)
         else:
-            if LoopAll == True:
-                f.write(b"\xC7\x00\x00\x00")    #Springe einfach zurück zum Parentkanal fürn simplen Restart (NUR FÜR HAUPTKANAL)
-            else:
-                f.write(b"\xFF")                #beendet alles!
-        
-        
-
-            
+            asm.Write(b"\xFF")              #beendet alles!
+    
+    
 
-        ## ---- 2. Kanalersteller erstellen ---- ##
-        
         
-        PointerToChannelCreators = f.tell() #Position merken, um später beim Hauptkanal einzufügen (7777)
-        channels = Get_UsedChannels(midifile) #Anzahl und IDs der Kanäle kriegen
+
+    ## ---- 2. Kanalersteller erstellen ---- ##
+    
+    
+    asm.Label('ChannelCreators')            #Position merken, wird beim Linken beim Hauptkanal eingefügen
+    with Stage("channel_creators"):
+        channels = Get_UsedChannels(song) #Anzahl und IDs der Kanäle kriegen
         channel_bytes = bytes(channels)  # Jeder Channel als 1 Byte
-        print()
-        print("Convert Channels:")
-        
+        CONVERT_LOG.info("")
+        CONVERT_LOG.info("Convert Channels:")
+    
         for chID in channel_bytes: 
-            f.write(b"\xC1")                        # OpCode identifier
-            print(str(chID))
-            f.write(struct.pack(">B", chID))        # Kanal ID.  Deci, also Kanal 1 = 0 !!
-        
-            # Kanalerstelladressen merken, um später Pointer einzufügen:
-            if chID == 0:
-                ChannelCreatorPointerCH0 = f.tell()
-            if chID == 1:
-                ChannelCreatorPointerCH1 = f.tell()
-            if chID == 2:
-                ChannelCreatorPointerCH2 = f.tell()
-            if chID == 3:
-                ChannelCreatorPointerCH3 = f.tell()
-            if chID == 4:
-                ChannelCreatorPointerCH4 = f.tell()
-            if chID == 5:
-                ChannelCreatorPointerCH5 = f.tell()
-            if chID == 6:
-                ChannelCreatorPointerCH6 = f.tell()
-            if chID == 7:
-                ChannelCreatorPointerCH7 = f.tell()
-            if chID == 8:
-                ChannelCreatorPointerCH8 = f.tell()
-            if chID == 9:
-                ChannelCreatorPointerCH9 = f.tell()
-            if chID == 10:
-                ChannelCreatorPointerCH10 = f.tell()
-            if chID == 11:
-                ChannelCreatorPointerCH11 = f.tell()
-            if chID == 12:
-                ChannelCreatorPointerCH12 = f.tell()
-            if chID == 13:
-                ChannelCreatorPointerCH13 = f.tell()
-            if chID == 14:
-                ChannelCreatorPointerCH14 = f.tell()
-            if chID == 15:
-                ChannelCreatorPointerCH15 = f.tell()
-            
-            f.write(b"\x88\x88\x88")        # Platzhalter-Pointer zu Notendata
-        
-        
+            asm.Write(b"\xC1")                      # OpCode identifier
+            CONVERT_LOG.info("%d", chID, extra={"channel": chID})
+            asm.Write(struct.pack(">B", chID))      # Kanal ID.  Deci, also Kanal 1 = 0 !!
+            asm.Pointer(('Channel', chID))          # Pointer zu Notendata (kommt beim Linken)
+    
+    
         # --- LOOP [ChannelCreator-Section] (for global Midievents) --- #
-        
+    
         # Loop Stuff für Kanalersteller (so wie Hauptkanalstuff läufts auch parallel zu den Tracks, aber wen juckts hier??)
         # MUSS GENAU GLEICH WIE BEIM KANALERSTELLER SEIN (sonst buggst) !!
-        
-        
-        ChannelCreator_GlobalEventsStartAdress = f.tell()
-        output = GLOBALMIDIEVENTS_to_BMSDATA(midifile, AllTicks, Loop)
-        f.write(output)
-        
-        ## LOOP ##
-        if Loop == True:
-            f.seek(0)  # Zum Anfang zurückspringen
-            data = f.read() # um dann die gesamte Datei in Variable data zu saven
-            loop_start_marker = b'\x77\x77\x77\x01' 
-            loop_end_marker   = b'\x77\x77\x77\x02'
-            
-            # Loop-Start dann in data suchen
-            start_index = data.find(loop_start_marker)
-            end_index   = data.find(loop_end_marker)
-                
-            if start_index != -1 and end_index != -1:
-                # 1.Zieladresse berechnen -> wo der Loop wieder hinspringen soll
-                goto_address = start_index
-                goto_bytes = bytes([0xC7]) + goto_address.to_bytes(3, byteorder='big')
-
-                # 2.Loop Start Marker löschen
-                f.seek(start_index)
-                f.write(b'\xF0\x00\xF0\x00')  # oder einfach leer überschreiben ? python ist da echt fies TODO for next Update: Diese 4 Bytes Löschen!
-
-                # 3.Loop End Marker durch C7 + Adresse ersetzen
-                f.seek(end_index)
-                f.write(goto_bytes)
-                
-                # 4.Zurück zum Ende der File hüpfen, damit alles normalo weitergeht
-                f.seek(0, 2)
-            f.seek(0, 2) # fail save
-            
-        else:
+    
+    
+        asm.Label('ChannelCreatorGlobalEvents')
+        asm.Write(GlobalEventsOutput)           # Gleiche Bytes wie beim Hauptkanal, also nicht nochmal erzeugen
+    
+        if Loop == False:
             if LoopAll == True:
-                f.write(b"\xC7")
-                f.write(ChannelCreator_GlobalEventsStartAdress.to_bytes(3, byteorder='big')) #Springe zurück zum Start (?)
+                asm.Write(b"\xC7")
+                asm.Pointer('ChannelCreatorGlobalEvents') #Springe zurück zum Start (?)
             else:
-                f.write(b"\xFF")                #beendet alles!
+                asm.Write(b"\xFF")              #beendet alles!
+    
         
-            
-            
-            
-        ## 3. ---- Noten und Events ------ ##
-        for chID in channels:
-            #ChannelpointerCH + chID = f.tell() #geht net....
-            # Kanalpointer notieren:
-            if chID == 0:
-                ChannelpointerCH0 = f.tell()
-            if chID == 1:
-                ChannelpointerCH1 = f.tell()
-            if chID == 2:
-                ChannelpointerCH2 = f.tell()
-            if chID == 3:
-                ChannelpointerCH3 = f.tell()
-            if chID == 4:
-                ChannelpointerCH4 = f.tell()
-            if chID == 5:
-                ChannelpointerCH5 = f.tell()
-            if chID == 6:
-                ChannelpointerCH6 = f.tell()
-            if chID == 7:
-                ChannelpointerCH7 = f.tell()
-            if chID == 8:
-                ChannelpointerCH8 = f.tell()
-            if chID == 9:
-                ChannelpointerCH9 = f.tell()
-            if chID == 10:
-                ChannelpointerCH10 = f.tell()
-            if chID == 11:
-                ChannelpointerCH11 = f.tell()
-            if chID == 12:
-                ChannelpointerCH12 = f.tell()
-            if chID == 13:
-                ChannelpointerCH13 = f.tell()
-            if chID == 14:
-                ChannelpointerCH14 = f.tell()
-            if chID == 15:
-                ChannelpointerCH15 = f.tell()
-            
-            
-            
-            ### --- Schreibe Noten und Events in Datei ---
-            
-            ## Timing and Chord Channel (Mario Galaxy) ##
-            if TimingChannel == True and chID == 0 and Twilight == False:
-                print()
-                print("Timing Channel included. ")# + str(chID))
-                print()
-                if Rate == 1.0:
-                    print("Rate: 1.0 (Standard)")
-                else:
-                    print("Rate: "+str(Rate))
-                output, CIToutput, TimeSignatureEvents = MIDICHANNEL_to_TIMINGandCHORD(midifile, chID, Loop)
-                
-                # Schreibe schonmal output rein
-                f.write(output)
-                f.write(b"\xFF") ##überhaupt notwendig?
-                
-                # ---- C3 Goto Stuff ----
-                if not TimeSignatureEvents == None:
-                    for X in range(len(TimeSignatureEvents)):
-                        SizeOfFileCurrent = f.tell() #Momentane Size der BMS merken, für Goto Adresse
-                        
-                        f.seek(0)
-                        inhalt = f.read()
+        
+        
+    ## 3. ---- Noten und Events ------ ##
+    TimingChannelID = 0 if TimingChannel == True and Twilight == False else None
 
-                        such_muster = b'\xC3\x77\x77' + TimeSignatureEvents[X].to_bytes(1, byteorder='big')
-                        ersatz_muster = b'\xC3' + SizeOfFileCurrent.to_bytes(3, byteorder='big')
+    ## Inkrementell: Fingerprints vorab, damit klar ist welche Kanäle überhaupt kodiert werden müssen
+    ChannelKeys = {}
+    if ChannelCacheFile is not None:
+        for chID in channels:
+            TimingThisChannel = chID == TimingChannelID
+            with Stage("fingerprint"):
+                ChannelKeys[chID] = Channel_Fingerprint(song, chID, TimingThisChannel, (Loop, Rate if TimingThisChannel else None, Twilight, LinearToLogarithmic, BankEnlargeMap, GlobalEventsOutput))
 
-                        inhalt = inhalt.replace(such_muster, ersatz_muster)
+    CIToutput = None                        # kommt vom Timing Kanal
 
-                        f.seek(0)
-                        f.write(inhalt)
-                        f.truncate()
-                        
-                        
-                        #WICHTIG: Wieder ganz an das Ende der Datei springen
-                        f.seek(0, 2)
-                        
+    ## Parallel: normale Kanäle auf den Prozesspool verteilen (Timing Kanal bleibt hier)
+    Encoded = {}
+    if ChannelJobs is not None and ChannelJobs != 1 and not Streaming:
+        todo = [chID for chID in channels if chID != TimingChannelID and (chID not in ChannelKeys or channel_cache.Get(ChannelKeys[chID]) is None)]
+        if len(todo) > 1:
+            with Stage("channels"):
+                Encoded = Encode_Channels_Parallel(song, todo, Loop, BankEnlargeMap, ChannelJobs, LinearToLogarithmic)
 
-                        ###C3 Taktblock schreiben
-                        #Erst Parameter anhand Taktes hersuchen
-                        if TimeSignatureEvents[X] == 0:
-                            bereich_groesse=480
-                        if TimeSignatureEvents[X] == 1:
-                            bereich_groesse=360
-                        if TimeSignatureEvents[X] == 2:
-                            bereich_groesse=600
-                        if TimeSignatureEvents[X] == 3:
-                            bereich_groesse=240
-                        if TimeSignatureEvents[X] == 4:
-                            bereich_groesse=120
-                            
-                        #Dann erstmal normale Midi-Noten generieren
-                        Taktblock = Generate_TimingNotes(TimeSignatureEvents[X], Rate)
-                        
-                        #Jetzt die Midi-Noten in BMS Data umwandeln
-                        C3Taktblock = bytearray()
-                        C3Taktblock += NOTES_to_BMSDATA(Taktblock, bereich_groesse)## TAKTDINGS BYTES OHNE ALLES writen
-                        C3Taktblock += bytes([0xC5]) ## C5 zum Beenden des Calls um zurückzuspringen
-                        
-                        f.write(C3Taktblock)
-                        f.write(b"\xFF")
-            else:
-                if Twilight == True:
-                    f.write(b"\xF9\x00\x00") ##Twilight Princess Zusatz
-                    
-                output = MIDICHANNEL_to_BMSDATA(midifile, chID, Loop, BankEnlargeMap)
-                
-                f.write(output)
-            
-            ## ---- LOOP ---- ##
-            f.seek(0)  # Zum Anfang zurückspringen
-            data = f.read() # um dann die gesamte Datei in Variable data zu saven
-            loop_start_marker = b'\x77\x77\x77\x01' 
-            loop_end_marker   = b'\x77\x77\x77\x02'
-            
-            # Loop-Start dann in data suchen
-            start_index = data.find(loop_start_marker)
-            end_index   = data.find(loop_end_marker)
-                
-            if start_index != -1 and end_index != -1:
-
-                # 1.Zieladresse berechnen -> wo der Loop wieder hinspringen soll
-                goto_address = start_index
-                goto_bytes = bytes([0xC7]) + goto_address.to_bytes(3, byteorder='big')
-                #print(goto_bytes)
-                # 2.Loop Start Marker löschen
-                f.seek(start_index)
-                f.write(b'\xF0\x00\xF0\x00')  # oder einfach leer überschreiben ? python ist da echt fies TODO for next Update: Diese 4 Bytes Löschen!
-
-                # 3.Loop End Marker durch C7 + Adresse ersetzen
-                f.seek(end_index)
-                f.write(goto_bytes)
-                
-                # 4.Zurück zum Ende der File hüpfen, damit alles normalo weitergeht
-                f.seek(0, 2)
-        
-            ##DOPPELTEST:
-            ## ---- LOOP ---- ##
-            f.seek(0)  # Zum Anfang zurückspringen
-            data = f.read() # um dann die gesamte Datei in Variable data zu saven
-            loop_start_marker = b'\x77\x77\x77\x01' 
-            loop_end_marker   = b'\x77\x77\x77\x02'
-            
-            # Loop-Start dann in data suchen
-            start_index = data.find(loop_start_marker)
-            end_index   = data.find(loop_end_marker)
-                
-            if start_index != -1 and end_index != -1:
-
-                # 1.Zieladresse berechnen -> wo der Loop wieder hinspringen soll
-                goto_address = start_index
-                goto_bytes = bytes([0xC7]) + goto_address.to_bytes(3, byteorder='big')
-                #print(goto_bytes)
-                # 2.Loop Start Marker löschen
-                f.seek(start_index)
-                f.write(b'\xF0\x00\xF0\x00')  # oder einfach leer überschreiben ? python ist da echt fies TODO for next Update: Diese 4 Bytes Löschen!
-
-                # 3.Loop End Marker durch C7 + Adresse ersetzen
-                f.seek(end_index)
-                f.write(goto_bytes)
-                
-                # 4.Zurück zum Ende der File hüpfen, damit alles normalo weitergeht
-                f.seek(0, 2)
-        
-        
-        
-        ## Pointer bei den Kanalerstellern einfügen
-        for chID in channels:
-            if chID == 0:
-                f.seek(ChannelCreatorPointerCH0) # Gehe zu diesen Offset
-                #f.write(struct.pack(">iii", ChannelpointerCH0))
-                f.write(ChannelpointerCH0.to_bytes(3, byteorder='big'))
-            if chID == 1:
-                f.seek(ChannelCreatorPointerCH1)
-                f.write(ChannelpointerCH1.to_bytes(3, byteorder='big'))
-            if chID == 2:
-                f.seek(ChannelCreatorPointerCH2)
-                f.write(ChannelpointerCH2.to_bytes(3, byteorder='big'))
-            if chID == 3:
-                f.seek(ChannelCreatorPointerCH3)
-                f.write(ChannelpointerCH3.to_bytes(3, byteorder='big'))
-            if chID == 4:
-                f.seek(ChannelCreatorPointerCH4)
-                f.write(ChannelpointerCH4.to_bytes(3, byteorder='big'))
-            if chID == 5:
-                f.seek(ChannelCreatorPointerCH5)
-                f.write(ChannelpointerCH5.to_bytes(3, byteorder='big'))
-            if chID == 6:
-                f.seek(ChannelCreatorPointerCH6)
-                f.write(ChannelpointerCH6.to_bytes(3, byteorder='big'))
-            if chID == 7:
-                f.seek(ChannelCreatorPointerCH7)
-                f.write(ChannelpointerCH7.to_bytes(3, byteorder='big'))
-            if chID == 8:
-                f.seek(ChannelCreatorPointerCH8)
-                f.write(ChannelpointerCH8.to_bytes(3, byteorder='big'))
-            if chID == 9:
-                f.seek(ChannelCreatorPointerCH9)
-                f.write(ChannelpointerCH9.to_bytes(3, byteorder='big'))
-            if chID == 10:
-                f.seek(ChannelCreatorPointerCH10)
-                f.write(ChannelpointerCH10.to_bytes(3, byteorder='big'))
-            if chID == 11:
-                f.seek(ChannelCreatorPointerCH11)
-                f.write(ChannelpointerCH11.to_bytes(3, byteorder='big'))
-            if chID == 12:
-                f.seek(ChannelCreatorPointerCH12)
-                f.write(ChannelpointerCH12.to_bytes(3, byteorder='big'))
-            if chID == 13:
-                f.seek(ChannelCreatorPointerCH13)
-                f.write(ChannelpointerCH13.to_bytes(3, byteorder='big'))
-            if chID == 14:
-                f.seek(ChannelCreatorPointerCH14)
-                f.write(ChannelpointerCH14.to_bytes(3, byteorder='big'))
-            if chID == 15:
-                f.seek(ChannelCreatorPointerCH15)
-                f.write(ChannelpointerCH15.to_bytes(3, byteorder='big'))
+    for chID in channels:
+        with Stage(f"channel {chID}"):     # Zeit pro Kanal, die Stages darin (channels, timing_and_chord) sind ein Teil davon
+            asm.Label(('Channel', chID))        # Kanalpointer notieren
         
-        ## Enter Pointer to Main child Channels on Parent Channel 
-        f.seek(POS_PointerToMainChannels)
-        f.write(PointerToChannelCreators.to_bytes(3, byteorder='big'))
         
         
+            ### --- Schreibe Noten und Events ---
         
-        ## Write CIT File ##
-        if TimingChannel > 0:
-            with open(Output_BMS + ".cit", "wb") as CIT:
-                # Write bytes to file
-                CIT.write(CIToutput)
+            ## Timing and Chord Channel (Mario Galaxy) ##
+            TimingThisChannel = chID == TimingChannelID
+            if TimingThisChannel:
+                CONVERT_LOG.info("")
+                CONVERT_LOG.info("Timing Channel included. ")# + str(chID))
+                CONVERT_LOG.info("")
+                if Rate == 1.0:
+                    CONVERT_LOG.info("Rate: 1.0 (Standard)")
+                else:
+                    CONVERT_LOG.info("Rate: %s", Rate)
+
+            ## Inkrementell: Kanal nur neu kodieren, wenn sich sein Fingerprint geändert hat
+            cached = None
+            if ChannelCacheFile is not None:
+                key = ChannelKeys[chID]
+                cached = channel_cache.Get(key)
+
+            if cached is not None:
+                output, ChannelCIT, BgmInfo = Restore_Channel(cached)
+                CONVERT_LOG.info("Channel %d: unchanged, reused", chID, extra={"channel": chID})
+                if TimingThisChannel:
+                    Log_MultiBgmInfo(BgmInfo)       # IntoBeat/LoopBeat braucht man auch, wenn sich nur andere Kanäle geändert haben
+            elif TimingThisChannel:
+                with Stage("timing_and_chord"):
+                    output, ChannelCIT, BgmInfo = TIMING_CHANNEL_to_BMSDATA(song, chID, Loop, Rate, ShowCIT)
+            elif Streaming:
+                if Twilight == True:
+                    asm.Write(b"\xF9\x00\x00") ##Twilight Princess Zusatz
+                events = song.Stream_Channel_Events(chID)
+                chunks = MIDICHANNEL_to_BMSCHUNKS(song, chID, Loop, BankEnlargeMap, events=events, chunk_size=asm.buffer_size, LinearToLogarithmic=LinearToLogarithmic)
+                with Stage("channels"):
+                    for index, chunk in enumerate(chunks):
+                        asm.Write(chunk, continued=index > 0)    # Loop geht über Chunkgrenzen weiter
+                continue
+            else:
+                output = BMSData()
+                ChannelCIT = None
+                BgmInfo = None
+                if Twilight == True:
+                    output += b"\xF9\x00\x00" ##Twilight Princess Zusatz
+                
+                if chID in Encoded:
+                    stored, records = Encoded[chID]     # schon im Pool kodiert
+                    Replay_Log_Records(records)
+                    output += Restore_Channel(stored)[0]
+                else:
+                    with Stage("channels"):
+                        output += MIDICHANNEL_to_BMSDATA(song, chID, Loop, BankEnlargeMap, LinearToLogarithmic=LinearToLogarithmic)
+
+            if ChannelCacheFile is not None and cached is None:
+                channel_cache.Put(key, Store_Channel(output, ChannelCIT, BgmInfo))
+            elif ChannelCacheFile is not None:
+                channel_cache.Put(key, cached)
+
+            if ChannelCIT is not None:
+                CIToutput = ChannelCIT
         
+            asm.Write(output)               # LOOP: Sprungmarken vom Kanal werden beim Linken zum C7 Goto
+    
+    if ChannelCacheFile is not None:
+        channel_cache.Save()
+    
+    
+    ## Alle Pointer einsetzen und Datei in einem Rutsch schreiben
+    with Stage("link"):
+        if Streaming:
+            BMSoutput = None
+            asm.Link()                      # Rest vom Puffer raus, Pointer direkt in der Datei einsetzen (umbenannt wird am Ende vom with)
+        else:
+            BMSoutput = asm.Link()
+            if Output_BMS is not None:
+                with open(Output_BMS, "wb") as f:
+                    f.write(BMSoutput)
+    
+    
+    
+    ## Write CIT File ##
+    # (Im Twilight Modus wird der Timing Kanal nicht erzeugt, dann gibt es auch keine CIT)
+    if TimingChannel > 0 and CIToutput is not None:
+        with Stage("cit"):
+            CIToutput = bytes(CIToutput)
+            if Output_BMS is not None:
+                with open(Output_BMS + ".cit", "wb") as CIT:
+                    # Write bytes to file
+                    CIT.write(CIToutput)
+    
+    return BMSoutput, CIToutput
+
+
+## CONVERSION CACHE ## ---------
+# Ergebnis (.bms und .bms.cit) wird unter einem Hash aus Midi-Bytes + allen Optionen gespeichert.
+# Hat sich weder Midi noch Option geändert, wird START gar nicht erst aufgerufen.
+
+class ConversionCache:
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def Key(self, midifile, LinearToLogarithmic=False, Twilight=False, PPQNtargetValue=120):
+        h = hashlib.sha256()
+        with open(midifile, "rb") as f:
+            h.update(f.read())
+        h.update(repr((bool(LinearToLogarithmic), bool(Twilight), PPQNtargetValue, ENCODER_REVISION)).encode())
+        return h.hexdigest()
+
+    def Get(self, key, Output_BMS):
+        # Bei Treffer die Dateien zum Output kopieren und True zurückgeben
+        entry = os.path.join(self.directory, key)
+        try:
+            shutil.copyfile(os.path.join(entry, "out.bms"), Output_BMS)
+            if os.path.exists(os.path.join(entry, "out.bms.cit")):
+                shutil.copyfile(os.path.join(entry, "out.bms.cit"), Output_BMS + ".cit")
+            os.utime(entry)                 # LRU: zuletzt benutzt = jetzt
+        except OSError:
+            return False
+        return True
+
+    def Put(self, key, Output_BMS):
+        entry = os.path.join(self.directory, key)
+        if os.path.isdir(entry):
+            return
+        temp = entry + f".tmp{os.getpid()}"
+        os.makedirs(temp, exist_ok=True)
+        shutil.copyfile(Output_BMS, os.path.join(temp, "out.bms"))
+        if os.path.exists(Output_BMS + ".cit"):
+            shutil.copyfile(Output_BMS + ".cit", os.path.join(temp, "out.bms.cit"))
+        try:
+            os.replace(temp, entry)         # atomar, falls mehrere Prozesse gleichzeitig schreiben
+        except OSError:
+            shutil.rmtree(temp, ignore_errors=True)
+        self.Evict()
+
+    def Evict(self):
+        # Älteste (am längsten nicht benutzte) Einträge löschen, bis der Cache wieder unter max_bytes ist
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if ".tmp" in name or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, file)) for file in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                continue
+            total += size
+        entries.sort()
+        for mtime, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+def Channel_Cache_Path(Output_BMS):
+    return Output_BMS + ".channels"
+
+
+def START_CACHED(midifile, Output_BMS, LinearToLogarithmic=False, Twilight=False, PPQNtargetValue=120, cache=None, Incremental=False, ShowCIT=False, StreamBuffer=None, ChannelJobs=None, Yaz0=None, Yaz0Verify=False):
+    # Wie START, aber mit Cache (cache=None -> einfach START)
+    # Yaz0: "best"/"fast" -> zusätzlich Output.bms.yaz0 schreiben (wie yaz0enc.exe), None = aus
+    # Yaz0Verify: komprimierte Daten vor dem Schreiben wieder entpacken und mit der BMS vergleichen
+    # Incremental: True (Datei neben der BMS) oder ein ChannelCache Objekt, das im Speicher bleibt
+    if isinstance(Incremental, ChannelCache):
+        ChannelCacheFile = Incremental
+    else:
+        ChannelCacheFile = Channel_Cache_Path(Output_BMS) if Incremental else None
+    if cache is None:
+        START(midifile, Output_BMS, LinearToLogarithmic, Twilight, PPQNtargetValue, ChannelCacheFile, ShowCIT, StreamBuffer, ChannelJobs)
+        Compress_Output(Output_BMS, Yaz0, Yaz0Verify)
+        return False
+    key = cache.Key(midifile, LinearToLogarithmic, Twilight, PPQNtargetValue)
+    if os.path.exists(Output_BMS + ".cit"):
+        os.remove(Output_BMS + ".cit")      # Keine alte CIT liegen lassen, falls die neue keine hat
+    if cache.Get(key, Output_BMS):
+        CONVERT_LOG.info("♻️ Unchanged, taken from cache")
+        Compress_Output(Output_BMS, Yaz0, Yaz0Verify)
+        return True
+    START(midifile, Output_BMS, LinearToLogarithmic, Twilight, PPQNtargetValue, ChannelCacheFile, ShowCIT, StreamBuffer, ChannelJobs)
+    cache.Put(key, Output_BMS)
+    Compress_Output(Output_BMS, Yaz0, Yaz0Verify)
+    return False
+
+
+def Compress_Output(Output_BMS, Yaz0=None, Yaz0Verify=False):
+    # Eingebauter Ersatz für yaz0enc.exe: Output.bms -> Output.bms.yaz0
+    if Yaz0 is None:
+        return
+    try:
+        compressed = yaz0.Yaz0_Compress_File(Output_BMS, Yaz0, verify=Yaz0Verify)
+    except yaz0.Yaz0Error as e:
+        raise ConversionError(str(e)) from e
+    CONVERT_LOG.info("Yaz0 (%s): %d -> %d Bytes%s", Yaz0, os.path.getsize(Output_BMS), os.path.getsize(compressed), ", verified" if Yaz0Verify else "")
+
+
+## CONVERSION CACHE END ## ---------
+
+
+
+## LIBRARY API ## ---------
+# Konvertierung komplett im Speicher: Midi-Bytes (oder MidiFile) rein, BMS/CIT (und Yaz0) Bytes raus.
+# Schreibt keine Dateien, beendet nichts (Fehler kommen als ConversionError), loggt nur über CONVERT_LOG.
+# Aus anderem Python Code über midi_to_bms.py importieren (der Bindestrich im Dateinamen geht mit import nicht):
+#
+#   import midi_to_bms
+#   result = midi_to_bms.Convert_Bytes(midi_bytes, midi_to_bms.ConvertOptions(twilight=True, yaz0="fast"))
+#   result.bms, result.cit (None ohne Timing Kanal), result.yaz0 (None ohne yaz0 Option)
+
+ConversionResult = namedtuple("ConversionResult", ["bms", "cit", "yaz0"])
+
+
+class ConvertOptions:
+    # Gleiche Bedeutung wie auf der Kommandozeile
+    #   logarithmic  = LogarithmicConvert? / --logarithmic      twilight    = ForTwilightPrincess? / --twilight
+    #   show_cit     = --show-cit (Akkorde/Tonleitern ins Log)   channel_jobs = --channel-jobs
+    #   yaz0         = None, "best" oder "fast"                  yaz0_verify = --yaz0-verify
+    def __init__(self, logarithmic=False, twilight=False, show_cit=False, channel_jobs=None, yaz0=None, yaz0_verify=False):
+        self.logarithmic = logarithmic
+        self.twilight = twilight
+        self.show_cit = show_cit
+        self.channel_jobs = channel_jobs
+        self.yaz0 = yaz0
+        self.yaz0_verify = yaz0_verify
+
+    def __repr__(self):
+        return "ConvertOptions(" + ", ".join(f"{key}={value!r}" for key, value in vars(self).items()) + ")"
+
+
+def Read_Midi_Bytes(data):
+    # Midi aus dem Speicher parsen, kaputte Daten -> MidiError
+    try:
+        return mido.MidiFile(file=io.BytesIO(data))
+    except (OSError, EOFError, ValueError, KeyError, IndexError) as e:
+        raise MidiError(f"Cannot read midi: {str(e) or type(e).__name__}") from e
+
+
+def Convert_Bytes(midi, options=None):
+    # midi: Inhalt einer .mid (bytes, bytearray, memoryview), mido.MidiFile oder SongContext -> ConversionResult
+    if options is None:
+        options = ConvertOptions()
+    if options.yaz0 is not None and options.yaz0 not in yaz0.LEVELS:
+        raise ValueError(f"Unknown Yaz0 level {options.yaz0!r} (use {', '.join(yaz0.LEVELS)})")
+    if isinstance(midi, (bytes, bytearray, memoryview)):
+        midi = Read_Midi_Bytes(midi)
+    BMSoutput, CIToutput = START(midi, None, options.logarithmic, options.twilight, ShowCIT=options.show_cit, ChannelJobs=options.channel_jobs)
+
+    compressed = None
+    if options.yaz0 is not None:
+        compressed = yaz0.Yaz0_Compress(BMSoutput, options.yaz0)
+        if options.yaz0_verify and yaz0.Yaz0_Decompress(compressed) != BMSoutput:
+            raise ConversionError("Yaz0 round trip check failed: decompressed data differs")
+    return ConversionResult(BMSoutput, CIToutput, compressed)
+
+
+## LIBRARY API END ## ---------
+
+
+
+## BATCH MODE ## ---------
+# Ganze Ordner auf einmal konvertieren, parallel auf allen Kernen.
+# Jede Datei läuft für sich: ein Fehler (ConversionError oder sonst was) stoppt nur diese eine Datei, nicht den ganzen Batch.
+
+def Parse_Bool(value):
+    return value in [True, "true", "True"]
+
+
+def Collect_Midis(inputs):
+    # Ordner, Globs (auch mit **) oder einzelne Dateien -> sortierte Liste ohne Doppelte
+    midis = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            found = glob.glob(os.path.join(entry, "*.mid")) + glob.glob(os.path.join(entry, "*.midi"))
+        elif os.path.isfile(entry):
+            found = [entry]
+        else:
+            found = glob.glob(entry, recursive=True)
+        for path in sorted(found):
+            if path not in midis:
+                midis.append(path)
+    return midis
+
+
+def Convert_File(midifile, Output_BMS, LinearToLogarithmic=False, Twilight=False, cache=None, Incremental=False, StreamBuffer=None, Yaz0=None, Yaz0Verify=False, ChannelJobs=None):
+    # Einzelne Datei im Batch konvertieren. Die Log-Meldungen werden eingesammelt und nur bei Fehlern als Text mitgegeben.
+    start_time = time.perf_counter()
+    try:
+        with Collect_Log_Records() as records:
+            cached = START_CACHED(midifile, Output_BMS, LinearToLogarithmic, Twilight, cache=cache, Incremental=Incremental, StreamBuffer=StreamBuffer, ChannelJobs=ChannelJobs, Yaz0=Yaz0, Yaz0Verify=Yaz0Verify)
+        ok = True
+        error = None
+    except ConversionError as e:      # Marker, Timing Kanal, Yaz0, ... aus dem Konverter
+        cached = False
+        ok = False
+        error = f"❌ ERROR: {e}"
+    except Exception as e:
+        cached = False
+        ok = False
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "midi": midifile,
+        "bms": Output_BMS,
+        "ok": ok,
+        "cached": cached,
+        "error": error,
+        "seconds": time.perf_counter() - start_time,
+        "log": Format_Log_Records(records) if not ok else "",
+    }
+
+
+def Batch_Output_Path(midifile, out_dir=None):
+    # Wie bei den Bat Files: Song.mid -> Song.mid.bms (optional in anderem Ordner)
+    if out_dir is None:
+        return midifile + ".bms"
+    return os.path.join(out_dir, os.path.basename(midifile) + ".bms")
+
+
+BATCH_STARTED = None    # Worker meldet jede Midi, bevor er sie anfängt (findet die Datei, bei der ein Worker stirbt)
+
+def Init_Batch_Worker(started, log_settings=None):
+    global BATCH_STARTED
+    BATCH_STARTED = started
+    if log_settings is not None:
+        Setup_Logging(*log_settings)
+
+
+def Convert_Batch_File(*task):
+    BATCH_STARTED.put(task[0])      # SimpleQueue schreibt sofort, kommt also auch an wenn der Worker gleich danach abstürzt
+    return Convert_File(*task)
+
+
+def Batch_Crashed(task):
+    midifile, Output_BMS = task[:2]
+    return {
+        "midi": midifile,
+        "bms": Output_BMS,
+        "ok": False,
+        "cached": False,
+        "error": "BrokenProcessPool: the worker process died while converting this file",
+        "seconds": 0.0,
+        "log": "",
+    }
+
+
+def Run_Batch_Pool(tasks, jobs, report):
+    # Stirbt ein Worker (Absturz, kein Speicher mehr), ist der ganze Pool kaputt und alle offenen Futures schlagen fehl.
+    # -> (nicht fertig gewordene Aufgaben, davon die schon angefangenen = Verdächtige)
+    started = multiprocessing.SimpleQueue()
+    broken = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=Init_Batch_Worker, initargs=(started, LOG_SETTINGS)) as pool:
+        futures = {pool.submit(Convert_Batch_File, *task): task for task in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                report(future.result())
+            except concurrent.futures.process.BrokenProcessPool:
+                broken.append(futures[future])
+    begun = set()
+    while not started.empty():
+        begun.add(started.get())
+    suspects = [task for task in broken if task[0] in begun] or broken
+    return [task for task in broken if task not in suspects], suspects
+
+
+def START_BATCH(inputs, jobs=None, out_dir=None, LinearToLogarithmic=False, Twilight=False, cache=None, Incremental=False, StreamBuffer=None, Yaz0=None, Yaz0Verify=False):
+    midis = Collect_Midis(inputs)
+    if not midis:
+        LOG.error("❌ No midi files found!")
+        return []
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    if jobs is None or jobs < 1:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(midis))
+
+    LOG.info("Batch: %d midi(s), %d job(s)", len(midis), jobs)
+    LOG.info("")
+
+    tasks = [(midi, Batch_Output_Path(midi, out_dir), LinearToLogarithmic, Twilight, cache, Incremental, StreamBuffer, Yaz0, Yaz0Verify) for midi in midis]
+    results = []
+
+    def report(result):
+        results.append(result)
+        fields = {key: result[key] for key in ("midi", "bms", "ok", "cached", "seconds", "error")}
+        if result["ok"] and result["cached"]:
+            LOG.info("♻️ %s  (cached)", result["midi"], extra=fields)
+        elif result["ok"]:
+            LOG.info("✅ %s  (%.2fs)", result["midi"], result["seconds"], extra=fields)
+        else:
+            LOG.error("❌ %s  %s", result["midi"], result["error"], extra=fields)
+
+    if jobs == 1:
+        for task in tasks:
+            report(Convert_File(*task))
+    else:
+        remaining = tasks
+        while remaining:
+            remaining, suspects = Run_Batch_Pool(remaining, jobs, report)
+            if suspects:
+                LOG.warning("⚠️ A worker died, restarting the pool")
+            for task in suspects:       # einzeln nochmal, dann ist klar welche Datei den Worker umbringt
+                if Run_Batch_Pool([task], 1, report)[1]:
+                    report(Batch_Crashed(task))
+
+    failed = [result for result in results if not result["ok"]]
+    LOG.info("")
+    cached = [result for result in results if result["cached"]]
+    LOG.info("Converted: %d  Failed: %d  From cache: %d", len(results) - len(failed), len(failed), len(cached))
+    for result in failed:
+        if result["log"].strip():
+            LOG.info("")
+            LOG.error("--- %s ---", result["midi"], extra={"midi": result["midi"], "log": result["log"]})   # Log der Konvertierung als Feld
+    return results
+
+
+## BATCH MODE END ## ---------
+
+
+
+## WATCH MODE ## ---------
+# Bleibt im Speicher (mido schon importiert, Kanal-Caches bleiben warm) und konvertiert eine Midi sobald sie gespeichert wurde.
+# Mehrere schnelle Speichervorgänge hintereinander werden zusammengefasst (debounce).
+# Die Kanal-Caches bleiben nur im Speicher, außer mit --incremental (dann wie sonst auch als .channels neben der BMS).
+# Mit --stream (ohne --incremental) gibt es keinen Kanal-Cache, dafür wird gestreamt.
+
+def START_WATCH(inputs, out_dir=None, LinearToLogarithmic=False, Twilight=False, cache=None, debounce=0.5, poll=0.25, Yaz0=None, Yaz0Verify=False, Incremental=False, StreamBuffer=None, ChannelJobs=None):
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    converted = {}        # midi -> (mtime, size) beim letzten Konvertieren
+    pending = {}          # midi -> [(mtime, size), Zeitpunkt der letzten Änderung]
+    channel_caches = {}   # midi -> ChannelCache (warm im Speicher)
+
+    # Was schon eine aktuelle BMS hat, muss nicht gleich am Anfang konvertiert werden
+    for midi in Collect_Midis(inputs):
+        Output_BMS = Batch_Output_Path(midi, out_dir)
+        if os.path.exists(Output_BMS) and os.path.getmtime(Output_BMS) >= os.path.getmtime(midi):
+            converted[midi] = (os.path.getmtime(midi), os.path.getsize(midi))
+
+    LOG.info("👀 Watching %s (Ctrl+C to stop)", ", ".join(inputs))
+    LOG.info("")
+    try:
+        while True:
+            now = time.monotonic()
+            for midi in Collect_Midis(inputs):
+                try:
+                    signature = (os.path.getmtime(midi), os.path.getsize(midi))
+                except OSError:
+                    continue    # gerade gelöscht/umbenannt
+                if converted.get(midi) == signature:
+                    pending.pop(midi, None)
+                    continue
+                if midi not in pending or pending[midi][0] != signature:
+                    pending[midi] = [signature, now]    # (wieder) geändert -> Timer neu starten
+                    continue
+                if now - pending[midi][1] < debounce:
+                    continue
+
+                # Datei ist lange genug unverändert -> konvertieren
+                del pending[midi]
+                converted[midi] = signature
+                Output_BMS = Batch_Output_Path(midi, out_dir)
+                if midi not in channel_caches and (Incremental or StreamBuffer is None):
+                    channel_caches[midi] = ChannelCache(Channel_Cache_Path(Output_BMS) if Incremental else None)
+                result = Convert_File(midi, Output_BMS, LinearToLogarithmic, Twilight, cache, channel_caches.get(midi, False), StreamBuffer, Yaz0, Yaz0Verify, ChannelJobs)
+                stamp = time.strftime("%H:%M:%S")
+                fields = {key: result[key] for key in ("midi", "bms", "ok", "seconds", "error")}
+                if result["ok"]:
+                    LOG.info("[%s] ✅ %s  (%.2fs)", stamp, midi, result["seconds"], extra=fields)
+                else:
+                    LOG.error("[%s] ❌ %s  %s", stamp, midi, result["error"], extra=dict(fields, log=result["log"]))
+            time.sleep(poll)
+    except KeyboardInterrupt:
+        LOG.info("")
+        LOG.info("Stopped watching.")
+    return 0
+
+
+## WATCH MODE END ## ---------
+
+
+
+## SERVER MODE ## ---------
+# Bleibt offen und konvertiert Midis, die per HTTP (TCP oder Unix Socket) geschickt werden. Die Worker-Prozesse werden beim
+# Start einmal erzeugt und aufgewärmt (Konverter + mido geladen, Timing Blöcke kompiliert), eine Anfrage kostet dann keinen
+# Interpreter-Start mehr. Nur für den eigenen Rechner gedacht (Standard: 127.0.0.1), keine Anmeldung.
+#
+#   POST /convert?twilight=1&yaz0=best     Body: die .mid Datei
+#        -> JSON {"bms": base64, "cit": base64/null, "yaz0": base64/null, "seconds": ..., "log": "..."}
+#        ?output=bms|cit|yaz0 -> nur diese Datei, roh (application/octet-stream)
+#   GET  /health                           -> {"version": ..., "workers": ...}
+#   Fehler als JSON {"error", "type"}: 400 falsche Anfrage, 404 gibt es nicht, 413 zu groß, 422 Midi nicht konvertierbar,
+#   500 Fehler im Konverter selbst (oder der Worker ist abgestürzt). Bei 422/500 kommt noch "log" mit.
+
+SERVER_MAX_UPLOAD = 64 * 1024 * 1024
+SERVER_BOOL_OPTIONS = ("logarithmic", "twilight", "show_cit", "yaz0_verify")
+SERVER_OUTPUTS = ("json", "bms", "cit", "yaz0")
+
+
+def Parse_Server_Options(query):
+    # ?twilight=1&yaz0=best&output=bms -> (dict für ConvertOptions, output). Unbekanntes -> ValueError
+    options = {}
+    output = "json"
+    for key, values in urllib.parse.parse_qs(query, keep_blank_values=True).items():
+        value = values[-1].lower()
+        if key in SERVER_BOOL_OPTIONS:
+            if value not in ("", "1", "true", "yes", "0", "false", "no"):
+                raise ValueError(f"Option {key!r} must be 1/0, true/false or yes/no")
+            options[key] = value in ("", "1", "true", "yes")
+        elif key == "yaz0":
+            value = value or "best"
+            if value not in yaz0.LEVELS:
+                raise ValueError(f"Unknown Yaz0 level {value!r} (use {', '.join(yaz0.LEVELS)})")
+            options[key] = value
+        elif key == "output":
+            if value not in SERVER_OUTPUTS:
+                raise ValueError(f"Unknown output {value!r} (use {', '.join(SERVER_OUTPUTS)})")
+            output = value
+        else:
+            raise ValueError(f"Unknown option {key!r}")
+    if output == "yaz0":
+        options.setdefault("yaz0", "best")
+    return options, output
+
+
+def Init_Server_Worker(log_settings=None):
+    if log_settings is not None:
+        Setup_Logging(*log_settings)
+
+
+def Warm_Server_Worker():
+    # Alles anfassen, was sonst erst die erste Anfrage bezahlen würde
+    for Takt in range(5):
+        Timing_Block_Table(Takt)
+    return os.getpid()
+
+
+def Serve_Convert(data, options):
+    # Läuft im Worker: -> (Ergebnis oder None, Fehler oder None). Die Log-Meldungen gehen mit zurück an den Client.
+    # Fehler haben noch "status": 422 für ConversionError (Midi kaputt), 500 für alles andere (Fehler im Konverter)
+    start_time = time.perf_counter()
+    with Collect_Log_Records() as records:
+        try:
+            result = Convert_Bytes(data, ConvertOptions(**options))
+            error = None
+        except ConversionError as e:
+            error = {"status": 422, "error": str(e), "type": type(e).__name__}
+        except Exception as e:
+            error = {"status": 500, "error": str(e) or type(e).__name__, "type": type(e).__name__}
+    if error is not None:
+        error["log"] = Format_Log_Records(records)
+        return None, error
+    return {"bms": result.bms, "cit": result.cit, "yaz0": result.yaz0,
+            "seconds": time.perf_counter() - start_time, "log": Format_Log_Records(records)}, None
+
+
+class ServerPool:
+    # Vorab gestartete Worker. Stirbt einer (BrokenProcessPool), wird der Pool neu aufgebaut und die Anfrage noch einmal
+    # versucht. Stirbt er dabei wieder (die Midi selbst bringt den Worker um), bekommt der Client einen 500 Fehler.
+    # Convert läuft in den Handler-Threads: alle Anfragen auf dem kaputten Pool bekommen BrokenProcessPool, neu gebaut
+    # wird aber nur einmal (unter self.lock), die anderen nehmen danach einfach den neuen Pool.
+    def __init__(self, jobs=None):
+        self.jobs = jobs if jobs is not None and jobs > 0 else (os.cpu_count() or 1)
+        self.lock = threading.Lock()
+        self.pool = None
+        self.Start()
+
+    def Start(self):
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, initializer=Init_Server_Worker, initargs=(LOG_SETTINGS,))
+        warm = [pool.submit(Warm_Server_Worker) for _ in range(self.jobs)]     # startet alle Worker gleich
+        pids = {future.result() for future in warm}
+        self.pool = pool
+        return pids
+
+    def Restart(self, broken):
+        # -> True, wenn dieser Aufruf neu gebaut hat. False: ein anderer Thread war schneller, broken ist schon ersetzt
+        with self.lock:
+            if self.pool is not broken:
+                return False
+            LOG.warning("⚠️ A worker died, restarting the pool")
+            broken.shutdown(wait=False)
+            self.Start()
+            return True
+
+    def Convert(self, data, options):
+        failures = 0
+        while failures < 2:
+            pool = self.pool
+            try:
+                return pool.submit(Serve_Convert, data, options).result()
+            except concurrent.futures.process.BrokenProcessPool:
+                if self.Restart(pool):
+                    failures += 1       # Fehlversuch nur zählen, wenn der Pool noch aktuell war (nicht schon ersetzt)
+        return None, {"status": 500, "error": "The worker died while converting this midi", "type": "BrokenProcessPool", "log": ""}
+
+    def Close(self):
+        with self.lock:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class Conversion_Handler(http.server.BaseHTTPRequestHandler):
+    server_version = f"MidiToBMS/{VERSION}"
+    protocol_version = "HTTP/1.1"       # Verbindung bleibt offen (Editor-Plugins schicken viele Anfragen hintereinander)
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path == "/health":
+            self.Reply_JSON(200, {"version": VERSION, "workers": self.server.pool.jobs})
+        else:
+            self.Reply_Error(404, "Not found (use POST /convert or GET /health)")
+
+    def do_POST(self):
+        start_time = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/convert":
+            return self.Reply_Error(404, "Not found (use POST /convert or GET /health)")
+        try:
+            options, output = Parse_Server_Options(url.query)
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError as e:
+            return self.Reply_Error(400, str(e))
+        if length <= 0:
+            return self.Reply_Error(400, "Empty request, send the .mid file as body")
+        if length > SERVER_MAX_UPLOAD:
+            self.close_connection = True    # Body nicht erst lesen
+            return self.Reply_Error(413, f"Midi is larger than {SERVER_MAX_UPLOAD // (1024 * 1024)} MB")
+        data = self.rfile.read(length)
+
+        result, error = self.server.pool.Convert(data, options)
+        if error is not None:
+            status = error.pop("status")
+            level = logging.WARNING if status < 500 else logging.ERROR
+            LOG.log(level, "❌ %s  %s: %s", self.path, error["type"], error["error"], extra={"ok": False, "error": error["error"]})
+            return self.Reply_JSON(status, error)
+        LOG.info("✅ %s  (%.2fs)", self.path, time.perf_counter() - start_time, extra={"ok": True, "seconds": result["seconds"]})
+        if output == "json":
+            body = {key: base64.b64encode(result[key]).decode("ascii") if result[key] is not None else None for key in ("bms", "cit", "yaz0")}
+            body["seconds"] = result["seconds"]
+            body["log"] = result["log"]
+            return self.Reply_JSON(200, body)
+        if result[output] is None:
+            return self.Reply_Error(404, "This midi has no CIT (no timing channel)")
+        self.Reply(200, result[output], "application/octet-stream")
+
+    def Reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def Reply_JSON(self, status, value):
+        self.Reply(status, json.dumps(value, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def Reply_Error(self, status, message):
+        self.Reply_JSON(status, {"error": message, "type": "RequestError"})
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        CONVERT_LOG.debug(format, *args)    # Eigene Zeilen von http.server nur bei --log-level debug
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def Stop_Server(signum, frame):
+    raise KeyboardInterrupt     # SIGTERM (z.B. vom Editor-Plugin oder systemd) wie Ctrl+C behandeln
+
+
+def START_SERVE(address="127.0.0.1:8000", jobs=None):
+    # address: "8000", "host:8000" oder "unix:/pfad/zum.sock"
+    if address.startswith("unix:"):
+        path = address[5:]
+        if os.path.exists(path):
+            os.remove(path)         # alter Socket vom letzten Lauf
+        server = ThreadingUnixHTTPServer(path, Conversion_Handler)
+        where = address
+    else:
+        host, _, port = address.rpartition(":")
+        server = http.server.ThreadingHTTPServer((host or "127.0.0.1", int(port)), Conversion_Handler)
+        where = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        path = None
+
+    server.pool = ServerPool(jobs)
+    signal.signal(signal.SIGTERM, Stop_Server)
+    LOG.info("🌐 Serving on %s with %d warm worker(s) (POST /convert, Ctrl+C to stop)", where, server.pool.jobs)
+    LOG.info("")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        LOG.info("")
+        LOG.info("Stopped serving.")
+    finally:
+        server.server_close()
+        server.pool.Close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+    return 0
+
+
+## SERVER MODE END ## ---------
+
 
 
 ### Command line stuff
-if __name__ == "__main__":
-    Input_MIDI = sys.argv[1]
-    Output_BMS = sys.argv[2]
-    LinearToLogarithmic = sys.argv[3] #True or False
+def COMMANDLINE(argv):
+    parser = argparse.ArgumentParser(
+        description="Converts Midis to JAudio2 BMS sequence format.",
+        usage="%(prog)s Input.mid Output.bms LogarithmicConvert? ForTwilightPrincess?\n"
+              "       %(prog)s --batch Folder_or_Glob [...] [--jobs N] [--out Folder] [--logarithmic] [--twilight]\n"
+              "       %(prog)s --watch Folder_or_Glob [...] [--out Folder] [--debounce Seconds] [--channel-jobs N] [--logarithmic] [--twilight]\n"
+              "       %(prog)s --serve [Host:]Port|unix:Path [--jobs N]\n"
+              "       (all: [--yaz0 [best|fast]] [--yaz0-verify] [--cache Folder] [--cache-size MB] [--incremental] [--stream] [--stream-buffer KB] [--log-level Level] [--log-format text|json])\n"
+              "       (single file: [--channel-jobs N] [--show-cit] [--profile] [--profile-output File.json|File.prof])")
+    parser.add_argument("args", nargs="*")
+    parser.add_argument("--batch", action="store_true", help="Convert all midis in the given folders/globs")
+    parser.add_argument("--watch", action="store_true", help="Stay open and convert midis in the given folders/globs whenever they are saved")
+    parser.add_argument("--serve", default=None, metavar="ADDRESS", help="Stay open as a local conversion server: Port, Host:Port or unix:/path/to.sock (POST /convert with the midi as body)")
+    parser.add_argument("--debounce", type=float, default=0.5, help="Watch mode: seconds a midi must stay unchanged before converting (default: 0.5)")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of parallel conversions / server workers (default: all cores)")
+    parser.add_argument("--channel-jobs", type=int, default=None, help="Encode the channels of a midi in N parallel processes (0 = all cores, default: one after another). Single file and watch mode")
+    parser.add_argument("--out", default=None, help="Output folder for batch/watch mode (default: next to the midi)")
+    parser.add_argument("--logarithmic", action="store_true", help="Convert linear to logarithmic volumes")
+    parser.add_argument("--twilight", action="store_true", help="Twilight Princess mode")
+    parser.add_argument("--yaz0", nargs="?", const="best", default=None, choices=sorted(yaz0.LEVELS), help="Also write a Yaz0 compressed Output.bms.yaz0 (best = smallest, fast = for quick test builds)")
+    parser.add_argument("--yaz0-verify", action="store_true", help="Decompress the Yaz0 output again and compare it byte for byte with the BMS before writing it")
+    parser.add_argument("--cache", default=None, help="Cache folder: unchanged midis are not converted again")
+    parser.add_argument("--cache-size", type=int, default=512, help="Maximum cache size in MB (default: 512)")
+    parser.add_argument("--incremental", action="store_true", help="Only re-encode channels that changed since the last conversion")
+    parser.add_argument("--stream", action="store_true", help="Write channels piece by piece through a fixed buffer (the encoded BMS is not kept in memory)")
+    parser.add_argument("--stream-buffer", type=int, default=64, help="Stream mode: buffer size in KB (default: 64)")
+    parser.add_argument("--profile", action="store_true", help="Print time, calls and peak memory for every stage of the conversion (markers, global track, channel creators, each channel, timing/CIT, linking)")
+    parser.add_argument("--profile-output", default=None, help="Also write the profile: .json = stages as JSON, anything else = cProfile stats (for pstats/snakeviz)")
+    parser.add_argument("--show-cit", action="store_true", help="Print every chord and musical scale with its notes (to check the midi for mistakes)")
+    parser.add_argument("--log-level", default=None, choices=LOG_LEVELS, help="debug = also every Bank Enlarge change, chord/scale note and beat change (default: info, batch/watch conversions: warning)")
+    parser.add_argument("--log-format", default="text", choices=("text", "json"), help="json = one JSON object per line (for tools and CI)")
+    options = parser.parse_args(argv)
+
+    if options.batch or options.watch or options.serve:
+        Setup_Logging(options.log_level or "info", options.log_format, options.log_level or "warning")     # Pro Midi nur Warnungen, die Ergebnisliste bleibt
+    else:
+        Setup_Logging(options.log_level or "info", options.log_format)
+
+    cache = None
+    if options.cache is not None:
+        cache = ConversionCache(options.cache, options.cache_size * 1024 * 1024)
+
+    StreamBuffer = options.stream_buffer * 1024 if options.stream else None
+
+    LOG.info("--- 🎵 Midi to BMS v.%s 🎶 ---", VERSION) # to check Version
+    LOG.info("")
+
+    if options.serve:
+        return START_SERVE(options.serve, options.jobs)
+
+    if options.watch:
+        return START_WATCH(options.args, options.out, options.logarithmic, options.twilight, cache, options.debounce, Yaz0=options.yaz0, Yaz0Verify=options.yaz0_verify,
+                           Incremental=options.incremental, StreamBuffer=StreamBuffer, ChannelJobs=options.channel_jobs)
+
+    if options.batch:
+        results = START_BATCH(options.args, options.jobs, options.out, options.logarithmic, options.twilight, cache, options.incremental, StreamBuffer, options.yaz0, options.yaz0_verify)
+        LOG.info("")
+        return 0 if results and all(result["ok"] for result in results) else 1
+
+    # Alte Variante: Input.mid Output.bms LogarithmicConvert? ForTwilightPrincess?
+    if len(options.args) < 2:
+        parser.print_usage()
+        return 2
+    Input_MIDI = options.args[0]
+    Output_BMS = options.args[1]
+    LinearToLogarithmic = options.logarithmic or (len(options.args) > 2 and Parse_Bool(options.args[2])) #True or False
+    Twilight = options.twilight or (len(options.args) > 3 and Parse_Bool(options.args[3]))
+    
     try:
-        if "true" == sys.argv[4] or "True" == sys.argv[4]:
-            Twilight = True
-    except:
-        Twilight = False
-    
-    print("--- 🎵 Midi to BMS v.0.9.9.5.5 🎶 ---") # to check Version
-    print()
-    START(Input_MIDI, Output_BMS, LinearToLogarithmic, Twilight)
-    print()
-    print("✅ Done!")
-    print()
-    print()
-    print()
+        if options.profile or options.profile_output:
+            Run_Profiled(START_CACHED, Input_MIDI, Output_BMS, LinearToLogarithmic, Twilight, cache=cache, Incremental=options.incremental, ShowCIT=options.show_cit, StreamBuffer=StreamBuffer, ChannelJobs=options.channel_jobs, Yaz0=options.yaz0, Yaz0Verify=options.yaz0_verify, output=options.profile_output)
+        else:
+            START_CACHED(Input_MIDI, Output_BMS, LinearToLogarithmic, Twilight, cache=cache, Incremental=options.incremental, ShowCIT=options.show_cit, StreamBuffer=StreamBuffer, ChannelJobs=options.channel_jobs, Yaz0=options.yaz0, Yaz0Verify=options.yaz0_verify)
+    except ConversionError as e:
+        sys.exit(f"❌ ERROR: {e}")
+    LOG.info("")
+    LOG.info("✅ Done!")
+    LOG.info("")
+    LOG.info("")
+    LOG.info("")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(COMMANDLINE(sys.argv[1:]))
@@ -0,0 +1,240 @@
+## BENCHMARK ## ---------
+# Erzeugt synthetische Midis in kontrollierter Größe und misst jede Stage vom Konverter einzeln
+# (parse, global_events, channels, timing_and_chord, link, cit). Ergebnis als JSON, zum Vergleichen zwischen Versionen.
+#
+#   python benchmark.py                                  Standard-Suite (small, medium, large)
+#   python benchmark.py --suite large --repeat 5 --output 0.9.9.5.5.json
+#   python benchmark.py --compare old.json new.json      Zwei Ergebnisse vergleichen
+
+import argparse
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import mido
+from mido import Message, MetaMessage, MidiFile, MidiTrack
+
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MIDI-to-BMS.py")
+
+STAGES = ["parse", "global_events", "channels", "timing_and_chord", "link", "cit"]
+
+# Taktarten, die der Timing Kanal kennt
+TIME_SIGNATURES = [(4, 4), (3, 4), (5, 4), (2, 4)]
+
+# Fertige Größen: bars, channels, notes_per_beat, cc_density, pitch_density, tempo_changes, time_signature_changes, loop, timing
+SUITES = {
+    "small":  [dict(name="small",         bars=32,  channels=4,  notes_per_beat=1, cc_density=0.1, pitch_density=0.1)],
+    "medium": [dict(name="medium",        bars=128, channels=8,  notes_per_beat=2, cc_density=0.2, pitch_density=0.2, tempo_changes=4, loop=True),
+               dict(name="medium_timing", bars=128, channels=8,  notes_per_beat=2, cc_density=0.2, pitch_density=0.2, time_signature_changes=4, loop=True, timing=True)],
+    "large":  [dict(name="large",         bars=512, channels=16, notes_per_beat=4, cc_density=0.5, pitch_density=0.5, tempo_changes=16, loop=True),
+               dict(name="large_timing",  bars=512, channels=16, notes_per_beat=4, cc_density=0.5, pitch_density=0.5, time_signature_changes=16, loop=True, timing=True)],
+}
+SUITES["default"] = SUITES["small"] + SUITES["medium"] + SUITES["large"]
+
+
+def Load_Converter():
+    # MIDI-to-BMS.py hat einen Bindestrich im Namen, also über importlib laden
+    spec = importlib.util.spec_from_file_location("midi_to_bms_converter", CONVERTER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def Generate_Midi(bars=32, channels=4, notes_per_beat=1, cc_density=0.0, pitch_density=0.0, tempo_changes=0,
+                  time_signature_changes=0, loop=False, timing=False, ppqn=480, seed=0, name=None):
+    # Synthetische Midi: pro Kanal notes_per_beat Noten pro Viertel, CC/Pitchwheel mit der Wahrscheinlichkeit *_density pro Note.
+    # timing: Kanal 1 wird zum Timing Kanal (BEAT Marker, Bass-, Akkord- und Melodienoten pro Takt)
+    r = random.Random(seed)
+
+    # Takte mit Taktart (Wechsel gleichmäßig verteilt)
+    bar_starts = []
+    signatures = []
+    tick = 0
+    signature = TIME_SIGNATURES[0]
+    change_every = bars // (time_signature_changes + 1) if time_signature_changes else bars + 1
+    for bar in range(bars):
+        if bar and bar % change_every == 0:
+            signature = TIME_SIGNATURES[(bar // change_every) % len(TIME_SIGNATURES)]
+            signatures.append((tick, signature))
+        elif bar == 0:
+            signatures.append((0, signature))
+        bar_starts.append((tick, signature))
+        tick += signature[0] * ppqn
+    song_end = tick
+
+    meta = [(0, MetaMessage('set_tempo', tempo=mido.bpm2tempo(120)))]
+    for i in range(tempo_changes):
+        meta.append(((i + 1) * song_end // (tempo_changes + 1), MetaMessage('set_tempo', tempo=mido.bpm2tempo(r.randint(80, 180)))))
+    meta += [(t, MetaMessage('time_signature', numerator=n, denominator=d)) for t, (n, d) in signatures]
+    if loop:
+        meta.append((bar_starts[min(1, bars - 1)][0], MetaMessage('marker', text='LoopStart')))
+        meta.append((song_end, MetaMessage('marker', text='LoopEnd')))
+    if timing:
+        meta.append((0, MetaMessage('marker', text='BEAT')))
+
+    tracks = [meta]
+    first_channel = 0
+    if timing:
+        first_channel = 1
+        events = []
+        for start, (numerator, _) in bar_starts:
+            length = numerator * ppqn
+            bass = r.randint(48, 59)
+            events.append((start, Message('note_on', channel=0, note=bass, velocity=100)))
+            events.append((start + length - 1, Message('note_off', channel=0, note=bass, velocity=0)))
+            for k, base in enumerate((60, 72)):
+                for n in range(3):
+                    note = base + n * 3 + r.randint(0, 2)
+                    events.append((start + k, Message('note_on', channel=0, note=note, velocity=90)))
+                    events.append((start + ppqn, Message('note_off', channel=0, note=note, velocity=0)))
+        tracks.append(events)
+
+    step = max(1, ppqn // notes_per_beat)
+    for channel in range(first_channel, channels):
+        events = [(0, Message('control_change', channel=channel, control=0, value=0)),
+                  (0, Message('program_change', channel=channel, program=channel))]
+        for start in range(0, song_end - step + 1, step):
+            note = r.randint(36, 96)
+            events.append((start, Message('note_on', channel=channel, note=note, velocity=r.randint(1, 127))))
+            events.append((start + step - 1, Message('note_off', channel=channel, note=note, velocity=0)))
+            if r.random() < cc_density:
+                events.append((start, Message('control_change', channel=channel, control=r.choice([7, 10, 91, 1, 2, 92, 93]), value=r.randint(0, 127))))
+            if r.random() < pitch_density:
+                events.append((start + step // 2, Message('pitchwheel', channel=channel, pitch=r.randint(-8192, 8191))))
+        tracks.append(events)
+
+    mid = MidiFile(ticks_per_beat=ppqn)
+    for events in tracks:
+        events.sort(key=lambda e: e[0])    # stabil: note_off vor note_on am gleichen Tick bleibt so
+        track = MidiTrack()
+        last = 0
+        for event_tick, msg in events:
+            track.append(msg.copy(time=event_tick - last))
+            last = event_tick
+        mid.tracks.append(track)
+    return mid
+
+
+def Run_Case(converter, case, repeat=3, directory=None):
+    # Eine Midi erzeugen, dann repeat Mal konvertieren. Pro Stage min und median in Sekunden
+    config = {key: value for key, value in case.items() if key != "name"}
+    mid = Generate_Midi(**config)
+    midi_path = os.path.join(directory, case["name"] + ".mid")
+    bms_path = midi_path + ".bms"
+    mid.save(midi_path)
+    notes = sum(1 for track in mid.tracks for msg in track if msg.type == 'note_on' and msg.velocity > 0)
+
+    runs = []
+    for _ in range(repeat):
+        converter.STAGE_TIMES = {}
+        start = time.perf_counter()
+        converter.START(midi_path, bms_path)
+        total = time.perf_counter() - start
+        stages = dict(converter.STAGE_TIMES)
+        stages["total"] = total
+        runs.append(stages)
+    converter.STAGE_TIMES = None
+
+    result = {
+        "name": case["name"],
+        "config": config,
+        "midi_bytes": os.path.getsize(midi_path),
+        "notes": notes,
+        "bms_bytes": os.path.getsize(bms_path),
+        "stages": {},
+    }
+    for stage in STAGES + ["total"]:
+        values = [run.get(stage, 0.0) for run in runs]
+        result["stages"][stage] = {"min": min(values), "median": statistics.median(values)}
+    return result
+
+
+def Run_Suite(cases, repeat=3):
+    converter = Load_Converter()
+    # Meldungen vom Konverter gehen über logging: nur Fehler durchlassen, sonst kommen Warnungen bei jeder Wiederholung
+    # (an einen Root-Handler, mitten in die --json Ausgabe) und das Formatieren landet in den gemessenen Zeiten
+    converter.LOG.setLevel(logging.ERROR)
+    converter.CONVERT_LOG.setLevel(logging.ERROR)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for case in cases:
+            results.append(Run_Case(converter, case, repeat, directory))
+    return {
+        "converter_version": converter.VERSION,
+        "python": platform.python_version(),
+        "mido": importlib.metadata.version("mido"),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": results,
+    }
+
+
+def Format_Results(results):
+    lines = [f"Midi to BMS v.{results['converter_version']}  (Python {results['python']}, repeat {results['repeat']}, median ms)"]
+    lines.append(f"{'case':<15}{'notes':>9}" + "".join(f"{stage:>18}" for stage in STAGES + ["total"]))
+    for case in results["cases"]:
+        lines.append(f"{case['name']:<15}{case['notes']:>9}" + "".join(f"{case['stages'][stage]['median'] * 1000:>18.1f}" for stage in STAGES + ["total"]))
+    return "\n".join(lines)
+
+
+def Compare(old, new):
+    # Median pro Stage: neu gegen alt in Prozent (+ = langsamer)
+    lines = [f"v.{old['converter_version']} -> v.{new['converter_version']}  (median, + = slower)"]
+    old_cases = {case["name"]: case for case in old["cases"]}
+    for case in new["cases"]:
+        if case["name"] not in old_cases:
+            continue
+        parts = []
+        for stage in STAGES + ["total"]:
+            before = old_cases[case["name"]]["stages"][stage]["median"]
+            after = case["stages"][stage]["median"]
+            if before > 0:
+                parts.append(f"{stage} {(after - before) / before * 100:+.0f}%")
+        lines.append(f"{case['name']:<15}" + "  ".join(parts))
+    return "\n".join(lines)
+
+
+def COMMANDLINE(argv):
+    parser = argparse.ArgumentParser(description="Benchmarks the Midi to BMS converter with synthetic midis.")
+    parser.add_argument("--suite", default="default", choices=sorted(SUITES), help="Which sizes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Conversions per case (default: 3)")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files instead of running")
+    options = parser.parse_args(argv)
+
+    if options.compare:
+        with open(options.compare[0], encoding="utf-8") as f:
+            old = json.load(f)
+        with open(options.compare[1], encoding="utf-8") as f:
+            new = json.load(f)
+        print(Compare(old, new))
+        return 0
+
+    results = Run_Suite(SUITES[options.suite], max(1, options.repeat))
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    if options.json:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    else:
+        print(Format_Results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(COMMANDLINE(sys.argv[1:]))
+
+
+## BENCHMARK END ## ---------
@@ -0,0 +1,319 @@
+## BMS DISASSEMBLER ## ---------
+# Liest eine BMS (auch .yaz0) wieder ein: ab Offset 0, folgt allen C1 Kanalerstellern, C3 Calls und C7 Gotos.
+# Kennt genau die OpCodes, die MIDI-to-BMS.py schreibt. Ausgabe als Listing oder JSON pro Track.
+#
+#   python bms_disassembler.py Song.bms [...]            Listing
+#   python bms_disassembler.py --json Song.bms [...]     JSON
+#   python bms_disassembler.py --summary Folder [...]    Nur Größen/Anzahl pro Datei (für den ganzen Output-Ordner)
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+import yaz0
+
+
+class BMSFormatError(ValueError):
+    # Unbekannter OpCode oder Daten hören mitten im Befehl auf
+    pass
+
+
+PARAM_NAMES = {0x00: "volume", 0x02: "reverb", 0x03: "pan"}                   # B8 (und B9)
+PARAM16_NAMES = {0x01: "pitch"}                                                # B9
+REGISTER_NAMES = {0x62: "ppqn", 0x6E: "vibrato_depth", 0x70: "tremolo_depth",
+                  0x71: "vibrato_rate", 0x72: "tremolo_rate"}                 # D8
+
+
+def Read_VLQ(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = value << 7 | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def Decode_Event(data, pos):
+    # Einen Befehl ab pos lesen -> (event, nächste Position)
+    if pos >= len(data):
+        raise BMSFormatError(f"Track runs past the end of the file (0x{pos:06X}) without FF")
+    op = data[pos]
+    try:
+        if op < 0x80:
+            event = {"op": "note_on", "note": op, "voice": data[pos + 1], "velocity": data[pos + 2]}
+            size = 3
+        elif op <= 0x87:
+            event = {"op": "note_off", "voice": op & 0x0F}
+            size = 1
+        elif op == 0xB8:
+            param = data[pos + 1]
+            event = {"op": "param", "param": param, "name": PARAM_NAMES.get(param), "value": data[pos + 2]}
+            size = 3
+        elif op == 0xB9:
+            param = data[pos + 1]
+            value = int.from_bytes(data[pos + 2:pos + 4], "big", signed=True)
+            event = {"op": "param16", "param": param, "name": PARAM16_NAMES.get(param), "value": value}
+            size = 4
+        elif op == 0xC1:
+            event = {"op": "open_track", "track": data[pos + 1], "address": int.from_bytes(data[pos + 2:pos + 5], "big")}
+            size = 5
+        elif op == 0xC3:
+            event = {"op": "call", "address": int.from_bytes(data[pos + 1:pos + 4], "big")}
+            size = 4
+        elif op == 0xC5:
+            event = {"op": "return"}
+            size = 1
+        elif op == 0xC7:
+            event = {"op": "jump", "address": int.from_bytes(data[pos + 1:pos + 4], "big")}
+            size = 4
+        elif op == 0xD8:
+            register = data[pos + 1]
+            event = {"op": "register", "register": register, "name": REGISTER_NAMES.get(register),
+                     "value": int.from_bytes(data[pos + 2:pos + 4], "big")}
+            size = 4
+        elif op == 0xE0:
+            event = {"op": "tempo", "bpm": int.from_bytes(data[pos + 1:pos + 3], "big")}
+            size = 3
+        elif op == 0xE2:
+            event = {"op": "bank", "value": data[pos + 1]}
+            size = 2
+        elif op == 0xE3:
+            event = {"op": "program", "value": data[pos + 1]}
+            size = 2
+        elif op == 0xF0:
+            ticks, end = Read_VLQ(data, pos + 1)
+            event = {"op": "wait", "ticks": ticks}
+            size = end - pos
+        elif op == 0xF9:
+            event = {"op": "f9", "value": int.from_bytes(data[pos + 1:pos + 3], "big")}     # Twilight Princess Zusatz
+            size = 3
+        elif op == 0xFF:
+            event = {"op": "end"}
+            size = 1
+        else:
+            raise BMSFormatError(f"Unknown opcode {op:02X} at 0x{pos:06X}")
+    except IndexError:
+        raise BMSFormatError(f"Opcode {op:02X} at 0x{pos:06X} is cut off by the end of the file") from None
+    if pos + size > len(data):
+        raise BMSFormatError(f"Opcode {op:02X} at 0x{pos:06X} is cut off by the end of the file")
+    event["offset"] = pos
+    event["size"] = size
+    return event, pos + size
+
+
+def Call_Duration(data, address, durations, depth=0):
+    # Wie viele Ticks ein C3 Unterprogramm dauert: Waits bis C5, verschachtelte Calls mitgezählt.
+    # None = nicht bestimmbar (Goto/FF im Unterprogramm, kaputte Daten, Rekursion) -> danach gibt es keine Ticks mehr
+    if address in durations:
+        return durations[address]
+    durations[address] = None       # gegen Calls auf sich selbst
+    if depth > 16:
+        return None
+    total = 0
+    pos = address
+    while True:
+        try:
+            event, pos = Decode_Event(data, pos)
+        except BMSFormatError:
+            return None
+        op = event["op"]
+        if op == "wait":
+            total += event["ticks"]
+        elif op == "call":
+            inner = Call_Duration(data, event["address"], durations, depth + 1)
+            if inner is None:
+                return None
+            total += inner
+        elif op == "return":
+            durations[address] = total
+            return total
+        elif op in ("jump", "end"):
+            return None
+
+
+def Disassemble_Flow(data, entry, visited, durations=None):
+    # Linear ab entry bis FF, C5 oder einem Goto. Goto-Ziele außerhalb vom schon gelesenen Stück werden mitgenommen.
+    # Was hinter einem Goto steht und nirgends angesprungen wird, wird nie abgespielt und taucht nicht auf.
+    # Ticks nach einem C3 Call zählen die Dauer vom Unterprogramm mit (durations: adresse -> Ticks, wird geteilt).
+    # -> (events, [(art, adresse, track), ...] für C1/C3, Fehler oder None)
+    if durations is None:
+        durations = {}
+    events = []
+    targets = []
+    error = None
+    pending = [entry]
+    while pending and error is None:
+        pos = pending.pop()
+        tick = None if events else 0
+        while pos not in visited:
+            visited.add(pos)
+            try:
+                event, pos = Decode_Event(data, pos)
+            except BMSFormatError as e:
+                error = str(e)      # Bis hierhin gelesenes bleibt drin
+                break
+            if tick is not None:
+                event["tick"] = tick
+                if event["op"] == "wait":
+                    tick += event["ticks"]
+            events.append(event)
+            op = event["op"]
+            if op == "open_track":
+                targets.append(("track", event["address"], event["track"]))
+            elif op == "call":
+                targets.append(("call", event["address"], None))
+                if tick is not None:
+                    duration = Call_Duration(data, event["address"], durations)
+                    tick = None if duration is None else tick + duration
+            elif op == "jump":
+                if event["address"] not in visited:
+                    pending.append(event["address"])
+                break
+            elif op in ("end", "return"):
+                break
+    events.sort(key=lambda e: e["offset"])
+    return events, targets, error
+
+
+def Disassemble(data):
+    # Ganze BMS -> {"size": ..., "tracks": [{"kind", "track", "offset", "parent", "events"/"error"}, ...]}
+    if data[:4] == b"Yaz0":
+        data = yaz0.Yaz0_Decompress(data)
+    tracks = []
+    visited = set()
+    durations = {}
+    queue = [("track", 0, None, None)]      # (art, adresse, track id, eltern offset)
+    seen_entries = set()
+    while queue:
+        kind, address, track_id, parent = queue.pop(0)
+        if (kind, address) in seen_entries:
+            continue
+        seen_entries.add((kind, address))
+        entry = {"kind": kind, "track": track_id, "offset": address, "parent": parent}
+        if address >= len(data):
+            entry["error"] = f"Pointer 0x{address:06X} is outside the file"
+            entry["events"] = []
+        else:
+            entry["events"], targets, error = Disassemble_Flow(data, address, visited, durations)
+            if error is not None:
+                entry["error"] = error
+            for target_kind, target_address, target_track in targets:
+                queue.append((target_kind, target_address, target_track, address))
+        tracks.append(entry)
+    return {"size": len(data), "tracks": tracks}
+
+
+def Disassemble_File(path):
+    with open(path, "rb") as f:
+        return Disassemble(f.read())
+
+
+def Format_Event(event):
+    op = event["op"]
+    if op == "note_on":
+        return f"note_on   note={event['note']} voice={event['voice']} velocity={event['velocity']}"
+    if op == "note_off":
+        return f"note_off  voice={event['voice']}"
+    if op in ("param", "param16", "register"):
+        key = event.get("param", event.get("register"))
+        name = f" ({event['name']})" if event["name"] else ""
+        return f"{op:<9} {key:02X}{name} = {event['value']}"
+    if op in ("open_track",):
+        return f"open_track {event['track']} -> 0x{event['address']:06X}"
+    if op in ("call", "jump"):
+        return f"{op:<9} 0x{event['address']:06X}"
+    if op == "tempo":
+        return f"tempo     {event['bpm']} bpm"
+    if op in ("bank", "program", "f9"):
+        return f"{op:<9} {event['value']}"
+    if op == "wait":
+        return f"wait      {event['ticks']}"
+    return op
+
+
+def Format_Listing(result, data=None):
+    lines = [f"; {result['size']} bytes, {len(result['tracks'])} tracks/blocks"]
+    for track in result["tracks"]:
+        lines.append("")
+        if track["kind"] == "track":
+            name = "root" if track["track"] is None else f"track {track['track']}"
+        else:
+            name = "call block"
+        lines.append(f"; --- {name} @ 0x{track['offset']:06X}" + (f" (from 0x{track['parent']:06X})" if track["parent"] is not None else ""))
+        for event in track["events"]:
+            raw = data[event["offset"]:event["offset"] + event["size"]].hex(" ").upper() if data is not None else ""
+            tick = f"{event['tick']:>8}" if "tick" in event else " " * 8
+            lines.append(f"{event['offset']:06X} {tick}  {raw:<15} {Format_Event(event)}")
+        if "error" in track:
+            lines.append(f"; ❌ ERROR: {track['error']}")
+    return "\n".join(lines)
+
+
+def Summary(result):
+    # Bytes und Befehle pro Track (für Größenanalyse)
+    tracks = []
+    for track in result["tracks"]:
+        ops = {}
+        for event in track["events"]:
+            ops[event["op"]] = ops.get(event["op"], 0) + 1
+        tracks.append({"kind": track["kind"], "track": track["track"], "offset": track["offset"],
+                       "bytes": sum(event["size"] for event in track["events"]), "ops": ops,
+                       "error": track.get("error")})
+    # Was kein Track erreicht (z.B. Events hinter dem Loop-Ende, die nie abgespielt werden)
+    unreachable = result["size"] - sum(track["bytes"] for track in tracks)
+    return {"size": result["size"], "unreachable": unreachable, "tracks": tracks}
+
+
+def Collect_Files(inputs):
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files += sorted(glob.glob(os.path.join(item, "*.bms")) + glob.glob(os.path.join(item, "*.bms.yaz0")))
+        else:
+            files += sorted(glob.glob(item)) or [item]
+    return files
+
+
+def COMMANDLINE(argv):
+    parser = argparse.ArgumentParser(description="Disassembles BMS files written by MIDI-to-BMS.py.")
+    parser.add_argument("files", nargs="+", help="BMS files (.bms or .bms.yaz0), folders or globs")
+    parser.add_argument("--json", action="store_true", help="Output JSON instead of a listing")
+    parser.add_argument("--summary", action="store_true", help="Only bytes and opcode counts per track")
+    options = parser.parse_args(argv)
+
+    failed = False
+    results = {}
+    for path in Collect_Files(options.files):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:4] == b"Yaz0":
+                data = yaz0.Yaz0_Decompress(data)
+            result = Disassemble(data)
+        except (OSError, yaz0.Yaz0Error) as e:
+            print(f"❌ ERROR: {path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        failed = failed or any("error" in track for track in result["tracks"])
+        if options.summary:
+            result = Summary(result)
+        if options.json or options.summary:
+            results[path] = result
+        else:
+            print(f"; {path}")
+            print(Format_Listing(result, data))
+            print()
+    if options.json or options.summary:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(COMMANDLINE(sys.argv[1:]))
+
+
+## BMS DISASSEMBLER END ## ---------
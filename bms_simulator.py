@@ -0,0 +1,245 @@
+## BMS SIMULATOR ## ---------
+# Spielt eine BMS ohne Spiel "ab": jeder Track läuft mit eigenem Tickzähler, Call-Stack und Voices.
+# Prüft dabei Loop-Punkte, Timing und ob jede Note auch wieder ausgeht.
+#
+#   python bms_simulator.py Song.bms [...]             Kurzbericht pro Track
+#   python bms_simulator.py --json Song.bms [...]      Bericht als JSON
+#   python bms_simulator.py --timeline Song.bms        Zusätzlich jedes Note On/Off mit Tick
+#
+# Exit 1 bei jedem Problem. Achtung bei Loop-Songs: ein Note Off, das (nach dem Umrechnen auf die Ziel-PPQN) genau auf
+# dem LoopEnd Tick liegt, schreibt der Konverter hinter das C7 -> es wird nie ausgeführt und zählt als hängende Note.
+# Das passiert z.B. mit allen benchmark.Generate_Midi(loop=True) Midis (Note Off 1 Tick vor LoopEnd bei PPQN 480).
+# Solche Noten in der Midi etwas früher enden lassen, dann geht der Check durch.
+
+import argparse
+import json
+import sys
+
+import yaz0
+from bms_disassembler import BMSFormatError, Decode_Event, Collect_Files
+
+
+MAX_CALL_DEPTH = 16
+MAX_STEPS = 10_000_000          # Schutz gegen Endlosschleifen ohne Wartezeit
+
+
+def Simulate_Track(data, entry, start_tick=0, timeline=False):
+    # Ein Track von entry bis FF oder bis zum ersten Rücksprung (Loop). -> Bericht, [(tick, track, adresse) für C1]
+    pc = entry
+    tick = start_tick
+    stack = []
+    first_seen = {}             # Adresse -> (Tick, Schritt) beim ersten Ausführen (für den Loop-Punkt)
+    voices = {}                 # voice -> (note, tick)
+    report = {"offset": entry, "start_tick": start_tick, "end_tick": None, "loop": None,
+              "note_on": 0, "note_off": 0, "calls": 0, "tempo": [], "problems": []}
+    if timeline:
+        report["timeline"] = []
+    children = []
+    problems = report["problems"]
+
+    for step in range(MAX_STEPS):
+        first_seen.setdefault(pc, (tick, step))
+        try:
+            event, next_pc = Decode_Event(data, pc)
+        except BMSFormatError as e:
+            problems.append(str(e))
+            break
+        op = event["op"]
+
+        if op == "wait":
+            tick += event["ticks"]
+        elif op == "note_on":
+            voice = event["voice"]
+            if voice in voices:
+                problems.append(f"Tick {tick}: voice {voice} started again while note {voices[voice][0]} is still on (0x{pc:06X})")
+            voices[voice] = (event["note"], tick)
+            report["note_on"] += 1
+            if timeline:
+                report["timeline"].append((tick, "on", event["note"], voice, event["velocity"]))
+        elif op == "note_off":
+            voice = event["voice"]
+            if voice not in voices:
+                problems.append(f"Tick {tick}: note off for voice {voice}, but it is not playing (0x{pc:06X})")
+            else:
+                note, _ = voices.pop(voice)
+                if timeline:
+                    report["timeline"].append((tick, "off", note, voice, 0))
+            report["note_off"] += 1
+        elif op == "tempo":
+            report["tempo"].append((tick, event["bpm"]))
+        elif op == "open_track":
+            children.append((tick, event["track"], event["address"], step))
+        elif op == "call":
+            if len(stack) >= MAX_CALL_DEPTH:
+                problems.append(f"Tick {tick}: call stack deeper than {MAX_CALL_DEPTH} (0x{pc:06X})")
+                break
+            stack.append(next_pc)
+            report["calls"] += 1
+            next_pc = event["address"]
+        elif op == "return":
+            if not stack:
+                problems.append(f"Tick {tick}: C5 return without call (0x{pc:06X})")
+                break
+            next_pc = stack.pop()
+        elif op == "jump":
+            target = event["address"]
+            if target in first_seen:
+                # Rücksprung = Loop. Einmal durch reicht, ab hier wiederholt sich alles
+                loop_tick, loop_step = first_seen[target]
+                report["loop"] = {"start_tick": loop_tick, "end_tick": tick, "address": target,
+                                  # Liegt ein C1 im Loop, werden die Kinder-Tracks jedes Mal neu gestartet (LoopAll)
+                                  "reopens_tracks": any(child[3] >= loop_step for child in children)}
+                report["end_tick"] = tick
+                break
+            next_pc = target
+        elif op == "end":
+            if stack:
+                problems.append(f"Tick {tick}: FF inside a call block (0x{pc:06X})")
+            report["end_tick"] = tick
+            break
+        pc = next_pc
+    else:
+        problems.append(f"Stopped after {MAX_STEPS} commands (endless loop without wait?)")
+
+    # Noten, die beim Ende/Loop noch an sind, hängen (beim Loop würden sie nie ausgehen)
+    for voice, (note, on_tick) in sorted(voices.items()):
+        where = "loop jump" if report["loop"] else "end"
+        problems.append(f"Note {note} on voice {voice} (from tick {on_tick}) is still on at the {where} (tick {tick})")
+    report["hanging_notes"] = len(voices)
+    if report["end_tick"] is None:
+        report["end_tick"] = tick
+    return report, children
+
+
+def Ticks_to_Seconds(tick, tempo_map, ppqn):
+    # tempo_map: [(tick, bpm), ...] sortiert; vor dem ersten Tempo gilt 120
+    seconds = 0.0
+    last_tick = 0
+    bpm = 120
+    for change_tick, change_bpm in tempo_map:
+        if change_tick >= tick:
+            break
+        seconds += (change_tick - last_tick) * 60.0 / (bpm * ppqn)
+        last_tick = change_tick
+        bpm = change_bpm or bpm
+    return seconds + (tick - last_tick) * 60.0 / (bpm * ppqn)
+
+
+def Simulate(data, timeline=False):
+    # Ganze BMS: Root-Track ab Offset 0, alle C1 Tracks werden zu dem Tick gestartet, an dem sie geöffnet werden
+    if data[:4] == b"Yaz0":
+        data = yaz0.Yaz0_Decompress(data)
+    tracks = []
+    queue = [(0, None, 0, None, False)]     # (start tick, track id, adresse, eltern adresse, wird vom Eltern-Loop neu gestartet)
+    started = set()
+    while queue:
+        start_tick, track_id, address, parent, restarted = queue.pop(0)
+        if address in started:
+            continue
+        started.add(address)
+        report, children = Simulate_Track(data, address, start_tick, timeline)
+        report["track"] = track_id
+        report["parent"] = parent
+        report["restarted_by_parent"] = restarted
+        tracks.append(report)
+        reopens = restarted or bool(report["loop"] and report["loop"]["reopens_tracks"])
+        for child_tick, child_id, child_address, _ in children:
+            queue.append((child_tick, child_id, child_address, address, reopens))
+
+    # PPQN aus dem Root-Track (D8 62), Tempo aus allen Tracks
+    ppqn = 120
+    try:
+        pos = 0
+        for _ in range(16):
+            event, pos = Decode_Event(data, pos)
+            if event["op"] == "register" and event["name"] == "ppqn":
+                ppqn = event["value"] or 120
+                break
+    except BMSFormatError:
+        pass
+    tempo_map = sorted(change for track in tracks for change in track["tempo"])
+
+    # Loops aller Tracks müssen am gleichen Tick enden, sonst laufen die Kanäle auseinander
+    loop_ends = {track["loop"]["end_tick"] for track in tracks if track["loop"]}
+    loop_starts = {track["loop"]["start_tick"] for track in tracks if track["loop"]}
+    problems = []
+    if len(loop_ends) > 1 or len(loop_starts) > 1:
+        problems.append(f"Tracks loop at different ticks (starts {sorted(loop_starts)}, ends {sorted(loop_ends)})")
+    looping = [track for track in tracks if track["loop"]]
+    stopping = [track for track in tracks if not track["loop"] and not track["restarted_by_parent"]]
+    if looping and stopping:
+        problems.append(f"{len(stopping)} track(s) end while {len(looping)} track(s) loop")
+
+    length = max((track["end_tick"] for track in tracks), default=0)
+    return {
+        "size": len(data),
+        "ppqn": ppqn,
+        "length_ticks": length,
+        "length_seconds": round(Ticks_to_Seconds(length, tempo_map, ppqn), 3),
+        "loop": {"start_tick": min(loop_starts), "end_tick": max(loop_ends)} if loop_ends else None,
+        "note_on": sum(track["note_on"] for track in tracks),
+        "note_off": sum(track["note_off"] for track in tracks),
+        "problems": problems,
+        "ok": not problems and not any(track["problems"] for track in tracks),
+        "tracks": tracks,
+    }
+
+
+def Simulate_File(path, timeline=False):
+    with open(path, "rb") as f:
+        return Simulate(f.read(), timeline)
+
+
+def Format_Report(result):
+    loop = result["loop"]
+    lines = [f"{'✅' if result['ok'] else '❌'} {result['length_ticks']} ticks ({result['length_seconds']} s at PPQN {result['ppqn']}), "
+             f"loop: {str(loop['start_tick']) + ' -> ' + str(loop['end_tick']) if loop else 'none'}, "
+             f"notes on/off: {result['note_on']}/{result['note_off']}"]
+    for track in result["tracks"]:
+        name = "root" if track["track"] is None else f"track {track['track']}"
+        track_loop = f"loop {track['loop']['start_tick']} -> {track['loop']['end_tick']}" if track["loop"] else f"end {track['end_tick']}"
+        lines.append(f"  {name:<9} @ 0x{track['offset']:06X}  {track_loop:<22} on/off {track['note_on']}/{track['note_off']}"
+                     + (f"  calls {track['calls']}" if track["calls"] else ""))
+        for problem in track["problems"]:
+            lines.append(f"    ❌ {problem}")
+        for entry in track.get("timeline", ()):
+            lines.append(f"    {entry[0]:>8}  {entry[1]:<3} note={entry[2]} voice={entry[3]}" + (f" velocity={entry[4]}" if entry[1] == "on" else ""))
+    for problem in result["problems"]:
+        lines.append(f"  ❌ {problem}")
+    return "\n".join(lines)
+
+
+def COMMANDLINE(argv):
+    parser = argparse.ArgumentParser(description="Plays BMS files written by MIDI-to-BMS.py headless and checks loops, timing and notes.")
+    parser.add_argument("files", nargs="+", help="BMS files (.bms or .bms.yaz0), folders or globs")
+    parser.add_argument("--json", action="store_true", help="Output JSON instead of a report")
+    parser.add_argument("--timeline", action="store_true", help="Include every note on/off with its tick")
+    options = parser.parse_args(argv)
+
+    failed = False
+    results = {}
+    for path in Collect_Files(options.files):
+        try:
+            result = Simulate_File(path, options.timeline)
+        except (OSError, yaz0.Yaz0Error) as e:
+            print(f"❌ ERROR: {path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        failed = failed or not result["ok"]
+        if options.json:
+            results[path] = result
+        else:
+            print(path)
+            print(Format_Report(result))
+            print()
+    if options.json:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(COMMANDLINE(sys.argv[1:]))
+
+
+## BMS SIMULATOR END ## ---------
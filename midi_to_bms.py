@@ -0,0 +1,24 @@
+## MIDI TO BMS (IMPORT) ## ---------
+# MIDI-to-BMS.py lässt sich wegen dem Bindestrich nicht mit import laden. Diese Datei lädt es und ersetzt sich
+# selbst durch das Modul, "import midi_to_bms" gibt also direkt den Konverter (auch in Worker-Prozessen mit spawn).
+#
+#   import midi_to_bms
+#   with open("Song.mid", "rb") as f:
+#       result = midi_to_bms.Convert_Bytes(f.read(), midi_to_bms.ConvertOptions(yaz0="best"))
+#   result.bms, result.cit, result.yaz0
+#
+# Fehler: midi_to_bms.ConversionError (MidiError, MarkerError, TimingChannelError, VoiceError)
+
+import importlib.util
+import os
+import sys
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MIDI-to-BMS.py")
+
+_spec = importlib.util.spec_from_file_location(__name__, CONVERTER)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
+
+
+## MIDI TO BMS (IMPORT) END ## ---------
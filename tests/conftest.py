@@ -0,0 +1,69 @@
+## TESTS ## ---------
+# Gemeinsame Helfer für die Tests. Der Konverter wird über midi_to_bms.py geladen (wie in eigenen Skripten),
+# die Test-Midis kommen aus benchmark.Generate_Midi oder werden hier von Hand gebaut.
+#
+#   python -m pytest -q
+
+import io
+import os
+import sys
+
+import mido
+import pytest
+from mido import Message, MetaMessage, MidiFile, MidiTrack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import benchmark
+import midi_to_bms
+
+
+def Midi_Bytes(mid):
+    data = io.BytesIO()
+    mid.save(file=data)
+    return data.getvalue()
+
+
+def Build_Midi(*tracks, ppqn=120):
+    # tracks: Listen von (absoluter tick, Message) -> MidiFile. Erste Spur bekommt Tempo und 4/4 dazu
+    mid = MidiFile(ticks_per_beat=ppqn)
+    head = [(0, MetaMessage('set_tempo', tempo=mido.bpm2tempo(120))),
+            (0, MetaMessage('time_signature', numerator=4, denominator=4))]
+    for index, events in enumerate(tracks):
+        events = sorted((head if index == 0 else []) + list(events), key=lambda e: e[0])
+        track = MidiTrack()
+        last = 0
+        for tick, msg in events:
+            track.append(msg.copy(time=tick - last))
+            last = tick
+        mid.tracks.append(track)
+    return mid
+
+
+def Note(channel, note, start, length, velocity=100):
+    return [(start, Message('note_on', channel=channel, note=note, velocity=velocity)),
+            (start + length, Message('note_off', channel=channel, note=note, velocity=0))]
+
+
+@pytest.fixture
+def converter():
+    return midi_to_bms
+
+
+@pytest.fixture
+def song_midi():
+    # Mehrere Kanäle, CCs, Pitchwheel, Tempo- und Loop-Marker
+    return benchmark.Generate_Midi(bars=16, channels=6, notes_per_beat=2, cc_density=0.3, pitch_density=0.3,
+                                   tempo_changes=2, loop=True, seed=1)
+
+
+@pytest.fixture
+def timing_midi():
+    # Mit Timing Kanal (BEAT Marker) und Taktwechseln
+    return benchmark.Generate_Midi(bars=16, channels=4, notes_per_beat=2, cc_density=0.2, time_signature_changes=2,
+                                   loop=True, timing=True, seed=2)
+
+
+## TESTS END ## ---------
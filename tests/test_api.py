@@ -0,0 +1,65 @@
+## LIBRARY API ## ---------
+
+import pytest
+from mido import MetaMessage
+
+import benchmark
+import yaz0
+from conftest import Build_Midi, Midi_Bytes, Note
+
+
+def Timing_Midi(bass_ticks, loop_end=None):
+    # Kanal 0 als Timing Kanal: eine Bassnote pro Eintrag in bass_ticks, dazu ein Akkord
+    meta = [(0, MetaMessage('marker', text='BEAT'))]
+    if loop_end is not None:
+        meta += [(0, MetaMessage('marker', text='LoopStart')), (loop_end, MetaMessage('marker', text='LoopEnd'))]
+    notes = []
+    for tick in bass_ticks:
+        notes += Note(0, 48, tick, 479) + Note(0, 60, tick, 120) + Note(0, 72, tick, 120)
+    return Midi_Bytes(Build_Midi(meta, notes))
+
+
+def test_convert_bytes_result(converter, timing_midi):
+    result = converter.Convert_Bytes(Midi_Bytes(timing_midi), converter.ConvertOptions(yaz0="fast", yaz0_verify=True))
+    assert result.bms and result.cit[4:8] == b"CITS"
+    assert yaz0.Yaz0_Decompress(result.yaz0) == result.bms
+
+
+def test_unreadable_midi(converter):
+    with pytest.raises(converter.MidiError):
+        converter.Convert_Bytes(b"MThd not really a midi")
+
+
+def test_loop_end_before_start(converter):
+    markers = [(0, MetaMessage('marker', text='LoopEnd')), (240, MetaMessage('marker', text='LoopStart'))]
+    with pytest.raises(converter.MarkerError):
+        converter.Convert_Bytes(Midi_Bytes(Build_Midi(markers, Note(0, 60, 0, 480))))
+
+
+def test_timing_channel_without_bass_note(converter):
+    midi = Build_Midi([(0, MetaMessage('marker', text='BEAT'))], Note(0, 60, 0, 480))
+    with pytest.raises(converter.TimingChannelError, match="No bass note"):
+        converter.Convert_Bytes(Midi_Bytes(midi))
+
+
+def test_bass_note_behind_loop_end(converter):
+    # Früher IndexError beim Zusammenbauen vom CIT
+    assert converter.Convert_Bytes(Timing_Midi([0, 480], loop_end=960)).cit
+    with pytest.raises(converter.TimingChannelError, match="tick 4800"):
+        converter.Convert_Bytes(Timing_Midi([0, 480, 4800], loop_end=960))
+
+
+def test_too_many_voices(converter):
+    # Früher RuntimeError, jetzt wie alle anderen Midi-Fehler eine ConversionError
+    chord = [event for note in range(60, 68) for event in Note(1, note, 0, 480)]
+    with pytest.raises(converter.VoiceError, match="more than 7 notes"):
+        converter.Convert_Bytes(Midi_Bytes(Build_Midi(chord)))
+    assert issubclass(converter.VoiceError, converter.ConversionError)
+
+
+def test_unknown_yaz0_level(converter):
+    with pytest.raises(ValueError):
+        converter.Convert_Bytes(Midi_Bytes(benchmark.Generate_Midi(bars=2, channels=1)), converter.ConvertOptions(yaz0="tiny"))
+
+
+## LIBRARY API END ## ---------
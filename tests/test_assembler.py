@@ -0,0 +1,60 @@
+## BMS ASSEMBLER ## ---------
+
+import pytest
+
+
+def Chunk(converter, *parts):
+    # parts: bytes oder ("LoopStart",), ("LoopEnd",), ("Call", takt), ("Label", name)
+    chunk = converter.BMSData()
+    for part in parts:
+        if isinstance(part, bytes):
+            chunk.extend(part)
+        else:
+            getattr(chunk, part[0])(*part[1:])
+    return chunk
+
+
+def test_pointer_relocation(converter):
+    asm = converter.BMSAssembler()
+    asm.Emit(b'\xC1\x00')
+    asm.Pointer("track")
+    asm.Emit(b'\xFF\xFF')
+    asm.Label("track")
+    asm.Emit(b'\xC5')
+    assert asm.Link() == b'\xC1\x00\x00\x00\x07\xFF\xFF\xC5'
+
+
+def test_loop_and_call_relocations(converter):
+    asm = converter.BMSAssembler()
+    asm.Write(Chunk(converter, b'\x90\x3C\x64', ("LoopStart",), b'\xF0\x10', ("Call", 2), ("LoopEnd",)))
+    asm.Write(Chunk(converter, ("Label", ("Taktblock", 2)), b'\xF0\x20\xC6'))
+    data = asm.Link()
+    # LoopStart liegt hinter der Note (3), der Taktblock hinter Goto + Call (13)
+    assert data == bytes([0x90, 0x3C, 0x64, 0xF0, 0x10, 0xC3, 0x00, 0x00, 0x0D, 0xC7, 0x00, 0x00, 0x03, 0xF0, 0x20, 0xC6])
+
+
+def test_chunks_concatenate_marks(converter):
+    # += verschiebt die Marken vom angehängten Chunk
+    chunk = Chunk(converter, b'\xF0\x10')
+    chunk += Chunk(converter, ("LoopStart",), b'\xF0\x20', ("LoopEnd",))
+    asm = converter.BMSAssembler()
+    asm.Emit(b'\x00')
+    asm.Write(chunk)
+    assert asm.Link() == b'\x00\xF0\x10\xF0\x20\xC7\x00\x00\x03'
+
+
+def test_loop_does_not_cross_channels(converter):
+    asm = converter.BMSAssembler()
+    asm.Write(Chunk(converter, ("LoopStart",), b'\xF0\x10'))
+    with pytest.raises(converter.MarkerError):
+        asm.Write(Chunk(converter, ("LoopEnd",)))
+
+
+def test_missing_label(converter):
+    asm = converter.BMSAssembler()
+    asm.Write(Chunk(converter, ("Call", 7)))
+    with pytest.raises(converter.ConversionError, match="Taktblock"):
+        asm.Link()
+
+
+## BMS ASSEMBLER END ## ---------
@@ -0,0 +1,66 @@
+## BATCH MODE ## ---------
+
+import logging
+import os
+
+from mido import MetaMessage
+
+import benchmark
+import midi_to_bms
+from conftest import Build_Midi, Midi_Bytes, Note
+
+CONVERT_FILE = midi_to_bms.Convert_File
+
+
+def Crashing_Convert_File(midifile, *args, **kwargs):
+    # Simuliert einen Absturz im Worker (Segfault, OOM-Killer) bei genau einer Datei
+    if os.path.basename(midifile) == "crash.mid":
+        os._exit(1)
+    return CONVERT_FILE(midifile, *args, **kwargs)
+
+
+def Write_Midis(directory, names):
+    for seed, name in enumerate(names):
+        with open(directory / name, "wb") as f:
+            f.write(Midi_Bytes(benchmark.Generate_Midi(bars=4, channels=2, seed=seed)))
+
+
+def test_batch_converts_all(converter, tmp_path):
+    Write_Midis(tmp_path, ["a.mid", "b.mid", "c.mid"])
+    results = converter.START_BATCH([str(tmp_path)], jobs=2)
+    assert sorted(os.path.basename(result["midi"]) for result in results) == ["a.mid", "b.mid", "c.mid"]
+    assert all(result["ok"] for result in results)
+    for name in ["a.mid", "b.mid", "c.mid"]:
+        assert (tmp_path / (name + ".bms")).stat().st_size > 0
+
+
+def test_batch_survives_dead_worker(converter, tmp_path, monkeypatch):
+    # Ein toter Worker macht nur seine eigene Datei kaputt, der Rest vom Batch läuft weiter
+    monkeypatch.setattr(converter, "Convert_File", Crashing_Convert_File)
+    Write_Midis(tmp_path, ["a.mid", "b.mid", "crash.mid", "d.mid", "e.mid"])
+    results = converter.START_BATCH([str(tmp_path)], jobs=2)
+    by_name = {os.path.basename(result["midi"]): result for result in results}
+    assert len(results) == 5
+    assert sorted(by_name) == ["a.mid", "b.mid", "crash.mid", "d.mid", "e.mid"]
+    assert not by_name["crash.mid"]["ok"]
+    assert "BrokenProcessPool" in by_name["crash.mid"]["error"]
+    for name in ["a.mid", "b.mid", "d.mid", "e.mid"]:
+        assert by_name[name]["ok"], by_name[name]["error"]
+        assert (tmp_path / (name + ".bms")).exists()
+
+
+def test_batch_failure_log_is_a_field(converter, tmp_path, caplog):
+    # Das Log der kaputten Datei kommt als "log" Feld an der Fehlermeldung, nicht als roher Text
+    Write_Midis(tmp_path, ["good.mid"])
+    markers = [(0, MetaMessage('marker', text='LoopEnd')), (240, MetaMessage('marker', text='LoopStart'))]
+    with open(tmp_path / "bad.mid", "wb") as f:
+        f.write(Midi_Bytes(Build_Midi(markers, Note(0, 60, 0, 480))))
+    with caplog.at_level(logging.INFO, logger="midi_to_bms"):
+        results = converter.START_BATCH([str(tmp_path)], jobs=1)
+    assert [result["ok"] for result in results] == [False, True]
+    dump = [record for record in caplog.records if record.getMessage() == f"--- {tmp_path / 'bad.mid'} ---"]
+    assert len(dump) == 1 and dump[0].levelno == logging.ERROR
+    assert "PPQN: 120" in dump[0].log
+
+
+## BATCH MODE END ## ---------
@@ -0,0 +1,35 @@
+## BENCHMARK ## ---------
+
+import benchmark
+
+
+def Results(version, seconds, cases=("small",)):
+    # Wie aus Run_Suite: alle Stages mit dem gleichen Median (total = Summe)
+    stages = {stage: {"min": seconds, "median": seconds} for stage in benchmark.STAGES}
+    stages["total"] = {"min": seconds * len(benchmark.STAGES), "median": seconds * len(benchmark.STAGES)}
+    return {"converter_version": version, "python": "3.11.7", "repeat": 3,
+            "cases": [{"name": name, "notes": 1234, "stages": stages} for name in cases]}
+
+
+def test_compare_percent():
+    lines = benchmark.Compare(Results("1.0", 0.010), Results("1.1", 0.015, cases=("small", "new"))).splitlines()
+    assert lines[0] == "v.1.0 -> v.1.1  (median, + = slower)"
+    # Fall "new" gibt es im alten Ergebnis nicht -> keine Zeile
+    assert lines[1:] == ["small          " + "  ".join(f"{stage} +50%" for stage in benchmark.STAGES + ["total"])]
+
+
+def test_compare_skips_stages_without_time():
+    old, new = Results("1.0", 0.020), Results("1.1", 0.010)
+    old["cases"][0]["stages"]["cit"]["median"] = 0.0
+    line = benchmark.Compare(old, new).splitlines()[1]
+    assert "parse -50%" in line and "cit" not in line
+
+
+def test_format_results():
+    lines = benchmark.Format_Results(Results("1.0", 0.0025)).splitlines()
+    assert lines[0] == "Midi to BMS v.1.0  (Python 3.11.7, repeat 3, median ms)"
+    assert lines[1].split() == ["case", "notes"] + benchmark.STAGES + ["total"]
+    assert lines[2].split() == ["small", "1234"] + ["2.5"] * len(benchmark.STAGES) + ["15.0"]
+
+
+## BENCHMARK END ## ---------
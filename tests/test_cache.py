@@ -0,0 +1,42 @@
+## CONVERSION CACHE ## ---------
+
+import benchmark
+from conftest import Midi_Bytes
+
+
+def Write_Midi(path, **kwargs):
+    with open(path, "wb") as f:
+        f.write(Midi_Bytes(benchmark.Generate_Midi(**kwargs)))
+    return str(path)
+
+
+def test_cache_hit_gives_same_output(converter, tmp_path):
+    midi = Write_Midi(tmp_path / "song.mid", bars=8, channels=3, loop=True)
+    cache = converter.ConversionCache(str(tmp_path / "cache"))
+    assert converter.START_CACHED(midi, str(tmp_path / "a.bms"), cache=cache) is False
+    assert converter.START_CACHED(midi, str(tmp_path / "b.bms"), cache=cache) is True
+    assert (tmp_path / "a.bms").read_bytes() == (tmp_path / "b.bms").read_bytes()
+
+
+def test_cache_key_follows_options_and_revision(converter, tmp_path, monkeypatch):
+    midi = Write_Midi(tmp_path / "song.mid", bars=4, channels=2)
+    cache = converter.ConversionCache(str(tmp_path / "cache"))
+    key = cache.Key(midi)
+    assert cache.Key(midi) == key
+    assert cache.Key(midi, LinearToLogarithmic=True) != key
+    assert cache.Key(midi, Twilight=True) != key
+    monkeypatch.setattr(converter, "ENCODER_REVISION", converter.ENCODER_REVISION + 1)
+    assert cache.Key(midi) != key
+
+
+def test_channel_cache_dropped_on_new_revision(converter, tmp_path, monkeypatch):
+    path = str(tmp_path / "song.bms.channels")
+    channels = converter.ChannelCache(path)
+    channels.Put("key", (b"\x00", [], None))
+    channels.Save()
+    assert converter.ChannelCache(path).Get("key") == (b"\x00", [], None)
+    monkeypatch.setattr(converter, "ENCODER_REVISION", converter.ENCODER_REVISION + 1)
+    assert converter.ChannelCache(path).Get("key") is None
+
+
+## CONVERSION CACHE END ## ---------
@@ -0,0 +1,42 @@
+## KONVERTIERUNG ## ---------
+
+from mido import Message
+
+import benchmark
+from conftest import Build_Midi, Midi_Bytes, Note
+
+
+def Volume_Midi():
+    # Ein Kanal: Lautstärke 64, eine Note mit Velocity 64
+    events = [(0, Message('program_change', channel=0, program=1)),
+              (0, Message('control_change', channel=0, control=7, value=64))] + Note(0, 60, 0, 120, velocity=64)
+    return Midi_Bytes(Build_Midi(events))
+
+
+def test_logarithmic_converts_velocity_and_volume(converter):
+    linear = converter.Convert_Bytes(Volume_Midi()).bms
+    logarithmic = converter.Convert_Bytes(Volume_Midi(), converter.ConvertOptions(logarithmic=True)).bms
+    value = converter.LogarithmicCalculate(64)
+    assert value != 64
+    assert bytes([0xB8, 0x00, 64]) in linear and bytes([60, 1, 64]) in linear
+    assert bytes([0xB8, 0x00, value]) in logarithmic and bytes([60, 1, value]) in logarithmic
+    assert bytes([0xB8, 0x00, 64]) not in logarithmic
+
+
+def test_logarithmic_keeps_timing_notes(converter):
+    # Timingnoten sind Steuernoten, die bleiben linear (Midi hat nur den Timing Kanal)
+    midi = Midi_Bytes(benchmark.Generate_Midi(bars=8, channels=1, time_signature_changes=1, loop=True, timing=True))
+    linear = converter.Convert_Bytes(midi)
+    logarithmic = converter.Convert_Bytes(midi, converter.ConvertOptions(logarithmic=True))
+    assert linear == logarithmic
+
+
+def test_voice_allocator_stays_within_seven_voices(converter):
+    voices = converter.VoiceAllocator()
+    assert [voices.assign_voice(note) for note in range(60, 67)] == [1, 2, 3, 4, 5, 6, 7]
+    assert voices.release_voice(62) == 3
+    assert voices.assign_voice(70) == 3     # niedrigste freie zuerst
+    assert converter.MAX_VOICES == 7
+
+
+## KONVERTIERUNG END ## ---------
@@ -0,0 +1,43 @@
+## BMS DISASSEMBLER ## ---------
+
+import bms_disassembler
+from conftest import Midi_Bytes
+
+
+def Root_Events(data):
+    return bms_disassembler.Disassemble(data)["tracks"][0]["events"]
+
+
+def test_ticks_after_call_include_callee():
+    # 0: C3 -> 0x09 | 4: F0 16 | 6: FF | 9: F0 480, C5
+    data = bytes([0xC3, 0x00, 0x00, 0x09, 0xF0, 0x10, 0xFF, 0x00, 0x00, 0xF0, 0x83, 0x60, 0xC5])
+    assert [(event["op"], event["tick"]) for event in Root_Events(data)] == [("call", 0), ("wait", 480), ("end", 496)]
+
+
+def test_ticks_after_nested_call():
+    # 0: C3 -> 0x08 | 4: FF | 8: C3 -> 0x0D, C5 | 13: F0 100, C5
+    data = bytes([0xC3, 0x00, 0x00, 0x08, 0xFF, 0x00, 0x00, 0x00, 0xC3, 0x00, 0x00, 0x0D, 0xC5, 0xF0, 0x64, 0xC5])
+    assert [(event["op"], event["tick"]) for event in Root_Events(data)] == [("call", 0), ("end", 100)]
+
+
+def test_no_ticks_after_unknown_call_length():
+    # Unterprogramm endet mit FF statt C5 -> Dauer unbekannt, danach keine Ticks
+    data = bytes([0xC3, 0x00, 0x00, 0x06, 0xF0, 0x10, 0xFF])
+    events = Root_Events(data)
+    assert events[0]["tick"] == 0
+    assert all("tick" not in event for event in events[1:])
+
+
+def test_timing_channel_length_matches_song(converter, timing_midi):
+    # Timing Kanal besteht fast nur aus C3 Calls, das letzte Event muss trotzdem am Songende liegen
+    data = converter.Convert_Bytes(Midi_Bytes(timing_midi)).bms
+    result = bms_disassembler.Disassemble(data)
+    ends = set()
+    for track in result["tracks"]:
+        if track["kind"] == "track" and track["track"] is not None:
+            assert all("tick" in event for event in track["events"])
+            ends.add(track["events"][-1]["tick"])
+    assert len(ends) == 1
+
+
+## BMS DISASSEMBLER END ## ---------
@@ -0,0 +1,44 @@
+## INCREMENTAL ## ---------
+
+import logging
+
+import benchmark
+from conftest import Midi_Bytes
+
+
+def Save(path, mid):
+    with open(path, "wb") as f:
+        f.write(Midi_Bytes(mid))
+    return str(path)
+
+
+def test_incremental_matches_plain_conversion(converter, tmp_path):
+    # Erst alles kodieren, dann einen Kanal ändern: nur der wird neu kodiert, das Ergebnis bleibt Byte für Byte gleich
+    mid = benchmark.Generate_Midi(bars=16, channels=5, notes_per_beat=2, cc_density=0.2, time_signature_changes=1,
+                                  loop=True, timing=True, seed=3)
+    midi = Save(tmp_path / "song.mid", mid)
+    converter.START_CACHED(midi, str(tmp_path / "inc.bms"), Incremental=True)
+    assert (tmp_path / "inc.bms.channels").exists()
+
+    for msg in mid.tracks[-1]:
+        if msg.type == 'note_on' and msg.velocity > 0:
+            msg.velocity = 1 + msg.velocity % 100
+    Save(tmp_path / "song.mid", mid)
+    converter.START_CACHED(midi, str(tmp_path / "inc.bms"), Incremental=True)
+    converter.START(midi, str(tmp_path / "plain.bms"))
+    assert (tmp_path / "inc.bms").read_bytes() == (tmp_path / "plain.bms").read_bytes()
+    assert (tmp_path / "inc.bms.cit").read_bytes() == (tmp_path / "plain.bms.cit").read_bytes()
+
+
+def test_reused_timing_channel_logs_bgm_info(converter, tmp_path, caplog):
+    midi = Save(tmp_path / "song.mid", benchmark.Generate_Midi(bars=8, channels=3, loop=True, timing=True, seed=4))
+    converter.START_CACHED(midi, str(tmp_path / "song.bms"), Incremental=True)
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="midi_to_bms"):
+        converter.START_CACHED(midi, str(tmp_path / "song.bms"), Incremental=True)
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Channel 0: unchanged, reused" in messages
+    assert "-IntoBeat: 4" in messages and "-LoopBeat: 28" in messages
+
+
+## INCREMENTAL END ## ---------
@@ -0,0 +1,41 @@
+## PARALLEL CHANNELS ## ---------
+
+import logging
+
+from mido import MetaMessage, Message
+
+from conftest import Build_Midi, Midi_Bytes, Note
+
+
+def test_channel_jobs_match_serial(converter, song_midi, timing_midi):
+    for mid in (song_midi, timing_midi):
+        serial = converter.Convert_Bytes(Midi_Bytes(mid))
+        parallel = converter.Convert_Bytes(Midi_Bytes(mid), converter.ConvertOptions(channel_jobs=2))
+        assert parallel == serial
+
+
+def Bank_Enlarge_Midi():
+    # Jeder Kanal wechselt auf Midi Bank 1 -> Debug-Meldung pro Kanal aus dem Worker
+    meta = [(0, MetaMessage('marker', text='BankEnlarge_MIDIBank1=BMSBank5'))]
+    channels = []
+    for channel in range(4):
+        events = [(0, Message('control_change', channel=channel, control=0, value=1)),
+                  (0, Message('program_change', channel=channel, program=channel + 2))]
+        channels.append(events + Note(channel, 60 + channel, 0, 240))
+    return Midi_Bytes(Build_Midi(meta, *channels))
+
+
+def test_channel_jobs_log_through_logging(converter, caplog):
+    # Die Meldungen aus den Workern kommen als Log-Records an (Stufe, Handler, JSON), nicht als fertiger Text
+    with caplog.at_level(logging.DEBUG, logger="midi_to_bms"):
+        converter.Convert_Bytes(Bank_Enlarge_Midi())
+        serial = [(record.name, record.levelno, record.getMessage()) for record in caplog.records]
+        caplog.clear()
+        converter.Convert_Bytes(Bank_Enlarge_Midi(), converter.ConvertOptions(channel_jobs=2))
+        parallel = [(record.name, record.levelno, record.getMessage()) for record in caplog.records]
+    enlarge = [message for _, level, message in parallel if "Bank & Program Change Enlarge" in message]
+    assert len(enlarge) == 4
+    assert parallel == serial
+
+
+## PARALLEL CHANNELS END ## ---------
@@ -0,0 +1,33 @@
+## STAGE TIMING ## ---------
+
+import json
+
+import pytest
+
+from conftest import Midi_Bytes
+
+
+def Profile_Stages(converter, tmp_path, midi, **kwargs):
+    output = str(tmp_path / "profile.json")
+    converter.Run_Profiled(converter.Convert_Bytes, midi, output=output, **kwargs)
+    with open(output, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_nested_stages_not_counted_twice(converter, tmp_path, timing_midi):
+    profile = Profile_Stages(converter, tmp_path, Midi_Bytes(timing_midi))
+    stages = profile["stages"]
+    assert stages["channel 0/timing_and_chord"]["depth"] == 1
+    assert stages["channel 1/channels"]["depth"] == 1
+    assert stages["channel 1"]["seconds"] >= stages["channel 1/channels"]["seconds"]
+    outer = sum(stage["seconds"] for stage in stages.values() if stage["depth"] == 0)
+    assert outer <= profile["total_seconds"]
+
+
+def test_profile_closes_stages_on_error(converter, tmp_path):
+    with pytest.raises(converter.MidiError):
+        converter.Run_Profiled(converter.Convert_Bytes, b"not a midi")
+    assert converter.PROFILE is None
+
+
+## STAGE TIMING END ## ---------
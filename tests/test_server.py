@@ -0,0 +1,123 @@
+## SERVER MODE ## ---------
+
+import base64
+import concurrent.futures
+import http.client
+import http.server
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import benchmark
+from conftest import Build_Midi, Midi_Bytes, Note
+
+
+@pytest.fixture
+def serve(converter):
+    # Server auf freiem Port in einem Thread. Die Worker werden erst hier geforkt, ein monkeypatch davor gilt also auch dort
+    servers = []
+
+    def Start(jobs=1):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), converter.Conversion_Handler)
+        server.pool = converter.ServerPool(jobs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield Start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+        server.pool.Close()
+
+
+def Request(port, method, path, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    if response.getheader("Content-Type", "").startswith("application/json"):
+        data = json.loads(data)
+    return response.status, data
+
+
+def test_convert_json(converter, serve, song_midi):
+    port = serve()
+    status, body = Request(port, "POST", "/convert?yaz0=fast", Midi_Bytes(song_midi))
+    assert status == 200
+    expected = converter.Convert_Bytes(Midi_Bytes(song_midi), converter.ConvertOptions(yaz0="fast"))
+    assert base64.b64decode(body["bms"]) == expected.bms
+    assert base64.b64decode(body["yaz0"]) == expected.yaz0
+    assert body["cit"] is None
+
+
+def test_request_errors(serve, song_midi):
+    port = serve()
+    assert Request(port, "POST", "/convert?tiny=1", Midi_Bytes(song_midi)) == (400, {"error": "Unknown option 'tiny'", "type": "RequestError"})
+    assert Request(port, "POST", "/convert", b"")[0] == 400
+    assert Request(port, "POST", "/nothing", Midi_Bytes(song_midi))[0] == 404
+    assert Request(port, "POST", "/convert?output=cit", Midi_Bytes(song_midi))[0] == 404
+
+
+def test_midi_errors_are_422(serve):
+    port = serve()
+    status, body = Request(port, "POST", "/convert", b"MThd not really a midi")
+    assert (status, body["type"]) == (422, "MidiError")
+    chord = [event for note in range(60, 68) for event in Note(1, note, 0, 480)]
+    status, body = Request(port, "POST", "/convert", Midi_Bytes(Build_Midi(chord)))
+    assert (status, body["type"]) == (422, "VoiceError")
+    assert "status" not in body
+
+
+def test_converter_bug_is_500(converter, serve, monkeypatch, caplog):
+    def Broken_Convert(data, options=None):
+        converter.LOG.warning("before the bug")
+        raise RuntimeError("something broke")
+
+    monkeypatch.setattr(converter, "Convert_Bytes", Broken_Convert)
+    port = serve()
+    with caplog.at_level("WARNING", logger="midi_to_bms"):
+        status, body = Request(port, "POST", "/convert", Midi_Bytes(benchmark.Generate_Midi(bars=2, channels=1)))
+    assert status == 500
+    assert body == {"error": "something broke", "type": "RuntimeError", "log": "before the bug\n"}
+    assert [record.levelname for record in caplog.records if "something broke" in record.getMessage()] == ["ERROR"]
+
+
+def test_crashing_worker_is_500(converter, serve, monkeypatch):
+    monkeypatch.setattr(converter, "Convert_Bytes", lambda data, options=None: os._exit(1))
+    port = serve()
+    status, body = Request(port, "POST", "/convert", b"MThd")
+    assert (status, body["type"]) == (500, "BrokenProcessPool")
+    assert Request(port, "GET", "/health")[0] == 200
+
+
+def test_worker_death_restarts_pool_once(converter, serve, monkeypatch, tmp_path, song_midi):
+    # Zwei Anfragen gleichzeitig, der erste Worker stirbt -> beide bekommen BrokenProcessPool, aber nur ein neuer Pool
+    convert = converter.Convert_Bytes
+    flag = str(tmp_path / "crashed")
+
+    def Crash_Once(data, options=None):
+        try:
+            os.close(os.open(flag, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            time.sleep(1)           # noch in Arbeit, wenn der andere Worker stirbt
+            return convert(data, options)
+        time.sleep(0.3)
+        os._exit(1)
+
+    starts = []
+    start = converter.ServerPool.Start
+    monkeypatch.setattr(converter.ServerPool, "Start", lambda self: starts.append(1) or start(self))
+    monkeypatch.setattr(converter, "Convert_Bytes", Crash_Once)
+    server = serve(jobs=2)
+    with concurrent.futures.ThreadPoolExecutor(2) as threads:
+        replies = list(threads.map(lambda _: Request(server, "POST", "/convert", Midi_Bytes(song_midi)), range(2)))
+    assert [status for status, _ in replies] == [200, 200]
+    assert len(starts) == 2     # erster Pool + ein Neustart
+
+
+## SERVER MODE END ## ---------
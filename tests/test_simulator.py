@@ -0,0 +1,80 @@
+## BMS SIMULATOR ## ---------
+
+import json
+
+from mido import MetaMessage
+
+import benchmark
+import bms_simulator
+from conftest import Build_Midi, Midi_Bytes, Note
+
+
+def Run(tmp_path, capsys, data):
+    # Wie im Build: über die Kommandozeile -> (exit code, Bericht)
+    path = tmp_path / "song.bms"
+    path.write_bytes(data)
+    code = bms_simulator.COMMANDLINE(["--json", str(path)])
+    return code, json.loads(capsys.readouterr().out)[str(path)]
+
+
+def test_calls(tmp_path, capsys):
+    # 0: C3 -> 0x09 | 4: C3 -> 0x09 | 8: FF | 9: Note 60, F0 480, Note Off, C5
+    data = bytes([0xC3, 0x00, 0x00, 0x09, 0xC3, 0x00, 0x00, 0x09, 0xFF,
+                  0x3C, 0x01, 0x64, 0xF0, 0x83, 0x60, 0x81, 0xC5])
+    code, result = Run(tmp_path, capsys, data)
+    assert code == 0 and result["ok"]
+    assert (result["loop"], result["length_ticks"]) == (None, 960)
+    assert (result["note_on"], result["note_off"], result["tracks"][0]["calls"]) == (2, 2, 2)
+
+
+def test_loop_jump(tmp_path, capsys):
+    # 0: Note 60, F0 480, Off | 7: Note 62, F0 480, Off | 14: C7 -> 0x07 | 18: FF (wird nie erreicht)
+    data = bytes([0x3C, 0x01, 0x64, 0xF0, 0x83, 0x60, 0x81,
+                  0x3E, 0x01, 0x64, 0xF0, 0x83, 0x60, 0x81,
+                  0xC7, 0x00, 0x00, 0x07, 0xFF])
+    code, result = Run(tmp_path, capsys, data)
+    assert code == 0 and result["ok"]
+    assert result["loop"] == {"start_tick": 480, "end_tick": 960}
+    assert (result["note_on"], result["note_off"]) == (2, 2)
+
+
+def test_tempo(tmp_path, capsys):
+    # PPQN 120 | 120 BPM, F0 240 | 60 BPM, F0 240 | FF -> 1 s + 2 s
+    data = bytes([0xD8, 0x62, 0x00, 0x78, 0xE0, 0x00, 0x78, 0xF0, 0x81, 0x70,
+                  0xE0, 0x00, 0x3C, 0xF0, 0x81, 0x70, 0xFF])
+    code, result = Run(tmp_path, capsys, data)
+    assert code == 0 and result["ok"]
+    assert (result["loop"], result["length_ticks"], result["length_seconds"]) == (None, 480, 3.0)
+    assert (result["note_on"], result["note_off"]) == (0, 0)
+
+
+def test_note_without_note_off(tmp_path, capsys):
+    data = bytes([0x3C, 0x01, 0x64, 0xF0, 0x83, 0x60, 0xFF])
+    code, result = Run(tmp_path, capsys, data)
+    assert code == 1 and not result["ok"]
+    assert (result["loop"], result["note_on"], result["note_off"]) == (None, 1, 0)
+    assert result["tracks"][0]["problems"] == ["Note 60 on voice 1 (from tick 0) is still on at the end (tick 480)"]
+
+
+def test_converted_loop_song(converter, tmp_path, capsys):
+    meta = [(480, MetaMessage('marker', text='LoopStart')), (1920, MetaMessage('marker', text='LoopEnd'))]
+    notes = [event for start in range(0, 1920, 240) for event in Note(1, 60, start, 120)]
+    code, result = Run(tmp_path, capsys, converter.Convert_Bytes(Midi_Bytes(Build_Midi(meta, notes))).bms)
+    assert code == 0 and result["ok"]
+    assert result["loop"] == {"start_tick": 480, "end_tick": 1920}
+    assert (result["note_on"], result["note_off"]) == (8, 8)
+
+
+def test_note_off_on_loop_end_hangs(converter, tmp_path, capsys):
+    # Generate_Midi(loop=True) beendet die letzten Noten 1 Tick (PPQN 480) vor LoopEnd. Auf PPQN 120 gerundet
+    # liegt das Note Off genau auf LoopEnd und steht damit hinter dem C7 -> der Simulator meldet hängende Noten
+    midi = benchmark.Generate_Midi(bars=4, channels=2, loop=True, seed=1)
+    code, result = Run(tmp_path, capsys, converter.Convert_Bytes(Midi_Bytes(midi)).bms)
+    assert code == 1
+    assert result["loop"] == {"start_tick": 480, "end_tick": 1920}
+    problems = [problem for track in result["tracks"] for problem in track["problems"]]
+    assert problems and all(problem.endswith("is still on at the loop jump (tick 1920)") for problem in problems)
+    assert result["note_on"] - result["note_off"] == len(problems)
+
+
+## BMS SIMULATOR END ## ---------
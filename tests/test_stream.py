@@ -0,0 +1,73 @@
+## STREAMING ## ---------
+
+import logging
+import os
+
+import mido
+
+import benchmark
+from conftest import Midi_Bytes
+
+
+def Stream_And_Plain(converter, tmp_path, mid, buffer=64):
+    path = str(tmp_path / "song.mid")
+    with open(path, "wb") as f:
+        f.write(Midi_Bytes(mid))
+    converter.START(path, str(tmp_path / "plain.bms"))
+    converter.START(path, str(tmp_path / "stream.bms"), StreamBuffer=buffer)
+    return (tmp_path / "plain.bms").read_bytes(), (tmp_path / "stream.bms").read_bytes()
+
+
+def test_stream_matches_plain_conversion(converter, tmp_path, song_midi):
+    plain, stream = Stream_And_Plain(converter, tmp_path, song_midi)
+    assert stream == plain
+
+
+def test_stream_matches_with_timing_channel(converter, tmp_path, timing_midi):
+    plain, stream = Stream_And_Plain(converter, tmp_path, timing_midi)
+    assert stream == plain
+    assert (tmp_path / "stream.bms.cit").read_bytes() == (tmp_path / "plain.bms.cit").read_bytes()
+
+
+def test_stream_matches_single_track_midi(converter, tmp_path, song_midi):
+    # Typ 0: alle Kanäle in einem Track
+    merged = mido.MidiFile(type=0, ticks_per_beat=song_midi.ticks_per_beat)
+    merged.tracks.append(mido.merge_tracks(song_midi.tracks))
+    plain, stream = Stream_And_Plain(converter, tmp_path, merged, buffer=16)
+    assert stream == plain
+
+
+def test_stream_dropped_with_incremental_warns(converter, tmp_path, caplog):
+    path = str(tmp_path / "song.mid")
+    with open(path, "wb") as f:
+        f.write(Midi_Bytes(benchmark.Generate_Midi(bars=4, channels=2)))
+    with caplog.at_level(logging.WARNING, logger="midi_to_bms"):
+        converter.START_CACHED(path, str(tmp_path / "song.bms"), Incremental=True, StreamBuffer=1024)
+        converter.START(path, str(tmp_path / "song.bms"), StreamBuffer=1024, ChannelJobs=2)
+    messages = " ".join(record.getMessage() for record in caplog.records)
+    assert "--stream is ignored together with --incremental" in messages
+    assert "--channel-jobs is ignored together with --stream" in messages
+
+
+def test_stream_writer_matches_assembler(converter, tmp_path):
+    # Puffer kleiner als ein Chunk -> Pointer werden auch in schon geschriebene Teile der Datei eingesetzt
+    chunks = [converter.BMSData(b'\x90\x3C\x64' * 20), converter.BMSData()]
+    chunks[0].LoopStart()
+    chunks[0].extend(b'\xF0\x10' * 30)
+    chunks[0].Call(1)
+    chunks[0].LoopEnd()
+    chunks[1].Label(("Taktblock", 1))
+    chunks[1].extend(b'\xF0\x20' * 40 + b'\xC6')
+    asm = converter.BMSAssembler()
+    for chunk in chunks:
+        asm.Write(chunk)
+    path = str(tmp_path / "out.bms")
+    with converter.BMSStreamWriter(path, buffer_size=16) as writer:
+        for chunk in chunks:
+            writer.Write(chunk)
+        assert writer.Link() == len(asm.data)
+    assert (tmp_path / "out.bms").read_bytes() == asm.Link()
+    assert not (tmp_path / f"out.bms.tmp{os.getpid()}").exists()
+
+
+## STREAMING END ## ---------
@@ -0,0 +1,48 @@
+## WATCH MODE ## ---------
+
+import time
+
+import pytest
+
+import benchmark
+from conftest import Midi_Bytes
+
+
+def Watch_Once(converter, monkeypatch, directory, **kwargs):
+    # Erste Runde sieht die Datei, zweite konvertiert (debounce 0), dann wie Ctrl+C aufhören
+    rounds = []
+
+    def sleep(seconds):
+        rounds.append(seconds)
+        if len(rounds) >= 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(time, "sleep", sleep)
+    return converter.START_WATCH([str(directory)], debounce=0, **kwargs)
+
+
+@pytest.fixture
+def midi_folder(tmp_path):
+    with open(tmp_path / "song.mid", "wb") as f:
+        f.write(Midi_Bytes(benchmark.Generate_Midi(bars=4, channels=3, loop=True)))
+    return tmp_path
+
+
+def test_watch_keeps_channels_in_memory(converter, monkeypatch, midi_folder):
+    Watch_Once(converter, monkeypatch, midi_folder)
+    assert (midi_folder / "song.mid.bms").exists()
+    assert not (midi_folder / "song.mid.bms.channels").exists()
+
+
+def test_watch_incremental_writes_channels(converter, monkeypatch, midi_folder):
+    Watch_Once(converter, monkeypatch, midi_folder, Incremental=True)
+    assert (midi_folder / "song.mid.bms.channels").exists()
+
+
+def test_watch_stream_and_channel_jobs_same_bytes(converter, monkeypatch, midi_folder):
+    expected, _ = converter.START(str(midi_folder / "song.mid"), None)
+    Watch_Once(converter, monkeypatch, midi_folder, StreamBuffer=256, ChannelJobs=2)
+    assert (midi_folder / "song.mid.bms").read_bytes() == expected
+
+
+## WATCH MODE END ## ---------
@@ -0,0 +1,67 @@
+## YAZ0 ## ---------
+
+import random
+
+import pytest
+
+import yaz0
+from conftest import Midi_Bytes
+
+
+def Samples(converter, song_midi):
+    rng = random.Random(3)
+    return [
+        b"",
+        b"A",
+        b"AB",
+        b"ABCABCABC",
+        b"\x00" * 5000,                                     # lange Treffer (0R RR NN) mit überlappender Kopie
+        bytes(rng.randrange(256) for _ in range(3000)),     # kaum Treffer
+        bytes(rng.randrange(4) for _ in range(9000)),       # Abstände bis ans Ende vom Fenster
+        converter.Convert_Bytes(Midi_Bytes(song_midi)).bms,
+    ]
+
+
+@pytest.mark.parametrize("level", list(yaz0.LEVELS))
+def test_round_trip(converter, song_midi, level):
+    for data in Samples(converter, song_midi):
+        compressed = yaz0.Yaz0_Compress(data, level)
+        assert compressed[:4] == b"Yaz0" and int.from_bytes(compressed[4:8], "big") == len(data)
+        assert yaz0.Yaz0_Decompress(compressed) == data
+
+
+def test_best_not_larger_than_fast(converter, song_midi):
+    data = converter.Convert_Bytes(Midi_Bytes(song_midi)).bms
+    best = yaz0.Yaz0_Compress(data, "best")
+    assert len(best) <= len(yaz0.Yaz0_Compress(data, "fast"))
+    assert len(best) < len(data)
+
+
+def test_unknown_level():
+    with pytest.raises(ValueError, match="tiny"):
+        yaz0.Yaz0_Compress(b"data", "tiny")
+
+
+def test_broken_data():
+    good = yaz0.Yaz0_Compress(b"ABCABCABCABC")
+    with pytest.raises(yaz0.Yaz0Error, match="header"):
+        yaz0.Yaz0_Decompress(b"Yay0" + good[4:])
+    with pytest.raises(yaz0.Yaz0Error, match="truncated"):
+        yaz0.Yaz0_Decompress(good[:-1])
+    # Rückverweis 1 Byte hinter den Anfang
+    with pytest.raises(yaz0.Yaz0Error, match="Back reference"):
+        yaz0.Yaz0_Decompress(b"Yaz0" + (4).to_bytes(4, "big") + bytes(8) + bytes([0x00, 0x20, 0x00]))
+
+
+def test_compress_file_verify(tmp_path):
+    path = tmp_path / "Song.bms"
+    path.write_bytes(b"\x90\x3C\x64\xF0\x10" * 100)
+    output = yaz0.Yaz0_Compress_File(str(path), "fast", verify=True)
+    assert output == str(path) + ".yaz0"
+    assert yaz0.Yaz0_Decompress_File(output) == path.read_bytes()
+    (tmp_path / "empty.yaz0").write_bytes(b"")
+    with pytest.raises(yaz0.Yaz0Error):
+        yaz0.Yaz0_Decompress_File(str(tmp_path / "empty.yaz0"))
+
+
+## YAZ0 END ## ---------
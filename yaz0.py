@@ -0,0 +1,215 @@
+## YAZ0 ## ---------
+# Yaz0 Kompression direkt in Python (statt yaz0enc.exe nach der Konvertierung aufzurufen).
+#
+# Aufbau: "Yaz0" + entpackte Größe (u32, big endian) + 8 Bytes 0, danach Gruppen:
+# 1 Codebyte, dessen Bits (höchstes zuerst) sagen was für die nächsten 8 Teile kommt:
+#   Bit 1 -> 1 Byte direkt kopieren
+#   Bit 0 -> Rückverweis: NR RR     (Länge N+2 = 3..17,  Abstand RRR+1 = 1..4096)
+#                     oder 0R RR NN (Länge NN+0x12 = 18..273)
+
+import mmap
+import struct
+import sys
+
+MIN_MATCH = 3
+MAX_MATCH = 0x111           # 273
+WINDOW = 0x1000             # 4096
+
+class Yaz0Error(ValueError):
+    # Kaputte oder abgeschnittene Yaz0 Daten, oder Rundlauf-Prüfung fehlgeschlagen
+    pass
+
+
+# Stufen: wie weit die Hash-Kette abgesucht wird und ob "lazy" geschaut wird (lohnt sich ein Byte später ein längerer Treffer?)
+LEVELS = {
+    "fast": (8, False),     # für schnelle Testbuilds, etwas größere Dateien
+    "best": (4096, True),   # ganzes Fenster, wie die Nintendo Tools
+}
+
+
+def Find_Match(data, pos, head, prev, max_chain):
+    # Längsten Treffer im Fenster vor pos über die Hash-Kette suchen -> (länge, abstand)
+    end = len(data)
+    max_len = min(MAX_MATCH, end - pos)
+    if max_len < MIN_MATCH:
+        return 0, 0
+    key = data[pos] << 16 | data[pos + 1] << 8 | data[pos + 2]
+    candidate = head.get(key, -1)
+    lowest = pos - WINDOW
+    best_len = MIN_MATCH - 1
+    best_dist = 0
+    chain = max_chain
+    while candidate >= lowest and candidate >= 0 and chain > 0:
+        chain -= 1
+        # Schnelltest: erst das Byte, das einen längeren Treffer entscheiden würde
+        if data[candidate + best_len] == data[pos + best_len]:
+            length = 0
+            while length < max_len and data[candidate + length] == data[pos + length]:
+                length += 1    # darf über pos hinaus laufen (überlappende Kopie ist bei Yaz0 erlaubt)
+            if length > best_len:
+                best_len = length
+                best_dist = pos - candidate
+                if length == max_len:
+                    break
+        candidate = prev[candidate]
+    if best_len < MIN_MATCH:
+        return 0, 0
+    return best_len, best_dist
+
+
+def Yaz0_Compress(data, level="best"):
+    if level not in LEVELS:
+        raise ValueError(f"Unknown Yaz0 level {level!r} (use {', '.join(LEVELS)})")
+    max_chain, lazy = LEVELS[level]
+    data = bytes(data)
+    size = len(data)
+
+    head = {}                   # 3-Byte-Hash -> letzte Position
+    prev = [-1] * size          # Position -> vorherige Position mit gleichem Hash
+
+    def insert(pos):
+        if pos + 2 < size:
+            key = data[pos] << 16 | data[pos + 1] << 8 | data[pos + 2]
+            prev[pos] = head.get(key, -1)
+            head[key] = pos
+
+    output = bytearray(b"Yaz0")
+    output += struct.pack(">I", size)
+    output += bytes(8)
+
+    code_pos = 0
+    code_bit = 0                # 0 -> neues Codebyte nötig
+    pos = 0
+    pending = None              # Treffer, der beim lazy Suchen schon für diese Position gefunden wurde
+    while pos < size:
+        if code_bit == 0:
+            code_pos = len(output)
+            output.append(0)
+            code_bit = 0x80
+
+        if pending is not None:
+            length, dist = pending
+            pending = None
+        else:
+            length, dist = Find_Match(data, pos, head, prev, max_chain)
+
+        if length and lazy and length < MAX_MATCH:
+            # Ein Byte weiter schauen: ist der Treffer dort klar länger, erst ein Literal schreiben
+            insert(pos)
+            next_length, next_dist = Find_Match(data, pos + 1, head, prev, max_chain)
+            if next_length >= length + 2:
+                pending = (next_length, next_dist)
+                length = 0
+            inserted = 1
+        else:
+            inserted = 0
+
+        if length == 0:
+            output[code_pos] |= code_bit        # Literal
+            output.append(data[pos])
+            if not inserted:
+                insert(pos)
+            pos += 1
+        else:
+            back = dist - 1
+            if length >= 0x12:
+                output += bytes([back >> 8, back & 0xFF, length - 0x12])
+            else:
+                output += bytes([(length - 2) << 4 | back >> 8, back & 0xFF])
+            for skipped in range(pos + inserted, pos + length):
+                insert(skipped)
+            pos += length
+        code_bit >>= 1
+    return bytes(output)
+
+
+def Yaz0_Decompress(data):
+    # Nimmt bytes, bytearray, memoryview oder mmap (wird nicht kopiert)
+    with memoryview(data) as view:      # View sofort wieder freigeben, sonst lässt sich ein mmap nicht schließen
+        return Decode_View(view)
+
+
+def Decode_View(view):
+    if len(view) < 16 or view[:4] != b"Yaz0":
+        raise Yaz0Error("Not Yaz0 data (missing 'Yaz0' header)")
+    size = struct.unpack_from(">I", view, 4)[0]
+    end = len(view)
+    output = bytearray()
+    src = 16
+    try:
+        while len(output) < size:
+            code = view[src]
+            src += 1
+            if code == 0xFF and src + 8 <= end and len(output) + 8 <= size:
+                output += view[src:src + 8]        # 8 Literale am Stück
+                src += 8
+                continue
+            for bit in range(8):
+                if len(output) >= size:
+                    break
+                if code & 0x80:
+                    output.append(view[src])
+                    src += 1
+                else:
+                    first = view[src]
+                    dist = ((first & 0x0F) << 8 | view[src + 1]) + 1
+                    src += 2
+                    if first >> 4:
+                        length = (first >> 4) + 2
+                    else:
+                        length = view[src] + 0x12
+                        src += 1
+                    if dist > len(output):
+                        raise Yaz0Error(f"Back reference {dist} bytes behind the start (at output offset {len(output)})")
+                    start = len(output) - dist
+                    if dist >= length:
+                        output += output[start:start + length]
+                    else:
+                        # Überlappende Kopie: das Stück wiederholt sich
+                        output += (output[start:] * (length // dist + 1))[:length]
+                code <<= 1
+    except IndexError:
+        raise Yaz0Error(f"Yaz0 data is truncated (got {len(output)} of {size} bytes)") from None
+    if len(output) != size:
+        raise Yaz0Error(f"Yaz0 data decodes to {len(output)} bytes, header says {size}")
+    return bytes(output)
+
+
+def Yaz0_Decompress_File(path):
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return Yaz0_Decompress(b"")         # leere Datei lässt sich nicht mappen -> gleicher Fehler
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return Yaz0_Decompress(mapped)
+
+
+def Yaz0_Compress_File(path, level="best", output_path=None, verify=False):
+    # Wie yaz0enc.exe: Datei.bms -> Datei.bms.yaz0
+    # verify: vor dem Schreiben wieder entpacken und Byte für Byte vergleichen
+    if output_path is None:
+        output_path = path + ".yaz0"
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = Yaz0_Compress(data, level)
+    if verify and Yaz0_Decompress(compressed) != data:
+        raise Yaz0Error(f"Round trip check failed for {path}: decompressed data differs")
+    with open(output_path, "wb") as f:
+        f.write(compressed)
+    return output_path
+
+
+if __name__ == "__main__":
+    # Entpacken: python yaz0.py Datei.yaz0 [Ausgabe]   (ohne Ausgabe wird nur geprüft)
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python yaz0.py File.yaz0 [Output]")
+    try:
+        decompressed = Yaz0_Decompress_File(sys.argv[1])
+    except Yaz0Error as e:
+        sys.exit(f"❌ ERROR: {sys.argv[1]}: {e}")
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "wb") as f:
+            f.write(decompressed)
+    print(f"✅ {sys.argv[1]}: {len(decompressed)} Bytes")
+
+
+## YAZ0 END ## ---------